@@ -0,0 +1,48 @@
+import gc
+import os
+
+# Konfigurasi gunicorn: gunicorn -c backend/gunicorn.conf.py backend.app:app
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "1"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "600"))
+# gthread: I/O request (stream upload video, bulk, polling job) dilayani thread pool per worker, jadi satu
+# request lambat tidak memblokir worker. Inference CPU-bound tetap dijalankan executor inference dengan
+# antrian terbatas (INFERENCE_THREADS / INFERENCE_QUEUE_SIZE), request ditolak 503 jika antrian penuh.
+# GUNICORN_WORKER_CLASS=sync mengembalikan mode lama (satu request per worker).
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+# gunicorn otomatis memakai gthread jika threads > 1, jadi untuk worker lain threads harus 1
+threads = int(os.getenv("GUNICORN_THREADS", "32")) if worker_class == "gthread" else 1
+
+# Prometheus multiprocess mode: setiap worker menulis metrics ke file di direktori ini dan /metrics
+# menggabungkan semuanya. Harus di-set sebelum app (prometheus_client) di-import, file lama dihapus.
+prometheus_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+os.makedirs(prometheus_dir, exist_ok=True)
+for name in os.listdir(prometheus_dir):
+    if name.endswith(".db"):
+        os.remove(os.path.join(prometheus_dir, name))
+
+# Preload: app (dan model, jika MODEL_LOAD_MODE=eager) di-load sekali di master,
+# worker hasil fork berbagi halaman memori bobot model secara copy-on-write
+preload_app = os.getenv("GUNICORN_PRELOAD", "1") == "1"
+if preload_app:
+    # Dibaca oleh backend.routes agar thread background tidak dijalankan di master
+    os.environ["GUNICORN_PRELOAD"] = "1"
+
+
+def when_ready(server):
+    if preload_app:
+        # Pindahkan object yang sudah ada ke generasi permanen GC, agar GC di worker
+        # tidak menulis ke halaman memori milik master (memicu copy-on-write)
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from backend.routes import start_background_workers
+        start_background_workers()
+
+
+def child_exit(server, worker):
+    # Gauge "live*" milik worker yang sudah mati tidak ikut dihitung lagi
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
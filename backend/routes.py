@@ -1,19 +1,55 @@
-from flask import Blueprint, request, jsonify, redirect, session, url_for
-from backend.utils.ml_model import SentimentModel
-from backend.utils.youtube import upload_video, get_flow, credentials_to_dict, dict_to_credentials
+from flask import Blueprint, Response, g, request, jsonify, redirect, session, url_for, stream_with_context
+from backend.utils.model_loader import ModelLoader
+from backend.utils.youtube import upload_video, get_flow, dict_to_credentials
+from backend.utils.credentials import CredentialManager
+from backend.utils.jobs import JobQueue, WorkerPool, DONE, FAILED
+from backend.utils.uploads import UploadIndex, UploadJanitor, upload_key, discard_upload
+from backend.utils.batcher import InferenceOverloaded
+from backend.utils.ingest import ingest_upload, IngestError
+from backend.utils.notifier import NotificationDispatcher
+from backend.utils.bulk import (
+    BulkInputError, detect_format, iter_records, record_to_item, format_prediction, stream_predictions
+)
+from backend.utils.metrics import REQUEST_LATENCY, FALLBACKS, UPLOAD_EVENTS, track_stage, render_metrics
 import os
-import requests
+import json
+import time
 import uuid
 
 UPLOAD_FOLDER = "uploads"
+# Jumlah item maksimum per request /predict (lebih dari ini pakai /predict/bulk)
+PREDICT_MAX_ITEMS = int(os.getenv("PREDICT_MAX_ITEMS", "1000"))
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-sentiment_model = SentimentModel()
+# Dengan gunicorn --preload, model di-load sekali di master lalu di-share ke worker (copy-on-write)
+model_loader = ModelLoader()
 routes = Blueprint('routes', __name__)
 
-# In-memory storage untuk credentials (sederhana untuk single instance)
-# Format: { 'session_id': credentials_dict }
-USER_CREDENTIALS = {} 
+# Credentials YouTube per session (token frontend), disimpan di store bersama (SQLite) agar berlaku
+# di semua gunicorn worker dan tetap ada setelah restart; access token di-refresh di background
+credential_manager = CredentialManager()
+
+class UnauthorizedUpload(IngestError):
+    status_code = 401
+
+@routes.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@routes.after_request
+def record_request_latency(response):
+    # Untuk response streaming (/predict/bulk) yang terukur hanya sampai header dikirim
+    started = g.pop("request_started", None)
+    if started is not None:
+        REQUEST_LATENCY.labels(request.endpoint or "unknown", request.method, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+    return response
+
+@routes.errorhandler(InferenceOverloaded)
+def inference_overloaded(e):
+    # Backpressure: antrian inference penuh -> 503 cepat daripada request menumpuk di worker
+    return jsonify({"error": "Server busy, please retry later."}), 503, {"Retry-After": str(e.retry_after)}
 
 @routes.route('/auth/url')
 def auth_url():
@@ -38,93 +74,313 @@ def auth_callback():
         flow.fetch_token(code=code)
         credentials = flow.credentials
         
-        # Simpan credentials ke in-memory store dengan ID unik
+        # Simpan credentials ke credential store dengan ID unik
         session_id = str(uuid.uuid4())
-        USER_CREDENTIALS[session_id] = credentials_to_dict(credentials)
+        credential_manager.save(session_id, credentials)
         
         # Redirect kembali ke Frontend dengan token
         return redirect(f"http://localhost:30080?token={session_id}")
     except Exception as e:
         return f"Auth Error: {str(e)}", 500
 
+def job_credentials(data):
+    # Job lama menyimpan credentials di payload, job baru hanya session_id (token terbaru dibaca dari store)
+    if "credentials" in data:
+        return dict_to_credentials(data["credentials"])
+    credentials = credential_manager.get(data["session_id"])
+    if credentials is None:
+        raise RuntimeError("YouTube credentials not found, please connect YouTube account again")
+    return credentials
+
+def process_upload_job(job, report_progress):
+    """Upload video ke YouTube lalu kirim notifikasi n8n (dijalankan oleh background worker)"""
+    data = job["payload"]
+    analysis = job["result"]
+    credentials = None
+
+    youtube_link = None
+    upload_error = None
+
+    def on_progress(bytes_sent, total_bytes):
+        progress = bytes_sent / total_bytes if total_bytes else 0.0
+        report_progress(progress, bytes_sent=bytes_sent, total_bytes=total_bytes)
+
+    def on_session(session_uri):
+        # Checkpoint sesi upload, dipakai jika job diulang setelah worker restart
+        report_progress(job["progress"], upload_session_uri=session_uri)
+
+    try:
+        credentials = job_credentials(data)
+        previous_token = credentials.token
+        # Upload menggunakan credentials user, lanjutkan sesi sebelumnya jika ada
+        with track_stage("job", "youtube_upload", data.get("model_version")):
+            yt_data = upload_video(
+                credentials, data["video_path"], data["title"], data["description"],
+                resume_uri=analysis.get("upload_session_uri"),
+                on_progress=on_progress,
+                on_session=on_session
+            )
+        youtube_link = yt_data["url"]
+        if "upload_key" in data:
+            upload_index.record_upload(data["upload_key"], job["id"], yt_data["id"], youtube_link)
+    except Exception as e:
+        print("❌ YouTube Upload Error (Skipping but continuing):", e)
+        upload_error = str(e)
+        youtube_link = "https://youtube.com/failed_upload_placeholder"
+        FALLBACKS.labels("failed_upload_placeholder", data.get("model_version") or "").inc()
+
+    if credentials is not None and "session_id" in data:
+        # Token yang di-refresh inline oleh google-auth disimpan agar worker lain ikut memakainya
+        credential_manager.save_if_changed(data["session_id"], credentials, previous_token)
+
+    payload = {
+        "email": data["email"],
+        "title": data["title"],
+        "sentiment": analysis["sentiment"],
+        "confidence": analysis["confidence"],
+        "keywords": analysis["keywords"],
+        "category": analysis["category"],
+        "youtube_link": youtube_link,
+        "upload_status": "failed" if upload_error else "success",
+        "upload_error": upload_error
+    }
+
+    # Webhook n8n dikirim oleh dispatcher di background (timeout, retry, dead-letter)
+    notifier.notify(payload)
+
+    result = {
+        "youtube_link": youtube_link,
+        "upload_status": payload["upload_status"],
+        "upload_error": upload_error
+    }
+    if upload_error:
+        # Simpan link placeholder dulu, lalu tandai job sebagai failed
+        report_progress(1.0, **result)
+        raise RuntimeError(upload_error)
+    return result
+
+
+notifier = NotificationDispatcher()
+job_queue = JobQueue()
+job_workers = WorkerPool(job_queue, {"youtube_upload": process_upload_job})
+upload_index = UploadIndex()
+upload_janitor = UploadJanitor(UPLOAD_FOLDER, job_queue)
+
+def start_background_workers():
+    """Start thread warmup model & job worker untuk proses ini"""
+    model_loader.start()
+    job_workers.start()
+    credential_manager.start()
+    upload_janitor.start()
+
+# Di gunicorn --preload thread tidak boleh jalan di master, gunicorn.conf.py memanggilnya di post_fork
+if os.getenv("GUNICORN_PRELOAD") != "1":
+    start_background_workers()
+
+@routes.route('/healthz')
+def healthz():
+    """Liveness probe"""
+    return jsonify({"status": "ok"})
+
+@routes.route('/ready')
+def ready():
+    """Readiness probe: 200 setelah model di-load dan warmup inference selesai"""
+    status = model_loader.status()
+    return jsonify(status), 200 if model_loader.is_ready() else 503
+
+@routes.route('/metrics')
+def metrics():
+    """Metrics Prometheus (digabung dari semua gunicorn worker)"""
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+@routes.route('/predict', methods=['POST'])
+def predict():
+    """Klasifikasi teks saja: {"title", "description"} atau {"items": [...]}"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected JSON object"}), 400
+
+    try:
+        if "items" in data:
+            records = data["items"]
+            if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+                return jsonify({"error": "'items' must be a list of objects"}), 400
+            if len(records) > PREDICT_MAX_ITEMS:
+                return jsonify({"error": f"Too many items (max {PREDICT_MAX_ITEMS}), use /predict/bulk"}), 413
+            items = [record_to_item(r) for r in records]
+            predictions = model_loader.get().predict_many(items)
+            return jsonify({"results": [
+                format_prediction(p, r.get("id")) for r, p in zip(records, predictions)
+            ]})
+
+        title, description = record_to_item(data)
+        return jsonify(format_prediction(model_loader.get().predict(title, description)))
+    except BulkInputError as e:
+        return jsonify({"error": str(e)}), 400
+
+@routes.route('/predict/bulk', methods=['POST'])
+def predict_bulk():
+    """Body NDJSON/CSV di-stream, hasil dikirim balik sebagai NDJSON per batch"""
+    try:
+        fmt = detect_format(request.content_type, request.args.get("format"))
+    except BulkInputError as e:
+        return jsonify({"error": str(e)}), 400
+
+    model = model_loader.get()
+    stream = request.stream
+
+    def generate():
+        try:
+            yield from stream_predictions(model, iter_records(stream, fmt))
+        except (BulkInputError, InferenceOverloaded) as e:
+            # Header response sudah terkirim, error dilaporkan sebagai baris terakhir
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson",
+                    headers={"X-Accel-Buffering": "no"})
+
 @routes.route('/upload', methods=['POST'])
 def upload():
-    if 'video' not in request.files:
+    def check_token(form):
+        # Token dikirim sebelum video -> tolak lebih awal tanpa menulis file
+        if 'token' in form and not credential_manager.exists(form['token']):
+            raise UnauthorizedUpload("Unauthorized. Please connect YouTube account first.")
+
+    try:
+        # Video langsung di-stream ke folder upload (tanpa buffering/copy kedua)
+        with track_stage("upload", "ingest"):
+            form, video = ingest_upload(
+                request.stream, request.content_type, request.content_length,
+                UPLOAD_FOLDER, before_file=check_token
+            )
+    except IngestError as e:
+        return jsonify({"error": str(e)}), e.status_code
+
+    if video is None:
         return jsonify({"error": "No video file"}), 400
 
-    video = request.files['video']
-    title = request.form.get('title', '')
-    description = request.form.get('description', '')
-    email = request.form.get('email', '')
-    token = request.form.get('token', '')
+    title = form.get('title', '')
+    description = form.get('description', '')
+    email = form.get('email', '')
+    token = form.get('token', '')
 
     # Validasi Login
-    if not token or token not in USER_CREDENTIALS:
+    if not credential_manager.exists(token):
+        discard_upload(video["path"], job_queue)
         return jsonify({"error": "Unauthorized. Please connect YouTube account first."}), 401
     
-    # Ambil credentials user
-    creds_dict = USER_CREDENTIALS[token]
-    credentials = dict_to_credentials(creds_dict)
+    video_path = video["path"]
+    dedupe_key = upload_key(token, video["sha256"], title, description)
 
-    video_path = os.path.join(UPLOAD_FOLDER, video.filename)
-    video.save(video_path)
+    # Video + title/description yang sama sudah pernah di-submit: kembalikan hasil sebelumnya
+    duplicate = duplicate_response(dedupe_key, video_path)
+    if duplicate is not None:
+        return duplicate
 
     try:
         # sentiment_model.predict now returns a dict
-        prediction = sentiment_model.predict(title, description)
-        sentiment = prediction["label"]
-        confidence = prediction["confidence"]
-        keywords = prediction["keywords"]
-        category = prediction.get("category", "Umum")
-
-        youtube_link = None
-        upload_error = None
-
-        try:
-            # Upload menggunakan credentials user
-            yt_data = upload_video(credentials, video_path, title, description)
-            youtube_link = yt_data["url"]
-        except Exception as e:
-            print("❌ YouTube Upload Error (Skipping but continuing):", e)
-            upload_error = str(e)
-            youtube_link = "https://youtube.com/failed_upload_placeholder"
-
-        n8n_webhook = os.getenv("N8N_WEBHOOK_URL", "http://localhost:5678/webhook/send_notification")
-        payload = {
-            "email": email,
-            "title": title,
-            "sentiment": sentiment,
-            "confidence": confidence,
-            "keywords": keywords,
-            "category": category,
-            "youtube_link": youtube_link,
-            "upload_status": "failed" if upload_error else "success",
-            "upload_error": upload_error
+        model = model_loader.get()
+        with track_stage("upload", "predict", model.model_version):
+            prediction = model.predict(title, description)
+        analysis = {
+            "sentiment": prediction["label"],
+            "confidence": prediction["confidence"],
+            "keywords": prediction["keywords"],
+            "category": prediction.get("category", "Umum")
         }
 
-        try:
-            print("🔹 Sending to n8n webhook:", payload)
-            res = requests.post(n8n_webhook, json=payload)
-            print("🔹 n8n response:", res.status_code, res.text)
-        except Exception as e:
-            print("❌ n8n webhook error:", e)
+        # Upload YouTube + notifikasi n8n dijalankan di background, response langsung dikirim
+        job_workers.start()
+        with track_stage("upload", "enqueue", model.model_version):
+            job_id = job_queue.enqueue("youtube_upload", {
+                # Credentials dibaca dari store saat job jalan (token sudah di-refresh jika perlu)
+                "session_id": token,
+                "video_path": video_path,
+                "video_sha256": video["sha256"],
+                "upload_key": dedupe_key,
+                "title": title,
+                "description": description,
+                "email": email,
+                "model_version": model.model_version
+            }, result=analysis)
+        job_workers.notify()
+        upload_index.put(dedupe_key, video["sha256"], job_id, analysis)
 
         response_data = {
-            "message": "Processed successfully!",
-            "youtube_link": youtube_link,
-            "sentiment": sentiment,
-            "confidence": confidence,
-            "keywords": keywords,
-            "category": category
+            "message": "Analysis completed, YouTube upload queued.",
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+            "youtube_link": None,
+            **analysis
         }
+        return jsonify(response_data), 202
 
-        if upload_error:
-            response_data["warning"] = "YouTube upload failed, but analysis was completed."
-            response_data["upload_error"] = upload_error
-
-        return jsonify(response_data)
-
+    except InferenceOverloaded:
+        # Client akan mengirim ulang video, file ini tidak dipakai
+        discard_upload(video_path, job_queue)
+        raise
     except Exception as e:
         import traceback
         traceback.print_exc()
         return jsonify({"error": str(e), "details": traceback.format_exc()}), 500
+
+def duplicate_response(dedupe_key, video_path):
+    """Response dari upload sebelumnya dengan key yang sama, None jika harus diproses sebagai upload baru"""
+    entry = upload_index.get(dedupe_key)
+    if entry is None:
+        return None
+    job = job_queue.get(entry["job_id"])
+    if job is None and not entry["youtube_id"]:
+        return None
+    if job is not None and job["status"] == FAILED:
+        # Upload sebelumnya gagal -> diproses ulang sebagai job baru
+        UPLOAD_EVENTS.labels("retry_failed").inc()
+        return None
+
+    # File baru tidak dipakai; dicek terhadap semua job aktif (bukan hanya job dari entry ini)
+    discard_upload(video_path, job_queue)
+    UPLOAD_EVENTS.labels("duplicate").inc()
+
+    result = job["result"] if job is not None else entry["result"]
+    status = job["status"] if job is not None else DONE
+    response_data = {
+        "message": "Duplicate upload, returning existing result.",
+        "job_id": entry["job_id"],
+        "status": status,
+        "status_url": f"/jobs/{entry['job_id']}",
+        "youtube_link": entry["youtube_link"] or result.get("youtube_link"),
+        "duplicate": True,
+        "sentiment": result.get("sentiment"),
+        "confidence": result.get("confidence"),
+        "keywords": result.get("keywords", []),
+        "category": result.get("category")
+    }
+    return jsonify(response_data), 200 if status == DONE else 202
+
+@routes.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status upload di background: progress, link YouTube dan hasil analisis"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+
+    result = job["result"]
+    response_data = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "youtube_link": result.get("youtube_link"),
+        "sentiment": result.get("sentiment"),
+        "confidence": result.get("confidence"),
+        "keywords": result.get("keywords", []),
+        "category": result.get("category")
+    }
+    for key in ("bytes_sent", "total_bytes"):
+        if key in result:
+            response_data[key] = result[key]
+    if job["status"] == "failed":
+        response_data["warning"] = "YouTube upload failed, but analysis was completed."
+        response_data["upload_error"] = job["error"]
+    return jsonify(response_data)
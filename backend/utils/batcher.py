@@ -0,0 +1,203 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from backend.utils.metrics import BATCH_SIZE, BATCH_QUEUE_WAIT, INFERENCE_REJECTED
+from backend.utils.sqlite_store import PerProcessStart
+
+# Configuration (bisa diubah lewat ENV)
+BATCH_MAX_SIZE = int(os.getenv("INFERENCE_BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("INFERENCE_BATCH_MAX_WAIT_MS", "2"))
+# Inference CPU-bound dijalankan oleh thread khusus (bukan thread request gunicorn)
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "1"))
+# Jumlah maksimum task inference yang menunggu per proses, lebih dari ini request ditolak (503).
+# Antrian MicroBatcher memakai nilai yang sama tapi minimal INFERENCE_BATCH_MAX_SIZE item
+INFERENCE_QUEUE_SIZE = int(os.getenv("INFERENCE_QUEUE_SIZE", "16"))
+# Batas waktu menunggu hasil inference sebelum request dianggap overload
+INFERENCE_TIMEOUT = float(os.getenv("INFERENCE_TIMEOUT", "30"))
+INFERENCE_RETRY_AFTER = int(os.getenv("INFERENCE_RETRY_AFTER", "1"))
+
+
+class InferenceOverloaded(Exception):
+    """Antrian inference penuh, request sebaiknya diulang setelah retry_after detik"""
+    retry_after = INFERENCE_RETRY_AFTER
+
+
+class InferenceExecutor:
+    """Thread pool terbatas untuk inference dengan backpressure: task baru ditolak jika antrian penuh"""
+
+    def __init__(self, threads=INFERENCE_THREADS, max_queue=INFERENCE_QUEUE_SIZE, timeout=INFERENCE_TIMEOUT):
+        self.threads = max(1, int(threads))
+        self.max_queue = max(0, int(max_queue))
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._slots = None
+
+    def _ensure_started(self):
+        # Thread pool tidak ikut ter-fork, jadi dibuat ulang di setiap proses (gunicorn worker)
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(self.threads, thread_name_prefix="inference")
+                self._slots = threading.BoundedSemaphore(self.threads + self.max_queue)
+                self._pid = os.getpid()
+            return self._pool, self._slots
+
+    def submit(self, fn, *args, wait=0):
+        """Jadwalkan fn(*args), return Future; InferenceOverloaded jika tidak ada slot dalam `wait` detik"""
+        pool, slots = self._ensure_started()
+        acquired = slots.acquire(timeout=wait) if wait > 0 else slots.acquire(blocking=False)
+        if not acquired:
+            INFERENCE_REJECTED.inc()
+            raise InferenceOverloaded(f"Inference queue full ({self.max_queue} pending)")
+        try:
+            future = pool.submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def run(self, fn, *args, wait=0):
+        """submit() lalu tunggu hasilnya (maksimal self.timeout detik)"""
+        try:
+            return self.submit(fn, *args, wait=wait).result(timeout=self.timeout)
+        except FutureTimeout:
+            INFERENCE_REJECTED.inc()
+            raise InferenceOverloaded(f"Inference did not finish within {self.timeout:.0f}s") from None
+
+
+# Satu executor per proses, dipakai bersama oleh semua instance model (juga setelah model di-reload)
+inference_executor = InferenceExecutor()
+
+
+# Penanda di antrian agar thread batcher berhenti (lihat MicroBatcher.close)
+_STOP = object()
+
+
+class _Pending:
+    __slots__ = ("item", "future", "enqueued_at")
+
+    def __init__(self, item):
+        self.item = item
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Menggabungkan request yang datang bersamaan menjadi satu batch inference"""
+
+    def __init__(self, batch_fn, max_batch_size=BATCH_MAX_SIZE, max_wait_ms=BATCH_MAX_WAIT_MS,
+                 max_queue=INFERENCE_QUEUE_SIZE):
+        # batch_fn menerima list item dan harus mengembalikan list hasil dengan urutan yang sama
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        # 0 = tanpa batas; item yang menunggu melebihi max_queue ditolak (InferenceOverloaded)
+        self.max_queue = max(0, int(max_queue))
+        if 0 < self.max_queue < self.max_batch_size:
+            # Antrian lebih kecil dari satu batch: batch tidak pernah penuh dan request ditolak terlalu cepat
+            print(f"Batcher queue size {self.max_queue} is below the batch size, using {self.max_batch_size}")
+            self.max_queue = self.max_batch_size
+
+        self._queue = queue.Queue(self.max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._started = PerProcessStart()
+        self._closed = False
+
+    def _ensure_started(self):
+        if not self._closed:
+            self._started.run(self._start_thread)
+
+    def _start_thread(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._queue = queue.Queue(self.max_queue)
+            self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._thread.start()
+
+    def submit(self, item):
+        """Masukkan satu item ke antrian, hasilnya berupa Future"""
+        self._ensure_started()
+        pending = _Pending(item)
+        # Cek _closed dan enqueue di bawah lock: tidak ada item yang masuk antrian setelah _STOP
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                try:
+                    self._queue.put_nowait(pending)
+                except queue.Full:
+                    INFERENCE_REJECTED.inc()
+                    raise InferenceOverloaded(f"Inference queue full ({self.max_queue} pending)") from None
+        if closed:
+            # Batcher sudah dihentikan (model lama setelah hot-swap), item diproses langsung
+            try:
+                pending.future.set_result(self.batch_fn([item])[0])
+            except Exception as e:
+                pending.future.set_exception(e)
+        return pending.future
+
+    def predict(self, item, timeout=INFERENCE_TIMEOUT):
+        try:
+            return self.submit(item).result(timeout=timeout)
+        except FutureTimeout:
+            INFERENCE_REJECTED.inc()
+            raise InferenceOverloaded(f"Inference did not finish within {timeout:.0f}s") from None
+
+    def close(self):
+        """Hentikan thread batcher setelah item yang sudah mengantri selesai diproses"""
+        with self._lock:
+            self._closed = True
+            # Thread milik proses induk (sebelum fork) tidak alive di proses ini
+            running = self._thread is not None and self._thread.is_alive()
+            self._thread = None
+        if running:
+            self._queue.put(_STOP)
+
+    def _collect(self):
+        """Return (batch, stop); stop=True jika close() dipanggil, batch terakhir tetap diproses"""
+        first = self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    pending = self._queue.get_nowait()
+                else:
+                    pending = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if pending is _STOP:
+                return batch, True
+            batch.append(pending)
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if not batch:
+                continue
+            started = time.perf_counter()
+            BATCH_SIZE.observe(len(batch))
+            for pending in batch:
+                BATCH_QUEUE_WAIT.observe(started - pending.enqueued_at)
+
+            try:
+                results = self.batch_fn([pending.item for pending in batch])
+            except Exception as e:
+                for pending in batch:
+                    pending.future.set_exception(e)
+                continue
+
+            for pending, result in zip(batch, results):
+                pending.future.set_result(result)
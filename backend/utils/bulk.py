@@ -0,0 +1,138 @@
+import os
+import csv
+import json
+from werkzeug.http import parse_options_header
+
+from backend.utils.batcher import INFERENCE_TIMEOUT
+
+# Configuration (bisa diubah lewat ENV)
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "512"))
+BULK_READ_SIZE = int(os.getenv("BULK_READ_SIZE", str(64 * 1024)))
+BULK_MAX_LINE_BYTES = int(os.getenv("BULK_MAX_LINE_BYTES", str(1024 * 1024)))
+
+NDJSON = "ndjson"
+CSV = "csv"
+
+
+class BulkInputError(Exception):
+    pass
+
+
+def detect_format(content_type, requested=None):
+    """Format input bulk dari ?format= atau Content-Type, default NDJSON"""
+    if requested:
+        requested = requested.lower()
+        if requested not in (NDJSON, CSV):
+            raise BulkInputError(f"Unsupported format '{requested}', use ndjson or csv")
+        return requested
+    mimetype, _ = parse_options_header(content_type or "")
+    if mimetype in ("text/csv", "application/csv"):
+        return CSV
+    return NDJSON
+
+
+def iter_lines(stream, read_size=BULK_READ_SIZE, max_line_bytes=BULK_MAX_LINE_BYTES):
+    """Baca stream per chunk dan yield per baris (str), memori hanya sebesar satu chunk + satu baris"""
+    pending = b""
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            break
+        pending += chunk
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        if len(pending) > max_line_bytes:
+            raise BulkInputError(f"Line exceeds {max_line_bytes} bytes")
+        for line in lines:
+            yield line.decode("utf-8", "replace") + "\n"
+    if pending:
+        yield pending.decode("utf-8", "replace")
+
+
+def iter_records(stream, fmt):
+    """Yield (line_no, record atau None, error atau None) dari body NDJSON/CSV"""
+    lines = iter_lines(stream)
+
+    if fmt == CSV:
+        # csv.reader menarik baris berikutnya sendiri jika ada newline di dalam quote
+        reader = csv.DictReader(lines)
+        if reader.fieldnames is None:
+            return
+        if "title" not in reader.fieldnames and "text" not in reader.fieldnames:
+            raise BulkInputError("CSV header must contain 'title' (and optionally 'description') or 'text'")
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_no, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, None, "Each line must be a JSON object"
+            continue
+        yield line_no, record, None
+
+
+def record_to_item(record):
+    """Ambil (title, description) dari satu record; 'text' dipakai jika tidak ada title"""
+    if "title" in record or "description" in record:
+        return str(record.get("title") or ""), str(record.get("description") or "")
+    if "text" in record:
+        return str(record.get("text") or ""), ""
+    raise BulkInputError("Record needs 'title'/'description' or 'text'")
+
+
+def format_prediction(prediction, record_id=None, line_no=None):
+    result = {
+        "sentiment": prediction["label"],
+        "confidence": prediction["confidence"],
+        "keywords": prediction["keywords"],
+        "category": prediction.get("category", "Umum"),
+    }
+    if record_id is not None:
+        result["id"] = record_id
+    if line_no is not None:
+        result["line"] = line_no
+    return result
+
+
+def stream_predictions(model, records, batch_size=BULK_BATCH_SIZE):
+    """Kumpulkan record per batch, jalankan model.predict_many sekali per batch dan
+    yield hasilnya sebagai baris NDJSON sambil input masih dibaca"""
+    batch = []
+
+    def flush():
+        # Stream yang sudah berjalan menunggu slot executor, tidak langsung ditolak
+        predictions = model.predict_many([item for _, _, item in batch], wait=INFERENCE_TIMEOUT)
+        lines = [
+            json.dumps(format_prediction(prediction, record_id, line_no)) + "\n"
+            for (line_no, record_id, _), prediction in zip(batch, predictions)
+        ]
+        batch.clear()
+        return "".join(lines)
+
+    for line_no, record, error in records:
+        if error is None:
+            try:
+                item = record_to_item(record)
+            except BulkInputError as e:
+                error = str(e)
+        if error is not None:
+            # Baris yang rusak tidak menghentikan stream, dilaporkan di posisinya
+            if batch:
+                yield flush()
+            yield json.dumps({"line": line_no, "error": error}) + "\n"
+            continue
+
+        batch.append((line_no, record.get("id"), item))
+        if len(batch) >= batch_size:
+            yield flush()
+
+    if batch:
+        yield flush()
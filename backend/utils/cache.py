@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from backend.utils.metrics import PREDICTION_CACHE_EVENTS
+
+# Configuration (bisa diubah lewat ENV)
+CACHE_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "86400"))
+# Shared tier opsional (SQLite di volume bersama), kosong = hanya cache lokal per worker
+CACHE_DB_PATH = os.getenv("PREDICTION_CACHE_DB", "")
+CACHE_DB_MAX_ENTRIES = int(os.getenv("PREDICTION_CACHE_DB_SIZE", "200000"))
+
+
+def cache_key(normalized_text, model_version):
+    """Key berbasis konten: hash teks hasil preprocessing + versi model"""
+    return hashlib.sha256(f"{model_version}\0{normalized_text}".encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Cache in-process dengan batas jumlah entry (LRU) dan TTL"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._data[key]
+                self.evictions += 1
+                PREDICTION_CACHE_EVENTS.labels("local", "eviction").inc()
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.time() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+                PREDICTION_CACHE_EVENTS.labels("local", "eviction").inc()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteCache:
+    """Shared tier berbasis SQLite agar semua gunicorn worker bisa berbagi hasil"""
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path, max_entries=CACHE_DB_MAX_ENTRIES, ttl=CACHE_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._writes = 0
+        self.evictions = 0
+
+    def _connection(self):
+        # Koneksi SQLite tidak boleh dipakai lintas fork, buat ulang per proses
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS prediction_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value, expires_at FROM prediction_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO prediction_cache (key, value, expires_at, created_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now + self.ttl, now)
+                )
+            self._writes += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(conn, now)
+
+    def _prune(self, conn, now):
+        # Hapus entry kadaluarsa lalu entry terlama jika melebihi batas
+        with conn:
+            expired = conn.execute("DELETE FROM prediction_cache WHERE expires_at < ?", (now,)).rowcount
+            overflow = conn.execute(
+                "DELETE FROM prediction_cache WHERE key IN ("
+                "SELECT key FROM prediction_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            ).rowcount
+        self.evictions += expired + overflow
+        PREDICTION_CACHE_EVENTS.labels("shared", "eviction").inc(expired + overflow)
+
+
+class PredictionCache:
+    """Cache dua tingkat: LRU lokal lalu (opsional) shared SQLite"""
+
+    def __init__(self, max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, db_path=CACHE_DB_PATH):
+        self.local = LRUCache(max_entries, ttl)
+        self.shared = SQLiteCache(db_path, ttl=ttl) if db_path else None
+        self.model_version = None
+        self.hits = {"local": 0, "shared": 0}
+        self.misses = 0
+
+    def check_version(self, model_version):
+        # Artifact model berubah -> semua entry lama di LRU lokal tidak berlaku lagi
+        if model_version != self.model_version:
+            self.local.clear()
+            self.model_version = model_version
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is not None:
+            self.hits["local"] += 1
+            PREDICTION_CACHE_EVENTS.labels("local", "hit").inc()
+            return value
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except sqlite3.Error as e:
+                print(f"Prediction cache (shared) error: {e}")
+                value = None
+            if value is not None:
+                self.hits["shared"] += 1
+                PREDICTION_CACHE_EVENTS.labels("shared", "hit").inc()
+                self.local.set(key, value)
+                return value
+
+        self.misses += 1
+        PREDICTION_CACHE_EVENTS.labels("all", "miss").inc()
+        return None
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value)
+            except sqlite3.Error as e:
+                print(f"Prediction cache (shared) error: {e}")
+
+    def stats(self):
+        return {
+            "hits": dict(self.hits),
+            "misses": self.misses,
+            "evictions": {
+                "local": self.local.evictions,
+                "shared": self.shared.evictions if self.shared is not None else 0,
+            },
+            "entries": len(self.local),
+            "model_version": self.model_version,
+        }
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+
+from google.auth.transport.requests import Request
+
+from backend.utils.youtube import credentials_to_dict, dict_to_credentials
+from backend.utils.metrics import track_stage
+from backend.utils.sqlite_store import ThreadLocalConnection, PerProcessStart
+
+# Configuration (bisa diubah lewat ENV)
+# "sqlite" = file SQLite yang dipakai bersama oleh semua worker (letakkan di volume bersama untuk
+# beberapa replica), "memory" = dict per proses (hanya untuk development dengan satu worker)
+CREDENTIAL_STORE = os.getenv("CREDENTIAL_STORE", "sqlite")
+CREDENTIAL_DB_PATH = os.getenv("CREDENTIAL_DB_PATH", "credentials.db")
+# Berapa lama object Credentials di-cache per proses sebelum dibaca ulang dari store
+CREDENTIAL_CACHE_TTL = float(os.getenv("CREDENTIAL_CACHE_TTL", "60"))
+# Refresher background: cek setiap interval, refresh token yang kedaluwarsa dalam margin ini
+CREDENTIAL_REFRESH_INTERVAL = float(os.getenv("CREDENTIAL_REFRESH_INTERVAL", "60"))
+CREDENTIAL_REFRESH_MARGIN = float(os.getenv("CREDENTIAL_REFRESH_MARGIN", "300"))
+# Selama lease ini token hanya di-refresh oleh satu worker
+CREDENTIAL_REFRESH_LEASE = int(os.getenv("CREDENTIAL_REFRESH_LEASE", "60"))
+
+
+def to_epoch(expiry):
+    # google-auth memakai datetime naive dalam UTC
+    return expiry.replace(tzinfo=timezone.utc).timestamp()
+
+
+def expiry_timestamp(cred_dict):
+    expiry = cred_dict.get("expiry")
+    return to_epoch(datetime.fromisoformat(expiry)) if expiry else None
+
+
+class SQLiteCredentialStore:
+    """Credentials per session di SQLite (WAL), aman dipakai bersama oleh beberapa gunicorn worker"""
+
+    def __init__(self, db_path=CREDENTIAL_DB_PATH):
+        self.db_path = db_path
+        self._connect = ThreadLocalConnection(db_path)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS credentials ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, expiry REAL, "
+            "refresh_lease REAL NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+        )
+
+    def get(self, session_id):
+        row = self._connect().execute(
+            "SELECT data FROM credentials WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id, cred_dict):
+        self._connect().execute(
+            "INSERT INTO credentials (session_id, data, expiry, updated_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, expiry = excluded.expiry, "
+            "refresh_lease = 0, updated_at = excluded.updated_at",
+            (session_id, json.dumps(cred_dict), expiry_timestamp(cred_dict), time.time())
+        )
+
+    def delete(self, session_id):
+        self._connect().execute("DELETE FROM credentials WHERE session_id = ?", (session_id,))
+
+    def expiring(self, before):
+        """Session yang access token-nya kedaluwarsa sebelum `before` (epoch) dan bisa di-refresh"""
+        rows = self._connect().execute(
+            "SELECT session_id, data FROM credentials WHERE expiry IS NOT NULL AND expiry < ?", (before,)
+        ).fetchall()
+        return [session_id for session_id, data in rows if json.loads(data).get("refresh_token")]
+
+    def claim_refresh(self, session_id, lease=CREDENTIAL_REFRESH_LEASE):
+        """True jika worker ini yang mendapat giliran refresh (atomik antar proses)"""
+        now = time.time()
+        return self._connect().execute(
+            "UPDATE credentials SET refresh_lease = ? WHERE session_id = ? AND refresh_lease < ?",
+            (now + lease, session_id, now)
+        ).rowcount == 1
+
+
+class MemoryCredentialStore:
+    """Store per proses dengan interface yang sama (development / satu worker)"""
+
+    def __init__(self):
+        self._data = {}
+        self._leases = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        with self._lock:
+            cred_dict = self._data.get(session_id)
+            return dict(cred_dict) if cred_dict else None
+
+    def put(self, session_id, cred_dict):
+        with self._lock:
+            self._data[session_id] = dict(cred_dict)
+            self._leases.pop(session_id, None)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def expiring(self, before):
+        with self._lock:
+            expiries = {
+                session_id: expiry_timestamp(cred_dict)
+                for session_id, cred_dict in self._data.items() if cred_dict.get("refresh_token")
+            }
+        return [session_id for session_id, expiry in expiries.items() if expiry is not None and expiry < before]
+
+    def claim_refresh(self, session_id, lease=CREDENTIAL_REFRESH_LEASE):
+        now = time.time()
+        with self._lock:
+            if self._leases.get(session_id, 0) >= now:
+                return False
+            self._leases[session_id] = now + lease
+            return True
+
+
+def create_store(kind=CREDENTIAL_STORE):
+    if kind == "memory":
+        return MemoryCredentialStore()
+    if kind == "sqlite":
+        return SQLiteCredentialStore()
+    raise ValueError(f"Unknown credential store: {kind}")
+
+
+class CredentialManager:
+    """Read-through cache object Credentials di atas store, plus refresher background yang
+    memperbarui access token sebelum kedaluwarsa (agar upload tidak menunggu refresh inline)"""
+
+    def __init__(self, store=None, cache_ttl=CREDENTIAL_CACHE_TTL,
+                 refresh_interval=CREDENTIAL_REFRESH_INTERVAL, refresh_margin=CREDENTIAL_REFRESH_MARGIN):
+        self.store = store if store is not None else create_store()
+        self.cache_ttl = cache_ttl
+        self.refresh_interval = refresh_interval
+        self.refresh_margin = refresh_margin
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._started = PerProcessStart()
+
+    def get(self, session_id):
+        """Object Credentials untuk session, None jika tidak ada"""
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(session_id)
+        if entry is not None:
+            credentials, loaded_at = entry
+            # Token yang hampir kedaluwarsa dibaca ulang, mungkin sudah di-refresh worker lain
+            expiring = credentials.expiry is not None and to_epoch(credentials.expiry) < now + self.refresh_margin
+            if now - loaded_at < self.cache_ttl and not expiring:
+                return credentials
+
+        cred_dict = self.store.get(session_id)
+        if cred_dict is None:
+            with self._lock:
+                self._cache.pop(session_id, None)
+            return None
+        credentials = dict_to_credentials(cred_dict)
+        with self._lock:
+            self._cache[session_id] = (credentials, now)
+        return credentials
+
+    def exists(self, session_id):
+        return bool(session_id) and self.get(session_id) is not None
+
+    def save(self, session_id, credentials):
+        """Simpan credentials (baru atau hasil refresh) ke store dan cache"""
+        self.store.put(session_id, credentials_to_dict(credentials))
+        with self._lock:
+            self._cache[session_id] = (credentials, time.time())
+
+    def save_if_changed(self, session_id, credentials, previous_token):
+        # google-auth me-refresh token secara inline jika sudah kedaluwarsa saat dipakai
+        if credentials.token != previous_token:
+            self.save(session_id, credentials)
+
+    def delete(self, session_id):
+        self.store.delete(session_id)
+        with self._lock:
+            self._cache.pop(session_id, None)
+
+    def refresh_expiring(self):
+        """Satu putaran refresh untuk semua token yang kedaluwarsa dalam refresh_margin"""
+        refreshed = 0
+        for session_id in self.store.expiring(time.time() + self.refresh_margin):
+            if not self.store.claim_refresh(session_id):
+                continue
+            cred_dict = self.store.get(session_id)
+            if cred_dict is None:
+                continue
+            credentials = dict_to_credentials(cred_dict)
+            try:
+                with track_stage("credentials", "refresh"):
+                    credentials.refresh(Request())
+            except Exception as e:
+                # Lease tetap dipegang, dicoba lagi setelah lease habis
+                print(f"Credential refresh failed for session {session_id[:8]}: {e}")
+                continue
+            self.save(session_id, credentials)
+            refreshed += 1
+        return refreshed
+
+    def start(self):
+        if self.refresh_interval > 0:
+            self._started.run(threading.Thread(target=self._run, name="credential-refresher", daemon=True).start)
+
+    def _run(self):
+        while True:
+            try:
+                refreshed = self.refresh_expiring()
+                if refreshed:
+                    print(f"Refreshed {refreshed} credential(s)")
+            except Exception as e:
+                print(f"Credential refresher error: {e}")
+            time.sleep(self.refresh_interval)
@@ -0,0 +1,114 @@
+import os
+import uuid
+import hashlib
+from werkzeug.http import parse_options_header
+from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NeedData
+from werkzeug.utils import secure_filename
+
+# Configuration (bisa diubah lewat ENV)
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", str(1024 * 1024)))
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(500 * 1024 * 1024)))  # sama dengan nginx client_max_body_size
+MAX_FORM_FIELD_BYTES = int(os.getenv("MAX_FORM_FIELD_BYTES", str(64 * 1024)))
+
+
+class IngestError(Exception):
+    status_code = 400
+
+
+class UploadTooLarge(IngestError):
+    status_code = 413
+
+
+def ingest_upload(stream, content_type, content_length, upload_folder, file_field="video",
+                  max_bytes=MAX_UPLOAD_BYTES, before_file=None):
+    """Parse multipart/form-data langsung dari request stream tanpa buffering seluruh video
+
+    Video ditulis per chunk ke folder upload sambil dihitung ukuran dan SHA-256-nya, jadi tidak ada
+    file temporary Werkzeug lalu copy kedua. before_file(form) dipanggil dengan field yang sudah
+    diterima sebelum video dimulai (misalnya untuk menolak token yang salah lebih awal).
+
+    Return (form, video) dengan video = {path, filename, size, sha256} atau None.
+    """
+    mimetype, options = parse_options_header(content_type or "")
+    boundary = options.get("boundary")
+    if mimetype != "multipart/form-data" or not boundary:
+        raise IngestError("Expected multipart/form-data")
+    if content_length and content_length > max_bytes + MAX_FORM_FIELD_BYTES:
+        raise UploadTooLarge(f"Upload exceeds limit of {max_bytes} bytes")
+
+    # Batas ukuran field dicek sendiri; max_form_memory_size decoder berlaku per chunk yang diterima
+    decoder = MultipartDecoder(boundary.encode("latin-1"))
+    form = {}
+    video = None
+
+    # Part yang sedang dibaca
+    field_name = None
+    field_value = None
+    out = None
+    part_path = None
+    filename = None
+    hasher = None
+    size = 0
+
+    try:
+        finished = False
+        while not finished:
+            chunk = stream.read(INGEST_CHUNK_SIZE)
+            decoder.receive_data(chunk or None)
+
+            event = decoder.next_event()
+            while not isinstance(event, NeedData):
+                if isinstance(event, File) and event.name == file_field and video is None and out is None:
+                    if before_file is not None:
+                        before_file(form)
+                    filename = secure_filename(event.filename) or "video"
+                    part_path = os.path.join(upload_folder, f".{uuid.uuid4().hex}.part")
+                    out = open(part_path, "wb")
+                    hasher = hashlib.sha256()
+                    size = 0
+                elif isinstance(event, (Field, File)):
+                    # File lain selain video diabaikan
+                    field_name = event.name if isinstance(event, Field) else None
+                    field_value = bytearray()
+                elif isinstance(event, Data):
+                    if out is not None:
+                        size += len(event.data)
+                        if size > max_bytes:
+                            raise UploadTooLarge(f"Upload exceeds limit of {max_bytes} bytes")
+                        hasher.update(event.data)
+                        out.write(event.data)
+                        if not event.more_data:
+                            out.close()
+                            out = None
+                            video = _finalize(part_path, upload_folder, filename, size, hasher.hexdigest())
+                            part_path = None
+                    elif field_name is not None:
+                        field_value += event.data
+                        if len(field_value) > MAX_FORM_FIELD_BYTES:
+                            raise UploadTooLarge(f"Form field '{field_name}' too large")
+                        if not event.more_data:
+                            form[field_name] = field_value.decode("utf-8", "replace")
+                            field_name = None
+                elif isinstance(event, Epilogue):
+                    finished = True
+                    break
+                event = decoder.next_event()
+
+            if not chunk and not finished:
+                raise IngestError("Unexpected end of multipart body")
+    except Exception:
+        if out is not None:
+            out.close()
+        if part_path and os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+
+    return form, video
+
+
+def _finalize(part_path, upload_folder, filename, size, sha256):
+    # Nama akhir diawali hash konten + id unik per upload: konten yang sama dari session lain tidak
+    # berbagi file, jadi menghapus file upload ini tidak mengganggu job lain. Rename tanpa copy.
+    final_path = os.path.join(upload_folder, f"{sha256[:16]}_{uuid.uuid4().hex}_{filename}")
+    os.replace(part_path, final_path)
+    return {"path": final_path, "filename": filename, "size": size, "sha256": sha256}
@@ -0,0 +1,178 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+import traceback
+
+from backend.utils.sqlite_store import ThreadLocalConnection, PerProcessStart
+
+# Configuration (bisa diubah lewat ENV)
+JOB_DB_PATH = os.getenv("JOB_DB_PATH", "jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+# Job "running" yang tidak di-update selama ini dianggap worker-nya mati dan diantrikan ulang
+JOB_STALE_AFTER = float(os.getenv("JOB_STALE_AFTER", "900"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueue:
+    """Antrian job persisten berbasis SQLite, aman dipakai bersama oleh beberapa gunicorn worker"""
+
+    def __init__(self, db_path=JOB_DB_PATH):
+        self.db_path = db_path
+        self._connect = ThreadLocalConnection(db_path)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, "
+                "payload TEXT NOT NULL, result TEXT, error TEXT, progress REAL NOT NULL DEFAULT 0, "
+                "attempts INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def enqueue(self, kind, payload, result=None):
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, status, payload, result, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, kind, QUEUED, json.dumps(payload), json.dumps(result or {}), now, now)
+        )
+        return job_id
+
+    def claim(self):
+        """Ambil satu job QUEUED tertua dan tandai RUNNING secara atomik"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (RUNNING, time.time(), row["id"])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self._to_dict(row, status=RUNNING)
+
+    def update(self, job_id, status=None, progress=None, result=None, error=None):
+        """Update status/progress; result di-merge dengan result yang sudah ada"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return
+            merged = json.loads(row["result"] or "{}")
+            if result:
+                merged.update(result)
+            conn.execute(
+                "UPDATE jobs SET status = COALESCE(?, status), progress = COALESCE(?, progress), "
+                "result = ?, error = COALESCE(?, error), updated_at = ? WHERE id = ?",
+                (status, progress, json.dumps(merged), error, time.time(), job_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+    def payloads(self, statuses):
+        """Payload semua job dengan status tertentu (misalnya file video yang masih dipakai)"""
+        rows = self._connect().execute(
+            f"SELECT payload FROM jobs WHERE status IN ({', '.join('?' * len(statuses))})", tuple(statuses)
+        ).fetchall()
+        return [json.loads(row["payload"]) for row in rows]
+
+    def requeue_stale(self, stale_after=JOB_STALE_AFTER):
+        return self._connect().execute(
+            "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ? AND updated_at < ?",
+            (QUEUED, time.time(), RUNNING, time.time() - stale_after)
+        ).rowcount
+
+    @staticmethod
+    def _to_dict(row, status=None):
+        return {
+            "id": row["id"],
+            "kind": row["kind"],
+            "status": status or row["status"],
+            "payload": json.loads(row["payload"]),
+            "result": json.loads(row["result"] or "{}"),
+            "error": row["error"],
+            "progress": row["progress"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+        }
+
+
+class WorkerPool:
+    """Thread pool yang mengambil job dari JobQueue dan menjalankan handler sesuai job['kind']"""
+
+    def __init__(self, job_queue, handlers, num_workers=JOB_WORKERS, poll_interval=JOB_POLL_INTERVAL):
+        # handlers: { kind: fn(job, report_progress) -> dict result }
+        self.queue = job_queue
+        self.handlers = handlers
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._started = PerProcessStart()
+
+    def start(self):
+        self._started.run(self._start_workers)
+
+    def _start_workers(self):
+        self._wakeup = threading.Event()
+        requeued = self.queue.requeue_stale()
+        if requeued:
+            print(f"Requeued {requeued} stale job(s)")
+        for i in range(self.num_workers):
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True).start()
+
+    def notify(self):
+        """Bangunkan worker setelah enqueue agar tidak menunggu poll berikutnya"""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            try:
+                job = self.queue.claim()
+            except sqlite3.Error as e:
+                print(f"Job queue error: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            self._execute(job)
+
+    def _execute(self, job):
+        def report_progress(progress, **result):
+            self.queue.update(job["id"], progress=progress, result=result)
+
+        handler = self.handlers.get(job["kind"])
+        try:
+            if handler is None:
+                raise ValueError(f"No handler for job kind '{job['kind']}'")
+            result = handler(job, report_progress) or {}
+            self.queue.update(job["id"], status=DONE, progress=1.0, result=result)
+        except Exception as e:
+            traceback.print_exc()
+            self.queue.update(job["id"], status=FAILED, error=str(e))
@@ -0,0 +1,164 @@
+import os
+import re
+import math
+import numpy as np
+
+# Ekstraksi keyword berbasis TF-IDF: bobot IDF dihitung sekali dari korpus training
+# (ml_training/build_keyword_idf.py) dan disimpan sebagai array di samping model.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+KEYWORD_IDF_PATH = os.path.join(BASE_DIR, "models", "keyword_idf.npz")
+KEYWORD_TOP_N = 5
+# Panjang minimum keyword (sama dengan extract_keywords lama: kata lebih dari 3 huruf)
+KEYWORD_MIN_LENGTH = 4
+
+WORD_PATTERN = re.compile(r"[^\W\d_]\w*")
+
+STOPWORDS = frozenset("""
+ada adalah adanya agak agar akan akankah akhir akhirnya aku akulah amat amatlah anda andalah antar antara
+antaranya apa apaan apabila apakah apalagi apatah atau ataukah ataupun bagai bagaikan bagaimana bagaimanakah
+bagaimanapun bagi bagian bahkan bahwa bahwasanya baik bakal bakalan balik banyak bapak baru bawah beberapa
+begini beginian beginikah beginilah begitu begitukah begitulah begitupun belakang belum belumlah benar
+benarkah benarlah berada berakhir berapa berapakah berapalah berapapun berbagai berikut berikutnya berkali
+berkata bermacam bersama betul biasa biasanya bila bilakah bisa bisakah boleh bolehkah bolehlah buat bukan
+bukankah bukanlah bukannya cara caranya cukup cukupkah cukuplah cuma dahulu dalam dan dapat dari daripada
+datang dekat demi demikian demikianlah dengan depan di dia diakhiri diakhirinya dialah diantara diantaranya
+diberi diberikan diberikannya dibuat dibuatnya didapat didatangkan digunakan diibaratkan diibaratkannya
+diingat diingatkan diinginkan dijawab dijelaskan dijelaskannya dikarenakan dikatakan dikatakannya dikerjakan
+diketahui diketahuinya dikira dilakukan dilalui dilihat dimaksud dimaksudkan dimaksudkannya dimaksudnya
+diminta dimintai dimisalkan dimulai dimulailah dimulainya dimungkinkan dini dipastikan diperbuat
+diperbuatnya dipergunakan diperkirakan diperlihatkan diperlukan diperlukannya dipersoalkan dipertanyakan
+dipunyai diri dirinya disampaikan disebut disebutkan disebutkannya disini disinilah ditambahkan ditandaskan
+ditanya ditanyai ditanyakan ditegaskan ditujukan ditunjuk ditunjuki ditunjukkan ditunjukkannya ditunjuknya
+dituturkan dituturkannya diucapkan diucapkannya diungkapkan dong dua dulu empat enggak enggaknya entah
+entahlah guna gunakan hal hampir hanya hanyalah hari harus haruslah harusnya hendak hendaklah hendaknya
+hingga ia ialah ibarat ibaratkan ibaratnya ibu ikut ingat ingin inginkah inginkan ini inikah inilah itu
+itukah itulah jadi jadilah jadinya jangan jangankan janganlah jauh jawab jawaban jawabnya jelas jelaskan
+jelaslah jelasnya jika jikalau juga jumlah jumlahnya justru kala kalau kalaulah kalaupun kalian kami kamilah
+kamu kamulah kan kapan kapankah kapanpun karena karenanya kasus kata katakan katakanlah katanya ke keadaan
+kebetulan kecil kedua keduanya keinginan kelamaan kelihatan kelihatannya kelima keluar kembali kemudian
+kemungkinan kemungkinannya kenapa kepada kepadanya kesampaian keseluruhan keseluruhannya keterlaluan
+ketika khususnya kini kinilah kira kiranya kita kitalah kok kurang lagi lagian lah lain lainnya lalu lama
+lamanya lanjut lanjutnya lebih lewat lima luar macam maka makanya makin malah malahan mampu mampukah mana
+manakala manalagi masa masalah masalahnya masih masihkah masing mau maupun melainkan melakukan melalui
+melihat melihatnya memang memastikan memberi memberikan membuat memerlukan memihak meminta memintakan
+memisalkan memperbuat mempergunakan memperkirakan memperlihatkan mempersiapkan mempersoalkan mempertanyakan
+mempunyai memulai memungkinkan menaiki menambahkan menandaskan menanti menantikan menanya menanyai
+menanyakan mendapat mendapatkan mendatang mendatangi mendatangkan menegaskan mengakhiri mengapa mengatakan
+mengatakannya mengenai mengerjakan mengetahui menggunakan menghendaki mengibaratkan mengibaratkannya
+mengingat mengingatkan menginginkan mengira mengucapkan mengucapkannya mengungkapkan menjadi menjawab
+menjelaskan menuju menunjuk menunjuki menunjukkan menunjuknya menurut menuturkan menyampaikan menyangkut
+menyatakan menyebutkan menyeluruh menyiapkan merasa mereka merekalah merupakan meski meskipun meyakini
+meyakinkan minta mirip misal misalkan misalnya mula mulai mulailah mulanya mungkin mungkinkah nah naik
+namun nanti nantinya nyaris nyatanya oleh olehnya pada padahal padanya pak paling panjang pantas para
+pasti pastilah penting pentingnya per percuma perlu perlukah perlunya pernah persoalan pertama pertanyaan
+pertanyakan pihak pihaknya pukul pula pun punya rasa rasanya rata rupanya saat saatnya saja sajalah saling
+sama sambil sampai sampaikan sana sangat sangatlah satu saya sayalah se sebab sebabnya sebagai sebagaimana
+sebagainya sebagian sebaik sebaiknya sebaliknya sebanyak sebegini sebegitu sebelum sebelumnya sebenarnya
+seberapa sebesar sebetulnya sebisanya sebuah sebut sebutlah sebutnya secara secukupnya sedang sedangkan
+sedemikian sedikit sedikitnya seenaknya segala segalanya segera seharusnya sehingga seingat sejak sejauh
+sejenak sejumlah sekadar sekadarnya sekali sekalian sekaligus sekalipun sekarang sekecil seketika
+sekiranya sekitar sekitarnya sekurangnya sela selain selaku selalu selama selamanya selanjutnya seluruh
+seluruhnya semacam semakin semampu semampunya semasa semasih semata semaunya sementara semisal semisalnya
+sempat semua semuanya semula sendiri sendirian sendirinya seolah seorang sepanjang sepantasnya
+sepantasnyalah seperlunya seperti sepertinya sepihak sering seringnya serta serupa sesaat sesama sesampai
+sesegera sesekali seseorang sesuatu sesuatunya sesudah sesudahnya setelah setempat setengah seterusnya
+setiap setiba setibanya setidaknya setinggi seusai sewaktu siap siapa siapakah siapapun sini sinilah soal
+soalnya suatu sudah sudahkah sudahlah supaya tadi tadinya tahu tak tambah tambahnya tampak tampaknya
+tandas tandasnya tanpa tanya tanyakan tanyanya tapi tegas tegasnya telah tempat tengah tentang tentu
+tentulah tentunya tepat terakhir terasa terbanyak terdahulu terdapat terdiri terhadap terhadapnya teringat
+terjadi terjadilah terjadinya terkira terlalu terlebih terlihat termasuk ternyata tersampaikan tersebut
+tersebutlah tertentu tertuju terus terutama tetap tetapi tiap tiba tidak tidakkah tidaklah tiga tinggi
+toh tunjuk turut tutur tuturnya ucap ucapnya ujar ujarnya umum umumnya ungkap ungkapnya untuk usah usai
+waduh wah wahai waktu waktunya walau walaupun wong yaitu yakin yakni yang
+aja banget bgt deh dgn gak ga gitu gimana gue kalo kayak nggak ngga nih sih udah yg tdk utk dr krn jg
+the and for with you your this that from are was were how what why when who which will can our out about
+into have has not but all just more than then them they their there here its
+""".split())
+
+
+def candidate_terms(text, min_length=KEYWORD_MIN_LENGTH):
+    """Kata (lowercase, urutan asli) yang boleh menjadi keyword: bukan stopword, angka atau kata pendek"""
+    return [w for w in WORD_PATTERN.findall(str(text).lower()) if len(w) >= min_length and w not in STOPWORDS]
+
+
+def compute_idf(texts, min_df=1):
+    """IDF ter-smoothing, idf = ln((1 + N) / (1 + df)) + 1, return (terms terurut, idf float32, N)"""
+    document_frequency = {}
+    num_docs = 0
+    for text in texts:
+        num_docs += 1
+        for term in set(candidate_terms(text)):
+            document_frequency[term] = document_frequency.get(term, 0) + 1
+    terms = sorted(t for t, df in document_frequency.items() if df >= min_df)
+    df = np.array([document_frequency[t] for t in terms], dtype=np.float64)
+    idf = np.log((1.0 + num_docs) / (1.0 + df)) + 1.0
+    return np.array(terms, dtype=str), idf.astype(np.float32), num_docs
+
+
+def save_idf(path, terms, idf, num_docs):
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(tmp_path, terms=terms, idf=idf, num_docs=np.int64(num_docs))
+    os.replace(tmp_path, path)
+
+
+class KeywordExtractor:
+    """Ranking keyword per teks dengan skor tf * idf; tanpa artifact IDF jatuh ke ranking frekuensi"""
+
+    def __init__(self, idf_path=KEYWORD_IDF_PATH):
+        self.index = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        # Kata yang tidak ada di korpus training dianggap paling jarang (df = 0)
+        self.default_idf = 1.0
+        self.loaded = False
+        if os.path.exists(idf_path):
+            with np.load(idf_path) as arrays:
+                terms = arrays["terms"]
+                self.idf = arrays["idf"].astype(np.float32)
+                num_docs = int(arrays["num_docs"])
+            self.index = {term: i for i, term in enumerate(terms.tolist())}
+            self.default_idf = math.log(1.0 + num_docs) + 1.0
+            self.loaded = True
+        else:
+            print(f"Keyword IDF not found at {idf_path}, ranking keywords by term frequency")
+
+    def extract(self, text, top_n=KEYWORD_TOP_N):
+        return self.extract_batch([text], top_n)[0]
+
+    def extract_batch(self, texts, top_n=KEYWORD_TOP_N):
+        """Top-n keyword untuk setiap teks; skor sama diurutkan berdasarkan kemunculan pertama"""
+        results = [[] for _ in texts]
+        doc_ids = []
+        tokens = []
+        for doc, text in enumerate(texts):
+            words = candidate_terms(text)
+            tokens.extend(words)
+            doc_ids.extend([doc] * len(words))
+        if not tokens or top_n <= 0:
+            return results
+
+        # Vocabulary lokal batch ini: satu lookup IDF per kata unik, bukan per token
+        terms, term_ids = np.unique(np.array(tokens), return_inverse=True)
+        idf = np.array([self._idf(t) for t in terms.tolist()], dtype=np.float32)
+
+        # Term frequency per (dokumen, kata); first = posisi token pertama, untuk tie-break yang deterministik
+        doc_ids = np.array(doc_ids, dtype=np.int64)
+        pairs = doc_ids * len(terms) + term_ids.reshape(-1)
+        pair_keys, first, counts = np.unique(pairs, return_index=True, return_counts=True)
+        pair_docs = pair_keys // len(terms)
+        pair_terms = pair_keys % len(terms)
+        scores = counts * idf[pair_terms]
+
+        order = np.lexsort((first, -scores, pair_docs))
+        pair_docs = pair_docs[order]
+        pair_terms = pair_terms[order]
+        # Peringkat di dalam dokumen = posisi dikurangi awal blok dokumen tersebut
+        starts = np.searchsorted(pair_docs, pair_docs, side="left")
+        keep = (np.arange(len(order)) - starts) < top_n
+        for doc, term in zip(pair_docs[keep].tolist(), terms[pair_terms[keep]].tolist()):
+            results[doc].append(term)
+        return results
+
+    def _idf(self, term):
+        i = self.index.get(term)
+        return self.default_idf if i is None else self.idf[i]
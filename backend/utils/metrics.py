@@ -0,0 +1,100 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+# Metrics bersama untuk backend (Prometheus client)
+# Di gunicorn, PROMETHEUS_MULTIPROC_DIR di-set oleh gunicorn.conf.py sebelum modul ini di-import:
+# setiap worker menulis nilai metrics ke file di direktori itu dan /metrics menggabungkan semuanya.
+
+# Bucket latency per stage: dari tokenisasi (sub-ms) sampai upload YouTube (menit)
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+                 60.0, 120.0, 300.0)
+
+BATCH_SIZE = Histogram(
+    "inference_batch_size",
+    "Jumlah teks per batch inference",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+
+BATCH_QUEUE_WAIT = Histogram(
+    "inference_queue_wait_seconds",
+    "Waktu tunggu request di antrian batcher sebelum diproses",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+INFERENCE_REJECTED = Counter(
+    "inference_rejected_total",
+    "Request inference yang ditolak karena antrian executor penuh atau timeout (HTTP 503)",
+)
+
+PREDICTION_CACHE_EVENTS = Counter(
+    "prediction_cache_events_total",
+    "Hit/miss/eviction cache prediksi per tier",
+    ["tier", "event"],
+)
+
+UPLOAD_EVENTS = Counter(
+    "upload_events_total",
+    "Dedupe upload (duplicate, retry_failed) dan GC folder uploads (gc_removed, gc_part_removed)",
+    ["event"],
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latency request HTTP per endpoint",
+    ["endpoint", "method", "status"],
+    buckets=STAGE_BUCKETS,
+)
+
+STAGE_LATENCY = Histogram(
+    "stage_duration_seconds",
+    "Latency per stage (upload: ingest/predict/enqueue, model: tokenize/forward_*, job: youtube_upload, ...)",
+    ["component", "stage", "model_version"],
+    buckets=STAGE_BUCKETS,
+)
+
+STAGE_ERRORS = Counter(
+    "stage_errors_total",
+    "Jumlah error per stage",
+    ["component", "stage", "model_version"],
+)
+
+FALLBACKS = Counter(
+    "fallbacks_total",
+    "Jumlah fallback (failed_upload_placeholder, model_unavailable, n8n_dead_letter)",
+    ["kind", "model_version"],
+)
+
+MODEL_INFO = Gauge(
+    "model_info",
+    "Versi model (fingerprint artifact) dan backend yang sedang di-load",
+    ["model_version", "backend"],
+    multiprocess_mode="livemax",
+)
+
+
+@contextmanager
+def track_stage(component, stage, model_version=""):
+    """Catat durasi stage ke STAGE_LATENCY; exception dihitung di STAGE_ERRORS lalu di-raise ulang"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.labels(component, stage, model_version or "").inc()
+        raise
+    finally:
+        STAGE_LATENCY.labels(component, stage, model_version or "").observe(time.perf_counter() - started)
+
+
+def render_metrics():
+    """Body & content type untuk endpoint /metrics (gabungan semua worker jika multiprocess)"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,43 +1,119 @@
-import pandas as pd
 import numpy as np
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 import pickle
 import os
-import re
+import hashlib
+from backend.utils.batcher import MicroBatcher, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS, inference_executor
+from backend.utils import numpy_runtime
+from backend.utils.preprocessing import FrozenTokenizer, normalize
+from backend.utils.cache import PredictionCache, cache_key, CACHE_MAX_ENTRIES
+from backend.utils.keywords import KeywordExtractor, KEYWORD_TOP_N
+from backend.utils.metrics import MODEL_INFO, FALLBACKS, track_stage
+from backend.utils.registry import ModelRegistry, trained_mode
 
 # Configuration
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_DIR = os.path.join(BASE_DIR, "models")
 MAX_LEN = 100
+# "auto" = mode yang terakhir di-train (trained_mode.json), "multitask" = wajib multi-head, "separate" = dua model terpisah
+MODEL_MODE = os.getenv("MODEL_MODE", "auto")
+# "auto" = pakai bundle NumPy jika ada (tanpa TensorFlow), "numpy" = wajib bundle, "keras" = file .h5
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "auto")
+BUNDLE_NAME = "serving_bundle.npz"
+BUNDLE_PATH = os.path.join(MODEL_DIR, BUNDLE_NAME)
+# File yang ikut menentukan versi model (dipakai sebagai bagian dari key cache)
+ARTIFACT_EXTENSIONS = (".h5", ".pickle", ".npz")
+
+def uses_numpy_backend(model_dir=MODEL_DIR):
+    """True jika model di-serve dari bundle NumPy (tanpa TensorFlow)"""
+    return MODEL_BACKEND == "numpy" or (
+        MODEL_BACKEND == "auto" and os.path.exists(os.path.join(model_dir, BUNDLE_NAME))
+    )
+
+def resolve_model_dir(registry=None):
+    """(direktori model, version) yang di-load: CURRENT di registry, atau MODEL_DIR jika registry belum dipakai"""
+    registry = registry or ModelRegistry()
+    version = registry.current()
+    if version is None:
+        return MODEL_DIR, None
+    return registry.version_dir(version), version
+
+def model_fingerprint(model_dir=MODEL_DIR):
+    """Hash isi semua artifact model, berubah setiap kali model di-retrain/export ulang"""
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(model_dir)):
+        if not name.endswith(ARTIFACT_EXTENSIONS):
+            continue
+        digest.update(name.encode("utf-8"))
+        with open(os.path.join(model_dir, name), 'rb') as handle:
+            for chunk in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
 
 class SentimentModel:
-    def __init__(self):
+    def __init__(self, model_dir=None, registry_version=None):
+        if model_dir is None:
+            model_dir, registry_version = resolve_model_dir()
+        self.model_dir = model_dir
+        self.registry_version = registry_version
+        self.backend = None
         self.sentiment_model = None
         self.category_model = None
+        self.multitask_model = None
         self.tokenizer = None
         self.sentiment_label_encoder = None
         self.category_label_encoder = None
+        self.model_version = None
         
         self.load_models()
+        # Ranking keyword TF-IDF (IDF dari korpus training, models/keyword_idf.npz)
+        self.keyword_extractor = KeywordExtractor(os.path.join(self.model_dir, "keyword_idf.npz"))
+
+        # Cache prediksi berbasis konten (teks hasil preprocessing + versi model)
+        self.cache = PredictionCache() if CACHE_MAX_ENTRIES > 0 else None
+        if self.cache is not None:
+            self.cache.check_version(self.model_version)
+
+        # Micro-batching: request yang datang bersamaan digabung jadi satu panggilan predict_many()
+        self.batcher = None
+        if BATCH_MAX_SIZE > 1:
+            self.batcher = MicroBatcher(self.predict_many, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
 
     def load_models(self):
         try:
+            # Version registry sudah unik per isi artifact (checksum di manifest), tidak perlu hash ulang
+            self.model_version = self.registry_version or model_fingerprint(self.model_dir)
+            self.backend = "numpy" if uses_numpy_backend(self.model_dir) else "keras"
+
+            MODEL_INFO.labels(self.model_version, self.backend).set(1)
+
+            if self.backend == "numpy":
+                self.load_numpy_bundle(os.path.join(self.model_dir, BUNDLE_NAME))
+                return
+
+            # TensorFlow hanya di-import jika memang memakai backend Keras
+            from tensorflow.keras.models import load_model
+
             print("Loading Deep Learning models...")
+            multitask_path = os.path.join(self.model_dir, "multitask_dl_model.h5")
+            # "auto": mode yang terakhir di-train, bukan sekadar file multi-head yang kebetulan masih ada
+            if MODEL_MODE == "multitask" or (MODEL_MODE == "auto" and trained_mode(self.model_dir) == "multitask"):
+                self.load_multitask_model(multitask_path)
+                print("Multi-head model loaded successfully!")
+                return
+
             # Load Models
-            self.sentiment_model = load_model(os.path.join(MODEL_DIR, "sentiment_dl_model.h5"))
-            self.category_model = load_model(os.path.join(MODEL_DIR, "category_dl_model.h5"))
+            self.sentiment_model = load_model(os.path.join(self.model_dir, "sentiment_dl_model.h5"))
+            self.category_model = load_model(os.path.join(self.model_dir, "category_dl_model.h5"))
             
             # Load Tokenizer (Shared or specific? Script saves separate ones, let's load specifically)
-            with open(os.path.join(MODEL_DIR, "sentiment_tokenizer.pickle"), 'rb') as handle:
-                self.tokenizer = pickle.load(handle)
+            with open(os.path.join(self.model_dir, "sentiment_tokenizer.pickle"), 'rb') as handle:
+                self.tokenizer = FrozenTokenizer.from_keras_tokenizer(pickle.load(handle), MAX_LEN)
                 
             # Load Label Encoders
-            with open(os.path.join(MODEL_DIR, "sentiment_label_encoder.pickle"), 'rb') as handle:
+            with open(os.path.join(self.model_dir, "sentiment_label_encoder.pickle"), 'rb') as handle:
                 self.sentiment_label_encoder = pickle.load(handle)
                 
-            with open(os.path.join(MODEL_DIR, "category_label_encoder.pickle"), 'rb') as handle:
+            with open(os.path.join(self.model_dir, "category_label_encoder.pickle"), 'rb') as handle:
                 self.category_label_encoder = pickle.load(handle)
                 
             print("Models loaded successfully!")
@@ -45,64 +121,158 @@ class SentimentModel:
             print(f"Error loading models: {e}")
             print("Ensure train_dl_models.py has been run successfully.")
 
+    def load_multitask_model(self, model_path):
+        from tensorflow.keras.models import load_model
+
+        # Satu trunk CNN-BiLSTM dengan dua head (sentiment & category)
+        self.multitask_model = load_model(model_path)
+
+        with open(os.path.join(self.model_dir, "multitask_tokenizer.pickle"), 'rb') as handle:
+            self.tokenizer = FrozenTokenizer.from_keras_tokenizer(pickle.load(handle), MAX_LEN)
+        with open(os.path.join(self.model_dir, "multitask_sentiment_label_encoder.pickle"), 'rb') as handle:
+            self.sentiment_label_encoder = pickle.load(handle)
+        with open(os.path.join(self.model_dir, "multitask_category_label_encoder.pickle"), 'rb') as handle:
+            self.category_label_encoder = pickle.load(handle)
+
+    def load_numpy_bundle(self, bundle_path):
+        print("Loading NumPy model bundle...")
+        manifest, models, tokenizer, label_encoders = numpy_runtime.load_bundle(bundle_path)
+
+        # Object NumpyModel punya predict() yang sama dengan Keras, jadi forward() tidak berubah
+        if manifest["kind"] == "multitask":
+            self.multitask_model = models["multitask"]
+        else:
+            self.sentiment_model = models["sentiment"]
+            self.category_model = models["category"]
+
+        self.tokenizer = tokenizer
+        self.sentiment_label_encoder = label_encoders["sentiment"]
+        self.category_label_encoder = label_encoders["category"]
+        print(f"NumPy bundle ({manifest['kind']}) loaded successfully!")
+
+    def close(self):
+        """Dipanggil setelah model ini diganti version baru (hot-swap): hentikan thread batcher
+        agar bobot lama bisa dibebaskan; request yang masih memegang model ini tetap dilayani"""
+        if self.batcher is not None:
+            self.batcher.close()
+        if self.model_version is not None and self.backend is not None:
+            MODEL_INFO.labels(self.model_version, self.backend).set(0)
+
     def preprocess(self, text):
-        text = str(text).lower()
-        text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-        seq = self.tokenizer.texts_to_sequences([text])
-        padded = pad_sequences(seq, maxlen=MAX_LEN, padding='post', truncating='post')
-        return padded
-
-    def extract_keywords(self, text, top_n=5):
-        # Fallback simple keyword extraction since DL doesn't give feature importance easily
-        # We can implement a simple frequency based or just skip for now.
-        # Let's return capitalized words as a heuristic or simple frequency
-        words = re.findall(r'\w+', text.lower())
-        unique_words = list(set(words))
-        # Filter stop words (simple list)
-        stopwords = ['dan', 'yang', 'di', 'ke', 'dari', 'ini', 'itu', 'untuk', 'pada', 'adalah']
-        keywords = [w for w in unique_words if w not in stopwords and len(w) > 3]
-        return keywords[:top_n]
+        # Sama dengan texts_to_sequences + pad_sequences(padding='post', truncating='post')
+        return self.tokenizer.encode_batch([text])
 
-    def predict(self, title, description):
-        text = str(title) + " " + str(description)
-        padded_text = self.preprocess(text)
-        
-        result = {
-            "label": "Unknown",
-            "confidence": "0%",
-            "keywords": [],
-            "category": "Umum"
-        }
-        
+    def extract_keywords(self, text, top_n=KEYWORD_TOP_N):
+        # DL model tidak memberi feature importance, keyword diambil dari ranking TF-IDF
+        return self.keyword_extractor.extract(text, top_n)
+
+    def forward(self, padded_texts):
+        """Jalankan model, hasilnya (sentiment_probs, category_probs), None jika model tidak ada"""
+        batch_size = len(padded_texts)
+
+        if self.multitask_model:
+            # Satu forward pass untuk kedua head
+            with track_stage("model", "forward_multitask", self.model_version):
+                pred_probs, cat_probs = self.multitask_model.predict(padded_texts, batch_size=batch_size, verbose=0)
+            return pred_probs, cat_probs
+
+        pred_probs = cat_probs = None
         if self.sentiment_model:
+            with track_stage("model", "forward_sentiment", self.model_version):
+                pred_probs = self.sentiment_model.predict(padded_texts, batch_size=batch_size, verbose=0)
+        if self.category_model:
+            with track_stage("model", "forward_category", self.model_version):
+                cat_probs = self.category_model.predict(padded_texts, batch_size=batch_size, verbose=0)
+        return pred_probs, cat_probs
+
+    def predict(self, title, description):
+        if self.batcher is not None:
+            return self.batcher.predict((title, description))
+        return self.predict_many([(title, description)])[0]
+
+    def predict_many(self, items, wait=0):
+        """predict_batch di executor inference (antrian terbatas), InferenceOverloaded jika penuh"""
+        return inference_executor.run(self.predict_batch, items, wait=wait)
+
+    def predict_batch(self, items):
+        """Prediksi banyak (title, description) sekaligus, setiap model cukup dipanggil sekali"""
+        texts = [str(title) + " " + str(description) for title, description in items]
+        results = [
+            {
+                "label": "Unknown",
+                "confidence": "0%",
+                "keywords": [],
+                "category": "Umum"
+            }
+            for _ in texts
+        ]
+        if not texts:
+            return results
+
+        # Cek cache dulu, hanya teks yang belum pernah diprediksi yang masuk ke model
+        with track_stage("model", "preprocess", self.model_version):
+            normalized = [normalize(text) for text in texts]
+            keys = [cache_key(text, self.model_version) for text in normalized]
+        missing = list(range(len(texts)))
+        if self.cache is not None:
+            with track_stage("model", "cache_lookup", self.model_version):
+                missing = []
+                for i, key in enumerate(keys):
+                    cached = self.cache.get(key)
+                    if cached is None:
+                        missing.append(i)
+                    else:
+                        results[i].update(cached)
+
+        if missing and not self.has_model():
+            # Model gagal di-load (tokenizer juga tidak ada): hasil default "Unknown" / "Umum"
+            FALLBACKS.labels("model_unavailable", self.model_version or "").inc(len(missing))
+        elif missing:
+            self._predict_missing([normalized[i] for i in missing], [results[i] for i in missing])
+            if self.cache is not None:
+                for i in missing:
+                    self.cache.set(keys[i], {k: results[i][k] for k in ("label", "confidence", "category")})
+
+        with track_stage("model", "keywords", self.model_version):
+            for result, keywords in zip(results, self.keyword_extractor.extract_batch(texts)):
+                result["keywords"] = keywords
+
+        return results
+
+    def has_model(self):
+        return any(m is not None for m in (self.multitask_model, self.sentiment_model, self.category_model))
+
+    def _predict_missing(self, texts, results):
+        with track_stage("model", "tokenize", self.model_version):
+            padded_texts = self.tokenizer.encode_batch(texts, normalized=True)
+
+        pred_probs, cat_probs = self.forward(padded_texts)
+
+        if pred_probs is not None:
             # Predict Sentiment
-            pred_probs = self.sentiment_model.predict(padded_text)[0]
-            pred_idx = np.argmax(pred_probs)
-            confidence = float(pred_probs[pred_idx] * 100)
-            
+            pred_idx = np.argmax(pred_probs, axis=1)
+
             if self.sentiment_label_encoder:
-                label = self.sentiment_label_encoder.inverse_transform([pred_idx])[0]
+                labels = self.sentiment_label_encoder.inverse_transform(pred_idx)
             else:
-                label = str(pred_idx)
-                
-            result["label"] = label
-            result["confidence"] = f"{confidence:.2f}%"
+                labels = [str(idx) for idx in pred_idx]
 
-        if self.category_model:
+            for result, probs, idx, label in zip(results, pred_probs, pred_idx, labels):
+                confidence = float(probs[idx] * 100)
+                result["label"] = label
+                result["confidence"] = f"{confidence:.2f}%"
+
+        if cat_probs is not None:
             # Predict Category
-            cat_probs = self.category_model.predict(padded_text)[0]
-            cat_idx = np.argmax(cat_probs)
-            
+            cat_idx = np.argmax(cat_probs, axis=1)
+
             if self.category_label_encoder:
-                category = self.category_label_encoder.inverse_transform([cat_idx])[0]
+                categories = self.category_label_encoder.inverse_transform(cat_idx)
             else:
-                category = "Umum"
-            
-            result["category"] = category
-            
-        result["keywords"] = self.extract_keywords(text)
-        
-        return result
+                categories = ["Umum"] * len(texts)
+
+            for result, category in zip(results, categories):
+                result["category"] = category
 
     # Dummy train method specifically to avoid breaking old calls if any, 
     # but strictly we rely on offline training now.
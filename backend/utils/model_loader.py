@@ -0,0 +1,180 @@
+import os
+import time
+import threading
+
+from backend.utils.ml_model import SentimentModel, uses_numpy_backend, resolve_model_dir
+from backend.utils.registry import ModelRegistry
+
+# "eager" = load saat import (dipakai bersama gunicorn --preload agar bobot model di-share copy-on-write),
+# "lazy" = load saat request pertama, "background" = load di thread terpisah, /ready menunggu selesai
+MODEL_LOAD_MODE = os.getenv("MODEL_LOAD_MODE", "eager")
+# Seberapa sering pointer CURRENT di registry dicek untuk hot-swap (0 = tidak dipantau)
+MODEL_REGISTRY_POLL_INTERVAL = float(os.getenv("MODEL_REGISTRY_POLL_INTERVAL", "10"))
+
+
+def memory_usage_mb():
+    """RSS dan PSS proses ini (MB); PSS menunjukkan berapa yang benar-benar di-share antar worker"""
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Dirty"):
+                    usage[key.lower() + "_mb"] = round(int(value.split()[0]) / 1024, 1)
+    except OSError:
+        import resource
+        usage["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return usage
+
+
+class ModelLoader:
+    """Mengatur kapan SentimentModel di-load dan di-warmup, serta status readiness"""
+
+    def __init__(self, factory=SentimentModel, mode=MODEL_LOAD_MODE, registry=None,
+                 poll_interval=MODEL_REGISTRY_POLL_INTERVAL):
+        self.factory = factory
+        self.mode = mode
+        self.registry = registry or ModelRegistry()
+        self.poll_interval = poll_interval
+        self.model = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.swapped_at = None
+        self._warm_pid = None
+        self._watch_pid = None
+        self._failed_version = None
+        self._lock = threading.Lock()
+        self._error = None
+
+        if mode == "eager":
+            keras = not uses_numpy_backend(resolve_model_dir(self.registry)[0])
+            if os.getenv("GUNICORN_PRELOAD") == "1" and factory is SentimentModel and keras:
+                # Thread pool TensorFlow tidak selamat setelah fork (worker hang saat inference),
+                # jadi model Keras di-load di masing-masing worker lewat start()
+                print("Keras backend with preload: deferring model load to each worker")
+            else:
+                self.load()
+
+    def load(self):
+        with self._lock:
+            if self.model is None:
+                started = time.perf_counter()
+                try:
+                    self.model = self.factory()
+                except Exception as e:
+                    self._error = str(e)
+                    raise
+                self.load_seconds = time.perf_counter() - started
+                self._error = None if self.model.has_model() else "model artifacts failed to load"
+                print(f"Model loaded in {self.load_seconds:.2f}s, memory: {memory_usage_mb()}")
+        return self.model
+
+    def warmup(self):
+        """Jalankan satu inference langsung ke model (tanpa cache) agar worker siap melayani"""
+        model = self.load()
+        if self._warm_pid == os.getpid():
+            return
+        if not model.has_model():
+            # Artifact model tidak ada / gagal di-load: /ready tetap 503, traffic tidak diarahkan ke sini
+            self._error = "model artifacts failed to load"
+            print(f"Warmup skipped, no model loaded (pid {os.getpid()})")
+            return
+        started = time.perf_counter()
+        model.forward(model.tokenizer.encode_batch(["warmup inference"]))
+        self.warmup_seconds = time.perf_counter() - started
+        self._warm_pid = os.getpid()
+        print(f"Warmup inference done in {self.warmup_seconds:.3f}s (pid {os.getpid()})")
+
+    def start(self):
+        """Dipanggil sekali per proses (saat import, atau di post_fork gunicorn jika --preload)"""
+        if self.mode != "lazy":
+            self.start_background()
+        self.start_watcher()
+
+    def start_background(self):
+        def run():
+            try:
+                self.warmup()
+            except Exception as e:
+                self._error = str(e)
+                print(f"Model warmup failed: {e}")
+
+        threading.Thread(target=run, name="model-warmup", daemon=True).start()
+
+    def start_watcher(self):
+        """Pantau CURRENT di registry; version baru di-load & warmup di background lalu di-swap"""
+        with self._lock:
+            if self._watch_pid == os.getpid() or self.poll_interval <= 0:
+                return
+            self._watch_pid = os.getpid()
+
+        def run():
+            while True:
+                time.sleep(self.poll_interval)
+                try:
+                    version = self.registry.current()
+                    model = self.model
+                    if version is None or version == self._failed_version:
+                        continue
+                    if model is not None and version != getattr(model, "registry_version", None):
+                        self.swap(version)
+                except Exception as e:
+                    print(f"Model registry watcher error: {e}")
+
+        threading.Thread(target=run, name="model-registry-watcher", daemon=True).start()
+
+    def swap(self, version):
+        """Load & warmup version baru tanpa menghentikan model lama, lalu ganti referensinya (atomik)"""
+        started = time.perf_counter()
+        try:
+            self.registry.verify(version)
+            model = self.factory(model_dir=self.registry.version_dir(version), registry_version=version)
+            if not model.has_model():
+                raise RuntimeError("model artifacts failed to load")
+            # Warmup sebelum swap, request pertama ke version baru tidak menanggung cold start
+            model.forward(model.tokenizer.encode_batch(["warmup inference"]))
+        except Exception as e:
+            # Version rusak tidak dicoba ulang sampai CURRENT berubah lagi, model lama tetap melayani
+            self._failed_version = version
+            print(f"Model version {version} rejected, keeping current model: {e}")
+            return False
+
+        with self._lock:
+            previous, self.model = self.model, model
+            self._warm_pid = os.getpid()
+            self._failed_version = None
+            self._error = None
+            self.load_seconds = time.perf_counter() - started
+            self.swapped_at = time.time()
+        # Request yang sudah memegang model lama tetap selesai memakai model lama
+        if previous is not None:
+            previous.close()
+        print(f"Swapped to model version {version} in {self.load_seconds:.2f}s (pid {os.getpid()})")
+        return True
+
+    def get(self):
+        if self.model is None:
+            return self.load()
+        return self.model
+
+    def is_ready(self):
+        if self.mode == "lazy":
+            # Sebelum request pertama dianggap ready (model di-load saat itu); setelah load
+            # dicoba, ready hanya jika artifact model benar-benar ter-load
+            return self._error is None and (self.model is None or self.model.has_model())
+        # Warmup dihitung per proses: worker hasil fork harus menjalankan inference sendiri
+        return self.model is not None and self._warm_pid == os.getpid()
+
+    def status(self):
+        return {
+            "status": "ready" if self.is_ready() else ("error" if self._error else "loading"),
+            "mode": self.mode,
+            "pid": os.getpid(),
+            "model_version": self.model.model_version if self.model is not None else None,
+            "registry_version": getattr(self.model, "registry_version", None),
+            "swapped_at": self.swapped_at,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "error": self._error,
+            "memory": memory_usage_mb(),
+        }
@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import queue
+import random
+import threading
+
+from backend.utils.http_pool import get_session
+from backend.utils.metrics import STAGE_ERRORS, FALLBACKS, track_stage
+from backend.utils.sqlite_store import PerProcessStart
+
+# Configuration (bisa diubah lewat ENV)
+N8N_WEBHOOK_URL = os.getenv("N8N_WEBHOOK_URL", "http://localhost:5678/webhook/send_notification")
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "1000"))
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "1"))
+NOTIFY_CONNECT_TIMEOUT = float(os.getenv("NOTIFY_CONNECT_TIMEOUT", "3"))
+NOTIFY_READ_TIMEOUT = float(os.getenv("NOTIFY_READ_TIMEOUT", "10"))
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "5"))
+NOTIFY_DEAD_LETTER_PATH = os.getenv("NOTIFY_DEAD_LETTER_PATH", "n8n_dead_letter.jsonl")
+
+RETRIABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class NotificationDispatcher:
+    """Kirim webhook n8n di background: antrian terbatas, timeout, retry dan dead-letter"""
+
+    def __init__(self, url=N8N_WEBHOOK_URL, queue_size=NOTIFY_QUEUE_SIZE, num_workers=NOTIFY_WORKERS,
+                 max_retries=NOTIFY_MAX_RETRIES, dead_letter_path=NOTIFY_DEAD_LETTER_PATH):
+        self.url = url
+        self.queue_size = queue_size
+        self.num_workers = num_workers
+        self.max_retries = max_retries
+        self.dead_letter_path = dead_letter_path
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._started = PerProcessStart()
+
+    def _ensure_started(self):
+        self._started.run(self._start_workers)
+
+    def _start_workers(self):
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        for i in range(self.num_workers):
+            threading.Thread(target=self._run, name=f"notifier-{i}", daemon=True).start()
+
+    def notify(self, payload):
+        """Masukkan notifikasi ke antrian tanpa menunggu; jika antrian penuh langsung ke dead-letter"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except queue.Full:
+            self._dead_letter(payload, "queue full")
+            return False
+
+    def _run(self):
+        while True:
+            payload = self._queue.get()
+            try:
+                self._deliver(payload)
+            except Exception as e:
+                print("❌ n8n webhook error:", e)
+
+    def _deliver(self, payload):
+        session = get_session()
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Exponential backoff dengan jitter
+                time.sleep(random.uniform(0, min(30, 2 ** attempt)))
+            try:
+                print("🔹 Sending to n8n webhook:", payload)
+                with track_stage("notify", "n8n_post"):
+                    res = session.post(self.url, json=payload, timeout=(NOTIFY_CONNECT_TIMEOUT, NOTIFY_READ_TIMEOUT))
+                print("🔹 n8n response:", res.status_code, res.text)
+                if res.status_code not in RETRIABLE_STATUS_CODES:
+                    return
+                STAGE_ERRORS.labels("notify", "n8n_post", "").inc()
+                last_error = f"HTTP {res.status_code}"
+            except Exception as e:
+                print("❌ n8n webhook error:", e)
+                last_error = str(e)
+
+        self._dead_letter(payload, last_error)
+
+    def _dead_letter(self, payload, reason):
+        # Notifikasi yang gagal disimpan (JSON Lines) agar bisa dikirim ulang manual
+        FALLBACKS.labels("n8n_dead_letter", "").inc()
+        record = {"time": time.time(), "reason": reason, "url": self.url, "payload": payload}
+        with self._lock:
+            with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        print(f"❌ n8n notification dead-lettered ({reason})")
@@ -0,0 +1,200 @@
+import json
+import numpy as np
+
+from backend.utils.preprocessing import FrozenTokenizer
+
+# Runtime inference murni NumPy untuk model CNN-BiLSTM hasil export ml_training/export_numpy.py
+# (tanpa import TensorFlow/Keras).
+
+BUNDLE_FORMAT = 1
+# Format 2 = bundle hasil ml_training/compress_models.py (bobot int8 + scale per channel)
+QUANTIZED_BUNDLE_FORMAT = 2
+SUPPORTED_FORMATS = (BUNDLE_FORMAT, QUANTIZED_BUNDLE_FORMAT)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _softmax(x):
+    e = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return e / np.sum(e, axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "softmax": _softmax,
+}
+
+
+def embedding(x, weights, config):
+    return weights[0][x]
+
+
+def conv1d(x, weights, config):
+    kernel, bias = weights[0], weights[1] if len(weights) > 1 else None
+    k = kernel.shape[0]
+    if config.get("padding", "valid") == "same":
+        left = (k - 1) // 2
+        x = np.pad(x, ((0, 0), (left, k - 1 - left), (0, 0)))
+    steps = x.shape[1] - k + 1
+
+    out = np.zeros((x.shape[0], steps, kernel.shape[2]), dtype=np.float32)
+    for i in range(k):
+        out += x[:, i:i + steps, :] @ kernel[i]
+    if bias is not None:
+        out += bias
+    return ACTIVATIONS[config.get("activation", "linear")](out)
+
+
+def max_pooling1d(x, weights, config):
+    pool = config.get("pool_size", 2)
+    steps = x.shape[1] // pool
+    x = x[:, :steps * pool, :]
+    return x.reshape(x.shape[0], steps, pool, x.shape[2]).max(axis=2)
+
+
+def _lstm(x, kernel, recurrent_kernel, bias, config, reverse=False):
+    units = recurrent_kernel.shape[0]
+    activation = ACTIVATIONS[config.get("activation", "tanh")]
+    recurrent_activation = ACTIVATIONS[config.get("recurrent_activation", "sigmoid")]
+
+    # Proyeksi input semua timestep sekaligus, loop hanya untuk bagian recurrent
+    projected = x @ kernel + bias
+    batch = x.shape[0]
+    h = np.zeros((batch, units), dtype=np.float32)
+    c = np.zeros((batch, units), dtype=np.float32)
+
+    steps = range(x.shape[1] - 1, -1, -1) if reverse else range(x.shape[1])
+    for t in steps:
+        z = projected[:, t, :] + h @ recurrent_kernel
+        i = recurrent_activation(z[:, :units])
+        f = recurrent_activation(z[:, units:2 * units])
+        g = activation(z[:, 2 * units:3 * units])
+        o = recurrent_activation(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * activation(c)
+    return h
+
+
+def lstm(x, weights, config):
+    return _lstm(x, weights[0], weights[1], weights[2], config, reverse=config.get("go_backwards", False))
+
+
+def bidirectional(x, weights, config):
+    layer_config = config["layer"]
+    forward = _lstm(x, weights[0], weights[1], weights[2], layer_config)
+    backward = _lstm(x, weights[3], weights[4], weights[5], layer_config, reverse=True)
+    return np.concatenate([forward, backward], axis=-1)
+
+
+def dropout(x, weights, config):
+    return x
+
+
+def dense(x, weights, config):
+    out = x @ weights[0]
+    if len(weights) > 1:
+        out = out + weights[1]
+    return ACTIVATIONS[config.get("activation", "linear")](out)
+
+
+LAYERS = {
+    "Embedding": embedding,
+    "Conv1D": conv1d,
+    "MaxPooling1D": max_pooling1d,
+    "LSTM": lstm,
+    "Bidirectional": bidirectional,
+    "Dropout": dropout,
+    "Dense": dense,
+}
+
+
+class QuantizedRows:
+    """Embedding int8 + scale per baris; hanya baris yang di-lookup yang di-dequantize (memori 4x lebih kecil)"""
+
+    def __init__(self, values, scale):
+        self.values = values
+        self.scale = scale
+        self.shape = values.shape
+
+    def __getitem__(self, index):
+        return self.values[index].astype(np.float32) * self.scale[index]
+
+
+def _load_weight(arrays, key, keep_int8=False):
+    scale = arrays.get(f"{key}/scale")
+    if scale is None:
+        return arrays[key].astype(np.float32)
+    if keep_int8:
+        return QuantizedRows(arrays[key], scale)
+    return arrays[key].astype(np.float32) * scale
+
+
+class NumpyModel:
+    """Model hasil export, interface predict() dibuat sama dengan Keras"""
+
+    def __init__(self, spec, weights):
+        self.trunk = [(layer, weights[layer["name"]]) for layer in spec["trunk"]]
+        self.heads = [[(layer, weights[layer["name"]]) for layer in head] for head in spec["heads"]]
+
+    @staticmethod
+    def _run(layers, x):
+        for layer, weights in layers:
+            x = LAYERS[layer["type"]](x, weights, layer["config"])
+        return x
+
+    def predict(self, x, batch_size=None, verbose=0):
+        hidden = self._run(self.trunk, np.asarray(x, dtype=np.int64))
+        outputs = [self._run(head, hidden) for head in self.heads]
+        return outputs[0] if len(outputs) == 1 else outputs
+
+
+class FrozenLabelEncoder:
+    """Pengganti sklearn LabelEncoder untuk inverse_transform saja"""
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes).astype(object)
+
+    def inverse_transform(self, y):
+        return self.classes_[np.asarray(y)]
+
+
+def load_bundle(path):
+    """Load bundle .npz, hasilnya (manifest, models, tokenizer, label_encoders)"""
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+
+    manifest = json.loads(str(arrays["__manifest__"]))
+    if manifest.get("format") not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported bundle format: {manifest.get('format')}")
+
+    models = {}
+    for name, spec in manifest["models"].items():
+        layers = spec["trunk"] + [layer for head in spec["heads"] for layer in head]
+        weights = {
+            layer["name"]: [
+                _load_weight(arrays, f"{name}/{layer['name']}/{i}", keep_int8=layer["type"] == "Embedding")
+                for i in range(layer["num_weights"])
+            ]
+            for layer in layers
+        }
+        models[name] = NumpyModel(spec, weights)
+
+    tokenizer = FrozenTokenizer.from_arrays(
+        arrays["vocab/words"], arrays["vocab/ids"], manifest["tokenizer"], max_len=manifest["max_len"]
+    )
+
+    label_encoders = {
+        key.split("/", 1)[1]: FrozenLabelEncoder(arrays[key])
+        for key in arrays if key.startswith("labels/")
+    }
+    return manifest, models, tokenizer, label_encoders
@@ -0,0 +1,114 @@
+import re
+import numpy as np
+
+# Preprocessing teks untuk inference: regex di-compile sekali, vocabulary dibekukan dari Keras Tokenizer
+# dan token id ditulis langsung ke array int32 (batch, MAX_LEN).
+
+MAX_LEN = 100
+KERAS_FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+
+CLEAN_PATTERN = re.compile(r'[^a-zA-Z0-9\s]')
+# Setelah normalize() hanya tersisa huruf/angka dan whitespace. Keras hanya memecah di spasi
+# (serta \t dan \n yang ada di filters), jadi whitespace lain seperti \r tetap bagian dari kata.
+TOKEN_PATTERN = re.compile(r'[^ \t\n]+')
+
+
+def normalize(text):
+    """Lowercase lalu buang karakter selain huruf, angka dan whitespace"""
+    return CLEAN_PATTERN.sub('', str(text).lower())
+
+
+class FrozenTokenizer:
+    """Pengganti Keras Tokenizer.texts_to_sequences dengan vocabulary yang sudah dibekukan"""
+
+    def __init__(self, word_index, num_words=None, oov_token=None,
+                 filters=KERAS_FILTERS, lower=True, split=" ", max_len=MAX_LEN):
+        self.num_words = num_words
+        self.oov_token = oov_token
+        self.oov_index = word_index.get(oov_token) if oov_token is not None else None
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.max_len = max_len
+        self.translate_map = str.maketrans({c: split for c in filters})
+        # TOKEN_PATTERN hanya setara dengan Keras untuk filters/split default
+        self.fast_path = filters == KERAS_FILTERS and split == " "
+        # Kata dengan index >= num_words diperlakukan sama seperti OOV, jadi tidak perlu disimpan
+        self.word_index = {
+            w: i for w, i in word_index.items() if not num_words or i < num_words
+        }
+
+    @classmethod
+    def from_keras_tokenizer(cls, tokenizer, max_len=MAX_LEN):
+        return cls(
+            tokenizer.word_index,
+            num_words=tokenizer.num_words,
+            oov_token=tokenizer.oov_token,
+            filters=tokenizer.filters,
+            lower=tokenizer.lower,
+            split=tokenizer.split,
+            max_len=max_len,
+        )
+
+    @classmethod
+    def from_arrays(cls, words, ids, config, max_len=MAX_LEN):
+        return cls(dict(zip(words.tolist(), ids.tolist())), max_len=max_len, **config)
+
+    def to_arrays(self):
+        """Vocabulary dalam bentuk array (words, ids) + config, untuk disimpan di .npz"""
+        words = np.array(list(self.word_index.keys()))
+        ids = np.array(list(self.word_index.values()), dtype=np.int32)
+        config = {
+            "num_words": self.num_words,
+            "oov_token": self.oov_token,
+            "filters": self.filters,
+            "lower": self.lower,
+            "split": self.split,
+        }
+        return words, ids, config
+
+    def texts_to_sequences(self, texts):
+        # Jalur umum yang mengikuti Keras persis (untuk teks yang belum di-normalize)
+        sequences = []
+        for text in texts:
+            if self.lower:
+                text = text.lower()
+            words = [w for w in text.translate(self.translate_map).split(self.split) if w]
+            seq = []
+            for w in words:
+                i = self.word_index.get(w)
+                if i is not None:
+                    seq.append(i)
+                elif self.oov_index is not None:
+                    seq.append(self.oov_index)
+            sequences.append(seq)
+        return sequences
+
+    def encode_batch(self, texts, out=None, normalized=False):
+        """Tokenize banyak teks sekaligus ke array int32 (batch, max_len), padding/truncating 'post'"""
+        if out is None:
+            out = np.zeros((len(texts), self.max_len), dtype=np.int32)
+        else:
+            out[:len(texts)] = 0
+
+        if not self.fast_path:
+            sequences = self.texts_to_sequences(texts if normalized else [normalize(t) for t in texts])
+            for row, seq in enumerate(sequences):
+                seq = seq[:self.max_len]
+                out[row, :len(seq)] = seq
+            return out
+
+        get = self.word_index.get
+        oov = self.oov_index
+        max_len = self.max_len
+        for row, text in enumerate(texts):
+            if not normalized:
+                text = normalize(text)
+            words = TOKEN_PATTERN.findall(text)
+            if oov is not None:
+                # Setiap kata pasti menghasilkan satu id, cukup ambil max_len kata pertama
+                ids = [get(w, oov) for w in words[:max_len]]
+            else:
+                ids = [i for i in map(get, words) if i is not None][:max_len]
+            out[row, :len(ids)] = ids
+        return out
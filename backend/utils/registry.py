@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+
+# Registry model berbasis filesystem (bisa di volume bersama untuk semua pod):
+#   <root>/versions/<version>/   artifact satu training run + manifest.json, tidak pernah diubah lagi
+#   <root>/CURRENT               version yang di-serve, diganti secara atomik (os.replace)
+#   <root>/history.jsonl         log promote/rollback, dipakai untuk rollback ke version sebelumnya
+# Server memantau CURRENT (lihat ModelLoader.start_watcher) lalu load, warmup dan swap model baru.
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", os.path.join(BASE_DIR, "models", "registry"))
+MANIFEST_NAME = "manifest.json"
+# File di direktori model yang ikut masuk ke sebuah version
+REGISTRY_EXTENSIONS = (".h5", ".pickle", ".npz", ".json")
+# Basis kompresi (compress_models.py), tidak dipakai serving
+REGISTRY_EXCLUDE = ("serving_bundle.float32.npz",)
+# Mode yang terakhir di-train (ditulis train_dl_models.py); file .h5 mode lain bisa sisa training lama
+TRAINED_MODE_NAME = "trained_mode.json"
+# Prefix nama artifact per mode; file tanpa prefix ini (IDF keyword, bundle NumPy, json) dipakai semua mode
+MODE_PREFIXES = {"multitask": ("multitask_",), "separate": ("sentiment_", "category_")}
+MODE_MODELS = {"multitask": "multitask_dl_model.h5", "separate": "sentiment_dl_model.h5"}
+
+
+class RegistryError(Exception):
+    pass
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_trained_mode(model_dir, mode):
+    with open(os.path.join(model_dir, TRAINED_MODE_NAME), 'w') as f:
+        json.dump({"mode": mode, "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}, f, indent=2)
+
+
+def trained_mode(model_dir):
+    """"multitask" / "separate" dari trained_mode.json; tanpa file itu (model lama) mode dengan .h5 terbaru"""
+    path = os.path.join(model_dir, TRAINED_MODE_NAME)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)["mode"]
+    mtimes = {
+        mode: os.path.getmtime(os.path.join(model_dir, name))
+        for mode, name in MODE_MODELS.items() if os.path.exists(os.path.join(model_dir, name))
+    }
+    return max(mtimes, key=mtimes.get) if mtimes else None
+
+
+def mode_artifact(name, mode):
+    """False jika file milik mode lain (tidak ikut di-serve / di-publish)"""
+    if mode is None:
+        return True
+    other = [prefix for m, prefixes in MODE_PREFIXES.items() if m != mode for prefix in prefixes]
+    return not name.startswith(tuple(other))
+
+
+class ModelRegistry:
+    """Version artifact model yang immutable dengan pointer CURRENT untuk promote & rollback"""
+
+    def __init__(self, root=MODEL_REGISTRY_DIR):
+        self.root = root
+        self.versions_dir = os.path.join(root, "versions")
+        self.current_path = os.path.join(root, "CURRENT")
+        self.history_path = os.path.join(root, "history.jsonl")
+        self._lock = threading.Lock()
+
+    def version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def versions(self):
+        """Semua version, terlama dulu (nama version diawali timestamp)"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.versions_dir)
+            if not name.startswith(".") and os.path.exists(os.path.join(self.versions_dir, name, MANIFEST_NAME))
+        )
+
+    def current(self):
+        """Version yang sedang di-serve, None jika registry belum dipakai"""
+        try:
+            with open(self.current_path) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def manifest(self, version):
+        path = os.path.join(self.version_dir(version), MANIFEST_NAME)
+        if not os.path.exists(path):
+            raise RegistryError(f"Unknown model version: {version}")
+        with open(path) as f:
+            return json.load(f)
+
+    def verify(self, version):
+        """Cek checksum semua file version terhadap manifest (file rusak / terpotong saat copy)"""
+        manifest = self.manifest(version)
+        directory = self.version_dir(version)
+        for name, info in manifest["files"].items():
+            path = os.path.join(directory, name)
+            if not os.path.exists(path) or file_sha256(path) != info["sha256"]:
+                raise RegistryError(f"Checksum mismatch for {name} in version {version}")
+        return manifest
+
+    def publish(self, source_dir, metrics=None, tokenizer=None, extra=None):
+        """Salin artifact dari source_dir menjadi version baru (belum di-serve, lihat promote)"""
+        mode = trained_mode(source_dir)
+        files = sorted(
+            name for name in os.listdir(source_dir)
+            if name.endswith(REGISTRY_EXTENSIONS) and name not in REGISTRY_EXCLUDE
+            and mode_artifact(name, mode) and os.path.isfile(os.path.join(source_dir, name))
+        )
+        if not files:
+            raise RegistryError(f"No model artifacts found in {source_dir}")
+
+        checksums = {name: file_sha256(os.path.join(source_dir, name)) for name in files}
+        content = hashlib.sha256("".join(f"{n}\0{h}\n" for n, h in checksums.items()).encode("utf-8"))
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{content.hexdigest()[:8]}"
+
+        # Ditulis ke direktori sementara lalu di-rename, jadi version tidak pernah terlihat setengah jadi
+        os.makedirs(self.versions_dir, exist_ok=True)
+        tmp_dir = os.path.join(self.versions_dir, f".tmp-{version}")
+        os.makedirs(tmp_dir)
+        try:
+            for name in files:
+                shutil.copy2(os.path.join(source_dir, name), os.path.join(tmp_dir, name))
+            manifest = {
+                "version": version,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "parent": self.current(),
+                "backend": "numpy" if "serving_bundle.npz" in files else "keras",
+                "mode": mode,
+                "files": {
+                    name: {"sha256": checksums[name], "bytes": os.path.getsize(os.path.join(tmp_dir, name))}
+                    for name in files
+                },
+                "metrics": metrics or {},
+                "tokenizer": tokenizer or {},
+                **(extra or {}),
+            }
+            with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            for name in os.listdir(tmp_dir):
+                os.chmod(os.path.join(tmp_dir, name), 0o444)
+            os.rename(tmp_dir, self.version_dir(version))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return version
+
+    def promote(self, version, action="promote"):
+        """Jadikan version sebagai CURRENT (atomik), server akan memuatnya tanpa restart"""
+        self.verify(version)
+        with self._lock:
+            previous = self.current()
+            tmp_path = f"{self.current_path}.tmp-{os.getpid()}"
+            with open(tmp_path, 'w') as f:
+                f.write(version + "\n")
+            os.replace(tmp_path, self.current_path)
+            with open(self.history_path, 'a') as f:
+                f.write(json.dumps({"action": action, "version": version, "previous": previous,
+                                    "at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}) + "\n")
+        return previous
+
+    def history(self):
+        if not os.path.exists(self.history_path):
+            return []
+        with open(self.history_path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def rollback(self, version=None):
+        """Kembali ke version tertentu, atau ke version sebelum CURRENT dipromosikan"""
+        if version is None:
+            current = self.current()
+            promotions = [e for e in self.history() if e["action"] == "promote" and e["version"] == current]
+            if not promotions or not promotions[-1]["previous"]:
+                raise RegistryError(f"No previous version to roll back to from {current}")
+            version = promotions[-1]["previous"]
+        self.promote(version, action="rollback")
+        return version
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+import threading
+
+
+class ThreadLocalConnection:
+    """Koneksi SQLite (WAL) per thread dan per proses; thread-local tidak ikut fork, jadi dibuka ulang"""
+
+    def __init__(self, db_path, timeout=30):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+
+class PerProcessStart:
+    """Thread background tidak ikut ter-fork, jadi start ulang sekali di setiap proses (gunicorn worker)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def running(self):
+        return self.pid == os.getpid()
+
+    def run(self, start):
+        """Panggil start() sekali per proses; return False jika sudah dijalankan di proses ini"""
+        if self.running():
+            return False
+        with self.lock:
+            if self.running():
+                return False
+            start()
+            self.pid = os.getpid()
+            return True
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import hashlib
+import threading
+
+from backend.utils.jobs import JOB_DB_PATH, QUEUED, RUNNING
+from backend.utils.metrics import UPLOAD_EVENTS
+from backend.utils.sqlite_store import ThreadLocalConnection, PerProcessStart
+
+# Configuration (bisa diubah lewat ENV)
+# Index disimpan di database job (tabel terpisah), karena entry-nya menunjuk ke job id
+UPLOAD_INDEX_DB_PATH = os.getenv("UPLOAD_INDEX_DB_PATH", JOB_DB_PATH)
+# Retensi folder uploads: file yang tidak dipakai job aktif dihapus setelah UPLOAD_RETENTION detik,
+# atau lebih awal (terlama dulu) jika total ukuran folder melebihi UPLOAD_MAX_TOTAL_BYTES
+UPLOAD_RETENTION = float(os.getenv("UPLOAD_RETENTION", str(3 * 24 * 3600)))
+UPLOAD_MAX_TOTAL_BYTES = int(os.getenv("UPLOAD_MAX_TOTAL_BYTES", str(20 * 1024 * 1024 * 1024)))
+UPLOAD_GC_INTERVAL = float(os.getenv("UPLOAD_GC_INTERVAL", "3600"))
+# File yang lebih baru dari ini tidak pernah dihapus (bisa jadi belum sempat di-enqueue),
+# file .part yang lebih tua dari ini adalah sisa ingest yang terputus
+UPLOAD_GC_GRACE = float(os.getenv("UPLOAD_GC_GRACE", "3600"))
+
+
+def upload_key(session_id, video_sha256, title, description):
+    """Key dedupe: hash konten video + hash title/description, per session (akun YouTube) user"""
+    text_sha256 = hashlib.sha256(f"{title.strip()}\0{description.strip()}".encode("utf-8")).hexdigest()
+    return hashlib.sha256(f"{session_id}\0{video_sha256}\0{text_sha256}".encode("utf-8")).hexdigest()
+
+
+def active_video_paths(job_queue):
+    """Path absolut video milik job yang masih queued/running (file ini tidak boleh dihapus)"""
+    return {
+        os.path.abspath(payload["video_path"])
+        for payload in job_queue.payloads((QUEUED, RUNNING)) if "video_path" in payload
+    }
+
+
+def discard_upload(path, job_queue):
+    """Hapus file upload yang tidak jadi dipakai, kecuali masih dirujuk job aktif; True jika dihapus"""
+    if os.path.abspath(path) in active_video_paths(job_queue):
+        return False
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+class UploadIndex:
+    """Index persisten (SQLite) dari upload_key ke job & hasil upload YouTube sebelumnya"""
+
+    def __init__(self, db_path=UPLOAD_INDEX_DB_PATH):
+        self.db_path = db_path
+        self._connect = ThreadLocalConnection(db_path)
+        self._connect().execute(
+            "CREATE TABLE IF NOT EXISTS upload_index ("
+            "key TEXT PRIMARY KEY, video_sha256 TEXT NOT NULL, job_id TEXT NOT NULL, "
+            "youtube_id TEXT, youtube_link TEXT, result TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def get(self, key):
+        row = self._connect().execute("SELECT * FROM upload_index WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        entry = dict(row)
+        entry["result"] = json.loads(entry["result"] or "{}")
+        return entry
+
+    def put(self, key, video_sha256, job_id, result):
+        """Daftarkan job baru untuk key (menggantikan entry lama, misalnya job yang gagal)"""
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO upload_index (key, video_sha256, job_id, result, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET job_id = excluded.job_id, "
+            "youtube_id = NULL, youtube_link = NULL, result = excluded.result, updated_at = excluded.updated_at",
+            (key, video_sha256, job_id, json.dumps(result), now, now)
+        )
+
+    def record_upload(self, key, job_id, youtube_id, youtube_link):
+        # Hanya jika key masih menunjuk ke job ini (bisa sudah diganti job yang lebih baru)
+        self._connect().execute(
+            "UPDATE upload_index SET youtube_id = ?, youtube_link = ?, updated_at = ? WHERE key = ? AND job_id = ?",
+            (youtube_id, youtube_link, time.time(), key, job_id)
+        )
+
+
+class UploadJanitor:
+    """Garbage collection folder uploads sesuai kebijakan retensi, jalan periodik di background"""
+
+    def __init__(self, upload_folder, job_queue, retention=UPLOAD_RETENTION, max_total_bytes=UPLOAD_MAX_TOTAL_BYTES,
+                 interval=UPLOAD_GC_INTERVAL, grace=UPLOAD_GC_GRACE):
+        self.upload_folder = upload_folder
+        self.queue = job_queue
+        self.retention = retention
+        self.max_total_bytes = max_total_bytes
+        self.interval = interval
+        self.grace = grace
+        self._started = PerProcessStart()
+
+    def collect(self):
+        """Satu putaran GC, return jumlah file yang dihapus"""
+        now = time.time()
+        # Video milik job yang masih queued/running tidak boleh dihapus
+        active = active_video_paths(self.queue)
+
+        files = []
+        removed = 0
+        for entry in os.scandir(self.upload_folder):
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            age = now - stat.st_mtime
+            if entry.name.endswith(".part"):
+                if age > self.grace and self._remove(entry.path):
+                    removed += 1
+                    UPLOAD_EVENTS.labels("gc_part_removed").inc()
+                continue
+            if age < self.grace or os.path.abspath(entry.path) in active:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+
+        # Terlama dulu: hapus yang melewati retensi, lalu sisanya selama total masih di atas batas
+        total = sum(size for _, size, _ in files)
+        for mtime, size, path in sorted(files):
+            if now - mtime < self.retention and total <= self.max_total_bytes:
+                break
+            if self._remove(path):
+                total -= size
+                removed += 1
+                UPLOAD_EVENTS.labels("gc_removed").inc()
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            # Sudah dihapus worker lain
+            return False
+
+    def start(self):
+        if self.interval > 0:
+            self._started.run(threading.Thread(target=self._run, name="upload-janitor", daemon=True).start)
+
+    def _run(self):
+        while True:
+            try:
+                removed = self.collect()
+                if removed:
+                    print(f"Upload GC removed {removed} file(s)")
+            except Exception as e:
+                print(f"Upload GC error: {e}")
+            time.sleep(self.interval)
@@ -1,7 +1,17 @@
 import os
+import json
+import time
+import random
 import pickle
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
+import threading
+import http.client
+from datetime import datetime
+import httplib2
+from googleapiclient.discovery import build_from_document
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.errors import HttpError
+from googleapiclient.http import MediaFileUpload, build_http
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import Flow
 from google.auth.transport.requests import Request
 import google.oauth2.credentials
@@ -12,6 +22,19 @@ SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
 # File konfigurasi
 CLIENT_SECRETS_FILE = "backend/client_secrets.json"
 
+# Resumable upload: ukuran chunk harus kelipatan 256 KB
+UPLOAD_CHUNK_SIZE = int(os.getenv("YOUTUBE_UPLOAD_CHUNK_SIZE", str(8 * 1024 * 1024)))
+UPLOAD_MAX_RETRIES = int(os.getenv("YOUTUBE_UPLOAD_MAX_RETRIES", "8"))
+UPLOAD_MAX_BACKOFF = float(os.getenv("YOUTUBE_UPLOAD_MAX_BACKOFF", "64"))
+# Override rootUrl YouTube API, contoh "http://localhost:8765/" untuk fake upload server lokal
+YOUTUBE_API_ROOT = os.getenv("YOUTUBE_API_ROOT", "")
+
+RETRIABLE_STATUS_CODES = (500, 502, 503, 504)
+# Hanya error jaringan/transport; OSError lain (file video hilang, disk penuh) langsung gagal
+RETRIABLE_EXCEPTIONS = (httplib2.HttpLib2Error, http.client.HTTPException, ConnectionError, TimeoutError)
+# Sesi upload yang sudah kadaluarsa / tidak dikenal server: mulai sesi baru dari byte 0
+EXPIRED_SESSION_STATUS_CODES = (404, 410)
+
 def get_flow():
     """Membuat objek Flow untuk OAuth Web Server"""
     # Gunakan ENV variable agar fleksibel (bisa 5000, 30080, atau domain asli)
@@ -31,21 +54,73 @@ def credentials_to_dict(credentials):
         'token_uri': credentials.token_uri,
         'client_id': credentials.client_id,
         'client_secret': credentials.client_secret,
-        'scopes': credentials.scopes
+        'scopes': credentials.scopes,
+        # Waktu kedaluwarsa access token (UTC), dipakai refresher di backend/utils/credentials.py
+        'expiry': credentials.expiry.isoformat() if credentials.expiry else None
     }
 
 def dict_to_credentials(cred_dict):
     """Mengubah dictionary kembali menjadi object Credentials"""
-    return google.oauth2.credentials.Credentials(**cred_dict)
+    cred_dict = dict(cred_dict)
+    expiry = cred_dict.pop('expiry', None)
+    return google.oauth2.credentials.Credentials(
+        **cred_dict, expiry=datetime.fromisoformat(expiry) if expiry else None
+    )
+
+_discovery_document = None
+_service_cache = threading.local()
+
+def get_discovery_document():
+    """Discovery document YouTube v3, di-parse sekali per proses"""
+    global _discovery_document
+    if _discovery_document is None:
+        document = json.loads(get_static_doc("youtube", "v3"))
+        if YOUTUBE_API_ROOT:
+            # Arahkan semua request (termasuk upload) ke server lain, misalnya fake server lokal
+            document["rootUrl"] = YOUTUBE_API_ROOT
+        _discovery_document = document
+    return _discovery_document
 
-def upload_video(credentials, file_path, title, description):
-    """Upload video menggunakan credentials yang diberikan"""
+def build_youtube(credentials):
+    """(service, http) untuk credential ini. Service dan koneksi httplib2 di-cache per thread
+    (httplib2 tidak thread-safe) tanpa credential; credential dipasang per request lewat AuthorizedHttp,
+    jadi refresh token inline meng-update object credentials milik pemanggil (lihat save_if_changed)"""
+    service = getattr(_service_cache, "service", None)
+    if service is None:
+        _service_cache.http = build_http()
+        service = _service_cache.service = build_from_document(get_discovery_document(), http=_service_cache.http)
+    return service, AuthorizedHttp(credentials, http=_service_cache.http)
+
+def query_upload_status(request, http, session_uri):
+    """Tanya server sudah menerima sampai byte ke berapa (PUT kosong "bytes */<total>").
+    Return response video jika upload ternyata sudah selesai, selain itu None dan
+    request.resumable_progress di-set ke offset berikutnya"""
+    headers = {"Content-Range": f"bytes */{request.resumable.size()}", "Content-Length": "0"}
+    resp, content = http.request(session_uri, "PUT", headers=headers)
+    if resp.status in (200, 201):
+        return request.postproc(resp, content)
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=session_uri)
+    # Range: bytes=0-<byte terakhir>, tidak ada header Range = belum ada byte yang diterima
+    request.resumable_uri = resp.get("location", session_uri)
+    request.resumable_progress = int(resp["range"].rpartition("-")[2]) + 1 if "range" in resp else 0
+    return None
+
+def upload_video(credentials, file_path, title, description,
+                 resume_uri=None, on_progress=None, on_session=None):
+    """Upload video secara resumable per chunk, dengan retry + exponential backoff
+
+    resume_uri  : URI sesi upload sebelumnya, agar upload dilanjutkan dari byte terakhir
+    on_progress : callback(bytes_sent, total_bytes) setiap chunk selesai
+    on_session  : callback(session_uri) saat sesi upload dibuat, untuk disimpan sebagai checkpoint
+    """
     
     # Build service YouTube dengan credentials user
-    youtube = build("youtube", "v3", credentials=credentials)
+    youtube, http = build_youtube(credentials)
 
     # Upload video
     print(f"Uploading video: {title}...")
+    media = MediaFileUpload(file_path, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
     request = youtube.videos().insert(
         part="snippet,status",
         body={
@@ -56,10 +131,51 @@ def upload_video(credentials, file_path, title, description):
             },
             "status": {"privacyStatus": "private"}  # Default private
         },
-        media_body=MediaFileUpload(file_path)
+        media_body=media
     )
 
-    response = request.execute()
+    response = None
+    retry = 0
+    session_uri = resume_uri
+    while response is None:
+        error = None
+        try:
+            if resume_uri:
+                # Tanya server sudah sampai byte ke berapa sebelum mengirim chunk berikutnya
+                response = query_upload_status(request, http, resume_uri)
+                resume_uri = None
+                if response is not None:
+                    break
+            status, response = request.next_chunk(http=http)
+            retry = 0
+            if request.resumable_uri != session_uri:
+                session_uri = request.resumable_uri
+                if on_session:
+                    on_session(session_uri)
+            if status and on_progress:
+                on_progress(status.resumable_progress, status.total_size)
+        except HttpError as e:
+            if resume_uri and e.resp.status in EXPIRED_SESSION_STATUS_CODES:
+                print(f"Upload session expired ({e.resp.status}), starting a new one")
+                resume_uri = session_uri = None
+                continue
+            if e.resp.status not in RETRIABLE_STATUS_CODES:
+                raise
+            error = e
+        except RETRIABLE_EXCEPTIONS as e:
+            error = e
+
+        if error is not None:
+            retry += 1
+            if retry > UPLOAD_MAX_RETRIES:
+                raise error
+            # Exponential backoff dengan jitter; chunk berikutnya melanjutkan dari offset di server
+            delay = random.uniform(0, min(UPLOAD_MAX_BACKOFF, 2 ** retry))
+            print(f"Upload error ({error}), retry {retry}/{UPLOAD_MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+
+    if on_progress:
+        on_progress(media.size(), media.size())
 
     # Return hasil upload
     return {
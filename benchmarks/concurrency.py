@@ -0,0 +1,192 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from benchmarks.startup import wait_ready
+from benchmarks.inference import (
+    BENCH_TOKEN, RESULTS_DIR, FakeN8nHandler, FakeYouTubeHandler, git_commit, http_request, multipart_body,
+    run_load, sample_items, start_fake_server
+)
+
+# Load test mode serving gunicorn: worker "sync" (mode lama) vs "gthread" + executor inference terbatas.
+# - mixed   : beberapa client upload video dengan lambat (koneksi lambat) sambil /predict di-load test,
+#             di mode sync setiap upload lambat memblokir satu worker penuh
+# - overload: /predict dengan concurrency jauh di atas kapasitas, antrian inference yang penuh harus
+#             menjawab 503 + Retry-After dengan cepat, bukan latency yang terus membesar
+# Jalankan dari root repo:
+#   python benchmarks/concurrency.py
+#   python benchmarks/concurrency.py --worker-classes sync gthread --workers 2 --threads 32
+
+WORKER_CLASSES = ["sync", "gthread"]
+
+
+def slow_upload(port, body, content_type, seconds, chunk_size=16 * 1024):
+    """Kirim body /upload per chunk selama kurang lebih `seconds` detik (simulasi client lambat)"""
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+    delay = seconds / max(len(chunks), 1)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    started = time.perf_counter()
+    try:
+        conn.putrequest("POST", "/upload")
+        conn.putheader("Content-Type", content_type)
+        conn.putheader("Content-Length", str(len(body)))
+        conn.endheaders()
+        for chunk in chunks:
+            conn.send(chunk)
+            time.sleep(delay)
+        res = conn.getresponse()
+        res.read()
+        return res.status, time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def start_server(worker_class, args, workdir, youtube, n8n):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": ROOT,
+        "GUNICORN_BIND": f"127.0.0.1:{args.port}",
+        "GUNICORN_WORKERS": str(args.workers),
+        "GUNICORN_WORKER_CLASS": worker_class,
+        "GUNICORN_THREADS": str(args.threads),
+        "INFERENCE_QUEUE_SIZE": str(args.queue_size),
+        "BENCH_TOKEN": BENCH_TOKEN,
+        "YOUTUBE_API_ROOT": f"http://127.0.0.1:{youtube.server_address[1]}/",
+        "N8N_WEBHOOK_URL": f"http://127.0.0.1:{n8n.server_address[1]}/webhook/send_notification",
+        # Yang diukur jalur model, bukan cache prediksi
+        "PREDICTION_CACHE_SIZE": "0",
+    })
+    log = open(os.path.join(workdir, f"gunicorn-{worker_class}.log"), "w")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "backend", "gunicorn.conf.py"),
+         "benchmarks.stub_app:app"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    return proc, log
+
+
+def benchmark_worker_class(worker_class, args, items):
+    youtube = start_fake_server(FakeYouTubeHandler)
+    n8n = start_fake_server(FakeN8nHandler)
+    workdir = tempfile.mkdtemp(prefix=f"bench-{worker_class}-")
+    base_url = f"http://127.0.0.1:{args.port}"
+    proc, log = start_server(worker_class, args, workdir, youtube, n8n)
+    try:
+        wait_ready(f"{base_url}/ready", args.workers, args.timeout)
+        results = {"workers": args.workers, "threads": args.threads if worker_class == "gthread" else 1}
+
+        def predict_one(i):
+            title, description = items[i % len(items)]
+            body = json.dumps({"title": title, "description": description}).encode("utf-8")
+            return http_request(f"{base_url}/predict", body, "application/json")
+
+        # Warmup koneksi & batcher agar tidak ikut terukur
+        run_load(predict_one, 20, 2)
+
+        results["predict_baseline"], _ = run_load(predict_one, args.requests, args.concurrency)
+
+        # Mixed: upload lambat berjalan di background selama load test /predict
+        slow = []
+
+        def run_slow(i):
+            title, description = items[i % len(items)]
+            body, content_type = multipart_body(
+                {"title": title, "description": description, "email": "bench@example.com", "token": BENCH_TOKEN},
+                "video", f"slow_{i}.mp4", os.urandom(args.video_kb * 1024)
+            )
+            slow.append(slow_upload(args.port, body, content_type, args.slow_seconds))
+
+        uploaders = [threading.Thread(target=run_slow, args=(i,)) for i in range(args.slow_clients)]
+        for thread in uploaders:
+            thread.start()
+        time.sleep(0.2)
+        results["predict_during_slow_uploads"], _ = run_load(predict_one, args.requests, args.concurrency)
+        for thread in uploaders:
+            thread.join()
+        results["slow_uploads"] = {
+            "clients": args.slow_clients,
+            "statuses": sorted(status for status, _ in slow),
+            "seconds": round(max((seconds for _, seconds in slow), default=0), 3),
+        }
+
+        # Overload: concurrency di atas kapasitas executor + antrian
+        overload, responses = run_load(predict_one, args.overload_requests, args.overload_concurrency)
+        ok = sum(1 for status, _, _ in responses if status == 200)
+        overload["ok_per_sec"] = round(overload["requests_per_sec"] * ok / args.overload_requests, 1)
+        results["predict_overload"] = overload
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        log.close()
+        youtube.shutdown()
+        n8n.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_summary(report):
+    rows = [
+        ("predict_baseline", "requests_per_sec"),
+        ("predict_during_slow_uploads", "requests_per_sec"),
+        ("predict_overload", "requests_per_sec"),
+    ]
+    classes = list(report["results"])
+    print(f"\n{'scenario':<32}" + "".join(f"{c + ' rps':>14}{c + ' p99':>14}" for c in classes))
+    for scenario, key in rows:
+        line = f"{scenario:<32}"
+        for c in classes:
+            stats = report["results"][c][scenario]
+            line += f"{stats[key]:>14.1f}{stats['latency_ms']['p99']:>14.1f}"
+        print(line)
+    for c in classes:
+        print(f"{c}: overload statuses {report['results'][c]['predict_overload']['statuses']}")
+    if "sync" in classes and "gthread" in classes:
+        sync = report["results"]["sync"]["predict_during_slow_uploads"]["requests_per_sec"]
+        gthread = report["results"]["gthread"]["predict_during_slow_uploads"]["requests_per_sec"]
+        print(f"Throughput gain during slow uploads (gthread / sync): {gthread / sync:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test gunicorn worker classes and inference backpressure")
+    parser.add_argument("--worker-classes", nargs="+", default=WORKER_CLASSES)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--queue-size", type=int, default=16, help="INFERENCE_QUEUE_SIZE server")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--slow-clients", type=int, default=2)
+    parser.add_argument("--slow-seconds", type=float, default=5.0)
+    parser.add_argument("--video-kb", type=int, default=256)
+    parser.add_argument("--overload-requests", type=int, default=2000)
+    parser.add_argument("--overload-concurrency", type=int, default=256)
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", help="Default: benchmarks/results/concurrency-<commit>.json")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    items = sample_items(max(args.requests, args.overload_requests))
+    report = {
+        "meta": {"commit": commit, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "cpu_count": os.cpu_count()},
+        "results": {},
+    }
+    for worker_class in args.worker_classes:
+        print(f"Benchmarking worker class '{worker_class}'...")
+        report["results"][worker_class] = benchmark_worker_class(worker_class, args, items)
+        print(json.dumps(report["results"][worker_class], indent=2))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"concurrency-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+    print_summary(report)
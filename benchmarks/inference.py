@@ -0,0 +1,510 @@
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from benchmarks.startup import wait_ready, child_pids
+
+# Benchmark jalur serving:
+# - model: cold start SentimentModel, tokenisasi, forward per model (p50/p95/p99), predict_batch
+#   end-to-end (item/detik) dan peak RSS untuk setiap batch size
+# - http: load test /predict, /predict/bulk dan /upload lewat gunicorn, dengan fake YouTube upload
+#   server dan fake n8n webhook lokal (tanpa akses internet / akun Google)
+# Hasil ditulis ke JSON agar bisa dibandingkan antar commit. Jalankan dari root repo:
+#   python benchmarks/inference.py
+#   python benchmarks/inference.py --compare benchmarks/results/inference-<commit lama>.json
+
+BATCH_SIZES = [1, 8, 32, 128, 512]
+REPEATS = 30
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+BENCH_TOKEN = "bench-token"
+# Perubahan lebih buruk dari ini (10%) ditandai sebagai regresi oleh --compare
+REGRESSION_THRESHOLD = 0.10
+# Selisih absolut di bawah ini (ms / MB / item) dianggap noise, tidak ditandai regresi
+NOISE_FLOOR = 0.05
+
+COLD_START_CODE = """
+import time, json, resource
+started = time.perf_counter()
+from backend.utils.ml_model import SentimentModel, uses_numpy_backend
+model = SentimentModel()
+print(json.dumps({
+    "seconds": time.perf_counter() - started,
+    "backend": "numpy" if uses_numpy_backend() else "keras",
+    "model_version": model.model_version,
+    "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+
+def summarize(seconds):
+    ms = np.asarray(seconds) * 1000
+    return {
+        "mean": round(float(np.mean(ms)), 3),
+        "p50": round(float(np.percentile(ms, 50)), 3),
+        "p95": round(float(np.percentile(ms, 95)), 3),
+        "p99": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+def timed(fn, repeats):
+    fn()  # warmup
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def peak_rss_mb(pid=None):
+    if pid is None:
+        return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    # VmHWM = peak RSS proses lain (gunicorn worker)
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return None
+
+
+def sample_items(n):
+    """(title, description) dari dataset.csv, diulang sampai n item"""
+    df = pd.read_csv(os.path.join(ROOT, "dataset.csv"), usecols=["title", "description"]).fillna("")
+    items = list(zip(df["title"].astype(str), df["description"].astype(str)))
+    return [items[i % len(items)] for i in range(n)]
+
+
+# --- Model -----------------------------------------------------------------
+
+def measure_cold_start(runs):
+    """Waktu import + SentimentModel() di proses baru, median dari beberapa run"""
+    results = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", COLD_START_CODE], cwd=ROOT, capture_output=True, text=True,
+            env=dict(os.environ, PYTHONPATH=ROOT), check=True
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    seconds = [r["seconds"] for r in results]
+    return {
+        "runs": runs,
+        "backend": results[0]["backend"],
+        "model_version": results[0]["model_version"],
+        "seconds_p50": round(float(np.median(seconds)), 3),
+        "seconds_max": round(float(np.max(seconds)), 3),
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in results), 1),
+    }
+
+
+def benchmark_model(batch_sizes, repeats):
+    from backend.utils.ml_model import SentimentModel
+    from backend.utils.preprocessing import normalize
+
+    model = SentimentModel()
+    # Yang diukur jalur model, bukan cache prediksi
+    model.cache = None
+    models = {
+        name: m for name, m in (
+            ("multitask", model.multitask_model),
+            ("sentiment", model.sentiment_model),
+            ("category", model.category_model),
+        ) if m is not None
+    }
+    if not models:
+        raise SystemExit("No model loaded, run ml_training/train_dl_models.py first")
+
+    items = sample_items(max(batch_sizes))
+    batches = {}
+    for batch_size in batch_sizes:
+        batch = items[:batch_size]
+        texts = [str(title) + " " + str(description) for title, description in batch]
+
+        def tokenize():
+            return model.tokenizer.encode_batch([normalize(text) for text in texts], normalized=True)
+
+        X = tokenize()
+        tokenize_ms = summarize(timed(tokenize, repeats))
+        forward_ms = {
+            name: summarize(timed(lambda m=m: m.predict(X, batch_size=batch_size, verbose=0), repeats))
+            for name, m in models.items()
+        }
+        predict_ms = summarize(timed(lambda: model.predict_batch(batch), repeats))
+
+        batches[str(batch_size)] = {
+            "tokenize_ms": tokenize_ms,
+            "forward_ms": forward_ms,
+            "predict_ms": predict_ms,
+            "predict_items_per_sec": round(batch_size / (predict_ms["p50"] / 1000), 1),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        print(f"batch {batch_size:>4}: tokenize p50 {tokenize_ms['p50']:.2f}ms, "
+              + ", ".join(f"{name} p50 {ms['p50']:.2f}ms" for name, ms in forward_ms.items())
+              + f", predict {batches[str(batch_size)]['predict_items_per_sec']:.0f} items/sec")
+    return {"repeats": repeats, "models": list(models), "batches": batches}
+
+
+# --- Fake YouTube & n8n ----------------------------------------------------
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+    """Protokol resumable upload YouTube secukupnya: POST membuat sesi, PUT mengirim chunk atau
+    menanyakan status ("bytes */N" -> 308 + Range byte yang sudah diterima). server.faults berisi
+    gangguan untuk PUT chunk berikutnya: "503" (chunk ditolak) atau "drop" (chunk diterima tapi
+    koneksi diputus sebelum response)"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _reply(self, status, body=b"", headers=None):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _progress(self, received):
+        # Range hanya dikirim jika server sudah menerima minimal satu byte
+        return {"Range": f"bytes=0-{len(received) - 1}"} if received else {}
+
+    def _complete(self, session):
+        with self.server.lock:
+            if session not in self.server.videos:
+                self.server.count += 1
+                self.server.videos[session] = uuid.uuid4().hex[:11]
+            video_id = self.server.videos[session]
+        body = json.dumps({"id": video_id, "kind": "youtube#video"}).encode("utf-8")
+        self._reply(200, body, {"Content-Type": "application/json"})
+
+    def do_POST(self):
+        self._read_body()
+        host, port = self.server.server_address
+        session = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.sessions[session] = bytearray()
+        self._reply(200, headers={"Location": f"http://{host}:{port}/upload-session/{session}"})
+
+    def do_PUT(self):
+        body = self._read_body()
+        if len(body) < int(self.headers.get("Content-Length", 0)):
+            # Client menyerah (timeout) sebelum body lengkap terkirim
+            self.close_connection = True
+            return
+        session = self.path.rpartition("/")[2]
+        # Content-Range: bytes <start>-<end>/<total> (chunk) atau bytes */<total> (status)
+        content_range = self.headers.get("Content-Range", "").replace("bytes ", "")
+        span, _, total = content_range.partition("/")
+        with self.server.lock:
+            received = self.server.sessions.get(session)
+            self.server.requests.append((session, content_range))
+            fault = self.server.faults.pop(0) if span != "*" and received is not None and self.server.faults else None
+        if received is None:
+            self._reply(404)
+            return
+        if fault == "503":
+            self._reply(503)
+            return
+
+        if span != "*":
+            start = int(span.partition("-")[0])
+            if start == len(received):
+                received.extend(body)
+        if fault == "drop":
+            self.close_connection = True
+            return
+        if total.isdigit() and len(received) >= int(total):
+            self._complete(session)
+            return
+        self._reply(308, headers=self._progress(received))
+
+
+class FakeN8nHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.count += 1
+        body = b'{"status": "ok"}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_fake_server(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.count = 0
+    server.lock = threading.Lock()
+    # State FakeYouTubeHandler: isi upload per sesi, video id per sesi yang selesai, log PUT, gangguan
+    server.sessions, server.videos, server.requests, server.faults = {}, {}, [], []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- HTTP load test --------------------------------------------------------
+
+def http_request(url, body=None, content_type=None, method=None):
+    request = urllib.request.Request(url, data=body, method=method)
+    if content_type:
+        request.add_header("Content-Type", content_type)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=120) as res:
+            data = res.read()
+            status = res.status
+    except urllib.error.HTTPError as e:
+        data = e.read()
+        status = e.code
+    return status, time.perf_counter() - started, data
+
+
+def run_load(send, count, concurrency):
+    """Jalankan send(i) sebanyak count kali dengan concurrency thread; send return (status, seconds, body)"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        responses = list(pool.map(send, range(count)))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for status, _, _ in responses:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": count,
+        "concurrency": concurrency,
+        "statuses": statuses,
+        "requests_per_sec": round(count / elapsed, 1),
+        "latency_ms": summarize([seconds for _, seconds, _ in responses]),
+    }, responses
+
+
+def multipart_body(fields, file_field, filename, content):
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        f'Content-Type: video/mp4\r\n\r\n'.encode("utf-8") + content + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def wait_jobs(base_url, job_ids, timeout):
+    """Poll /jobs/<id> sampai selesai; waktu selesai diukur dari respons /upload (client side)"""
+    pending = dict(job_ids)
+    finished = {}
+    deadline = time.perf_counter() + timeout
+    while pending and time.perf_counter() < deadline:
+        for job_id, submitted in list(pending.items()):
+            _, _, body = http_request(f"{base_url}/jobs/{job_id}")
+            status = json.loads(body).get("status")
+            if status in ("done", "failed"):
+                finished[job_id] = (status, time.perf_counter() - submitted)
+                del pending[job_id]
+        time.sleep(0.05)
+
+    completion = [seconds for _, seconds in finished.values()]
+    return {
+        "done": sum(1 for status, _ in finished.values() if status == "done"),
+        "failed": sum(1 for status, _ in finished.values() if status == "failed"),
+        "timed_out": len(pending),
+        "completion_ms": summarize(completion) if completion else None,
+    }
+
+
+def benchmark_http(args):
+    youtube = start_fake_server(FakeYouTubeHandler)
+    n8n = start_fake_server(FakeN8nHandler)
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": ROOT,
+        "GUNICORN_BIND": f"127.0.0.1:{args.port}",
+        "GUNICORN_WORKERS": str(args.workers),
+        "BENCH_TOKEN": BENCH_TOKEN,
+        "YOUTUBE_API_ROOT": f"http://127.0.0.1:{youtube.server_address[1]}/",
+        "N8N_WEBHOOK_URL": f"http://127.0.0.1:{n8n.server_address[1]}/webhook/send_notification",
+        # Yang diukur jalur model, bukan cache prediksi
+        "PREDICTION_CACHE_SIZE": "0",
+    })
+    # uploads/, jobs.db dan dead-letter n8n ditulis ke direktori sementara
+    log = open(os.path.join(workdir, "gunicorn.log"), "w")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", os.path.join(ROOT, "backend", "gunicorn.conf.py"),
+         "benchmarks.stub_app:app"],
+        cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    try:
+        ready_seconds = wait_ready(f"{base_url}/ready", args.workers, args.timeout)
+        items = sample_items(max(args.requests, args.bulk_rows))
+        results = {"workers": args.workers, "ready_seconds": round(ready_seconds, 3)}
+
+        def predict_one(i):
+            title, description = items[i % len(items)]
+            body = json.dumps({"title": title, "description": description}).encode("utf-8")
+            return http_request(f"{base_url}/predict", body, "application/json")
+        results["predict"], _ = run_load(predict_one, args.requests, args.concurrency)
+
+        def predict_items(i):
+            batch = [items[(i * 32 + j) % len(items)] for j in range(32)]
+            body = json.dumps({"items": [{"title": t, "description": d} for t, d in batch]}).encode("utf-8")
+            return http_request(f"{base_url}/predict", body, "application/json")
+        results["predict_items32"], _ = run_load(predict_items, max(args.requests // 8, 1), args.concurrency)
+
+        rows = "".join(json.dumps({"title": t, "description": d}) + "\n" for t, d in items[:args.bulk_rows])
+        status, seconds, body = http_request(f"{base_url}/predict/bulk", rows.encode("utf-8"), "application/x-ndjson")
+        results["predict_bulk"] = {
+            "rows": args.bulk_rows,
+            "status": status,
+            "seconds": round(seconds, 3),
+            "rows_per_sec": round(args.bulk_rows / seconds, 1),
+            "output_lines": body.count(b"\n"),
+        }
+
+        def upload_one(i):
+            title, description = items[i % len(items)]
+            body, content_type = multipart_body(
+                {"title": title, "description": description, "email": "bench@example.com", "token": BENCH_TOKEN},
+                "video", f"bench_{i}.mp4", os.urandom(args.video_kb * 1024)
+            )
+            return http_request(f"{base_url}/upload", body, content_type)
+        upload_stats, responses = run_load(upload_one, args.uploads, args.concurrency)
+        # Waktu selesai job dihitung dari saat respons /upload diterima
+        submitted = time.perf_counter()
+        job_ids = [(json.loads(body)["job_id"], submitted) for status, _, body in responses if status == 202]
+        upload_stats["video_kb"] = args.video_kb
+        upload_stats["jobs"] = wait_jobs(base_url, job_ids, args.timeout)
+        # Notifikasi n8n dikirim di background setelah job selesai
+        deadline = time.perf_counter() + 10
+        while n8n.count < len(job_ids) and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        upload_stats["youtube_uploads"] = youtube.count
+        upload_stats["n8n_notifications"] = n8n.count
+        results["upload"] = upload_stats
+
+        results["worker_peak_rss_mb"] = [peak_rss_mb(pid) for pid in child_pids(proc.pid)]
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        log.close()
+        youtube.shutdown()
+        n8n.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# --- Hasil & perbandingan --------------------------------------------------
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def flatten(node, prefix=""):
+    if isinstance(node, dict):
+        values = {}
+        for key, value in node.items():
+            values.update(flatten(value, f"{prefix}{key}."))
+        return values
+    if isinstance(node, (int, float)) and not isinstance(node, bool):
+        return {prefix[:-1]: node}
+    return {}
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """Bandingkan metrik latency (_ms, _seconds), throughput (_per_sec) dan memori (_mb) dua hasil"""
+    old_values, new_values = flatten(old["results"]), flatten(new["results"])
+    print(f"\nComparing {old['meta']['commit']} -> {new['meta']['commit']}")
+    regressions = 0
+    for key in sorted(set(old_values) & set(new_values)):
+        if not any(marker in key for marker in ("_ms", "seconds", "_per_sec", "_mb")) or not old_values[key]:
+            continue
+        change = (new_values[key] - old_values[key]) / old_values[key]
+        # Throughput: makin besar makin baik; latency/memori: makin kecil makin baik
+        worse = -change if "_per_sec" in key else change
+        noise = abs(new_values[key] - old_values[key]) < NOISE_FLOOR
+        flag = "REGRESSION" if worse > threshold and not noise else ""
+        regressions += bool(flag)
+        print(f"{key:<60}{old_values[key]:>12.2f}{new_values[key]:>12.2f}{change * 100:>+9.1f}%  {flag}")
+    print(f"\n{regressions} metric(s) regressed by more than {threshold * 100:.0f}%")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the inference serving path")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--skip-model", action="store_true", help="Lewati benchmark in-process")
+    parser.add_argument("--skip-http", action="store_true", help="Lewati load test HTTP")
+    parser.add_argument("--requests", type=int, default=500, help="Jumlah request /predict")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--bulk-rows", type=int, default=5000)
+    parser.add_argument("--uploads", type=int, default=20)
+    parser.add_argument("--video-kb", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", help="Default: benchmarks/results/inference-<commit>.json")
+    parser.add_argument("--compare", help="Hasil JSON sebelumnya untuk dibandingkan")
+    args = parser.parse_args()
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "model_backend": os.getenv("MODEL_BACKEND", "auto"),
+        },
+        "results": {},
+    }
+    if not args.skip_model:
+        report["results"]["cold_start"] = measure_cold_start(args.cold_runs)
+        print(f"Cold start: {report['results']['cold_start']}")
+        report["results"]["model"] = benchmark_model(args.batch_sizes, args.repeats)
+    if not args.skip_http:
+        report["results"]["http"] = benchmark_http(args)
+        print(json.dumps(report["results"]["http"], indent=2))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"inference-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
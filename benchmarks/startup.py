@@ -0,0 +1,96 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+import urllib.error
+
+# Mengukur waktu startup gunicorn sampai /ready dan memori (RSS/PSS) per worker,
+# dengan dan tanpa preload. Jalankan dari root repo: python benchmarks/startup.py
+
+
+def read_memory_kb(pid):
+    usage = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("Rss", "Pss"):
+                usage[key.lower()] = int(value.split()[0])
+    return usage
+
+
+def child_pids(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_ready(url, workers, timeout):
+    # Setiap worker punya status readiness sendiri, tunggu sampai semuanya menjawab 200
+    started = time.perf_counter()
+    ready_pids = set()
+    while time.perf_counter() - started < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as res:
+                if res.status == 200:
+                    ready_pids.add(json.loads(res.read())["pid"])
+                    if len(ready_pids) >= workers:
+                        return time.perf_counter() - started
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    raise TimeoutError(f"Server not ready after {timeout}s")
+
+
+def measure(preload, workers, port, load_mode, timeout):
+    env = dict(os.environ)
+    env.update({
+        "GUNICORN_PRELOAD": "1" if preload else "0",
+        "GUNICORN_WORKERS": str(workers),
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "MODEL_LOAD_MODE": load_mode,
+        "PYTHONPATH": os.getcwd(),
+    })
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "backend/gunicorn.conf.py", "backend.app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_ready(f"http://127.0.0.1:{port}/ready", workers, timeout)
+        ready_seconds = time.perf_counter() - started
+        worker_memory = [read_memory_kb(pid) for pid in child_pids(proc.pid)]
+        master_memory = read_memory_kb(proc.pid)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    return {
+        "preload": preload,
+        "workers": workers,
+        "load_mode": load_mode,
+        "ready_seconds": round(ready_seconds, 3),
+        "master_rss_mb": round(master_memory["rss"] / 1024, 1),
+        "worker_rss_mb": [round(m["rss"] / 1024, 1) for m in worker_memory],
+        "worker_pss_mb": [round(m["pss"] / 1024, 1) for m in worker_memory],
+        "total_pss_mb": round((master_memory["pss"] + sum(m["pss"] for m in worker_memory)) / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure backend startup time and memory")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", help="Simpan hasil ke file JSON")
+    args = parser.parse_args()
+
+    results = [
+        measure(preload=True, workers=args.workers, port=args.port, load_mode="eager", timeout=args.timeout),
+        measure(preload=False, workers=args.workers, port=args.port, load_mode="eager", timeout=args.timeout),
+    ]
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,21 @@
+import os
+
+from backend.app import app
+from backend import routes
+
+# App backend untuk load test benchmarks/inference.py:
+#   gunicorn -c backend/gunicorn.conf.py benchmarks.stub_app:app
+# Token BENCH_TOKEN langsung punya credentials palsu, jadi /upload bisa di-test tanpa login OAuth.
+# Upload YouTube diarahkan ke fake server lewat YOUTUBE_API_ROOT, webhook ke fake n8n lewat N8N_WEBHOOK_URL.
+
+BENCH_TOKEN = os.getenv("BENCH_TOKEN", "bench-token")
+
+routes.credential_manager.store.put(BENCH_TOKEN, {
+    "token": "bench-access-token",
+    "refresh_token": None,
+    "token_uri": "https://oauth2.googleapis.com/token",
+    "client_id": "bench-client",
+    "client_secret": "bench-secret",
+    "scopes": ["https://www.googleapis.com/auth/youtube.upload"],
+    "expiry": None,
+})
@@ -1,46 +1,35 @@
-import pandas as pd
 import numpy as np
-import os
-import pickle
-import tensorflow as tf
 from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
+from ml_training.dataset_cache import load_dataset, check_trained_dataset
 
 # Configuration
 DATA_DIR = "data"
 MODEL_DIR = "backend/utils/models"
 MAX_LEN = 100
 
+def load_test_set(name, model_name, label_column):
+    """X_test/y_test dari cache dataset (split yang sama dengan training, tanpa tokenize ulang)"""
+    dataset = load_dataset(name)
+    # Token id di cache hanya cocok untuk model yang di-train dari cache yang sama
+    check_trained_dataset(model_name, dataset)
+    test_idx = dataset["test_idx"]
+    X_test = np.asarray(dataset["X"][test_idx])
+    y_test = np.asarray(dataset["labels"][label_column][test_idx])
+    return X_test, y_test, dataset["label_encoders"][label_column]
+
 def evaluate_sentiment():
     print("\n" + "="*50)
     print("ANALISIS MODEL SENTIMEN")
     print("="*50)
     
     try:
-        # Load Data
-        df = pd.read_csv(f"{DATA_DIR}/final_sentiment_data.csv")
-        df['text'] = df['text'].astype(str)
-        
-        # Load Tokenizer & Encoder
-        with open(f"{MODEL_DIR}/sentiment_tokenizer.pickle", 'rb') as handle:
-            tokenizer = pickle.load(handle)
-        with open(f"{MODEL_DIR}/sentiment_label_encoder.pickle", 'rb') as handle:
-            label_encoder = pickle.load(handle)
+        # Load Data (token id, label & split dari cache dataset)
+        X_test, y_test, label_encoder = load_test_set("sentiment", "sentiment_dl_model", "label")
             
         # Load Model
         model = load_model(f"{MODEL_DIR}/sentiment_dl_model.h5")
         
-        # Prepare Data
-        sequences = tokenizer.texts_to_sequences(df['text'])
-        X = pad_sequences(sequences, maxlen=MAX_LEN, padding='post', truncating='post')
-        y_true = label_encoder.transform(df['label'])
-        
-        # Split (Same seed as training to evaluate on "Test" set)
-        _, X_test, _, y_test = train_test_split(X, y_true, test_size=0.2, random_state=42)
-        
         # Predict
         y_pred_probs = model.predict(X_test, verbose=0)
         y_pred = np.argmax(y_pred_probs, axis=1)
@@ -64,27 +53,12 @@ def evaluate_category():
     print("="*50)
     
     try:
-        # Load Data
-        df = pd.read_csv(f"{DATA_DIR}/final_category_data.csv")
-        df['text'] = df['text'].astype(str)
-        
-        # Load Tokenizer & Encoder
-        with open(f"{MODEL_DIR}/category_tokenizer.pickle", 'rb') as handle:
-            tokenizer = pickle.load(handle)
-        with open(f"{MODEL_DIR}/category_label_encoder.pickle", 'rb') as handle:
-            label_encoder = pickle.load(handle)
+        # Load Data (token id, label & split dari cache dataset)
+        X_test, y_test, label_encoder = load_test_set("category", "category_dl_model", "category")
             
         # Load Model
         model = load_model(f"{MODEL_DIR}/category_dl_model.h5")
         
-        # Prepare Data
-        sequences = tokenizer.texts_to_sequences(df['text'])
-        X = pad_sequences(sequences, maxlen=MAX_LEN, padding='post', truncating='post')
-        y_true = label_encoder.transform(df['category'])
-        
-        # Split
-        _, X_test, _, y_test = train_test_split(X, y_true, test_size=0.2, random_state=42)
-        
         # Predict
         y_pred_probs = model.predict(X_test, verbose=0)
         y_pred = np.argmax(y_pred_probs, axis=1)
@@ -1,6 +1,12 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
 
+// Polling status job upload YouTube (/jobs/<id>)
+const JOB_POLL_INTERVAL_MS = 2000;
+// 2x JOB_STALE_AFTER backend (900 detik, job yang macet selama itu di-requeue worker lain)
+const JOB_MAX_WAIT_MS = 30 * 60 * 1000;
+const JOB_MAX_POLL_ERRORS = 5;
+
 function App() {
   const [video, setVideo] = useState(null);
   const [title, setTitle] = useState("");
@@ -40,6 +46,32 @@ function App() {
     return re.test(email);
   };
 
+  const waitForJob = async (jobId) => {
+    const deadline = Date.now() + JOB_MAX_WAIT_MS;
+    let errors = 0;
+    while (Date.now() < deadline) {
+      try {
+        const res = await axios.get(`/jobs/${jobId}`);
+        errors = 0;
+        if (res.data.status === "done" || res.data.status === "failed") {
+          return res.data;
+        }
+      } catch (error) {
+        // Job hilang (404, misalnya database job direset) tidak akan pernah selesai
+        if (error.response?.status === 404) {
+          throw new Error("Upload job not found, please check your YouTube channel later.");
+        }
+        // Gangguan jaringan / backend restart sesaat: coba lagi beberapa kali
+        errors += 1;
+        if (errors >= JOB_MAX_POLL_ERRORS) {
+          throw new Error("Lost connection while waiting for the YouTube upload.");
+        }
+      }
+      await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    }
+    throw new Error("YouTube upload is taking too long, please check your YouTube channel later.");
+  };
+
   const handleUpload = async () => {
     if (!token) {
       alert("Please connect your YouTube account first!");
@@ -64,12 +96,13 @@ function App() {
     setYoutubeLink("");
 
     try {
+      // Field teks dikirim sebelum video agar backend bisa validasi token sebelum menerima file
       const formData = new FormData();
-      formData.append("video", video);
       formData.append("title", title);
       formData.append("description", description);
       formData.append("email", email);
       formData.append("token", token);
+      formData.append("video", video);
 
       const res = await axios.post("/upload", formData, {
         headers: { "Content-Type": "multipart/form-data" },
@@ -79,11 +112,18 @@ function App() {
       setConfidence(res.data.confidence);
       setKeywords(res.data.keywords || []);
       setCategory(res.data.category);
-      setYoutubeLink(res.data.youtube_link);
-      alert("Video uploaded successfully!");
+
+      // Upload ke YouTube berjalan di background, cek status job sampai selesai
+      const job = await waitForJob(res.data.job_id);
+      setYoutubeLink(job.youtube_link);
+      if (job.status === "failed") {
+        alert(job.warning || "YouTube upload failed, but analysis was completed.");
+      } else {
+        alert("Video uploaded successfully!");
+      }
     } catch (error) {
       console.error(error);
-      alert(error.response?.data?.error || "Something went wrong!");
+      alert(error.response?.data?.error || error.message || "Something went wrong!");
     } finally {
       setLoading(false);
     }
@@ -18,6 +18,8 @@ export default defineConfig({
     proxy: {
       '/upload': 'http://localhost:30081',
       '/auth': 'http://localhost:30081',
+      '/jobs': 'http://localhost:30081',
+      '/predict': 'http://localhost:30081',
     },
   },
 })
@@ -0,0 +1,45 @@
+import os
+import sys
+import argparse
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.utils.keywords import compute_idf, save_idf
+
+# Tabel IDF untuk backend/utils/keywords.py, dihitung dari korpus training sentiment.
+# Dipanggil otomatis oleh train_dl_models.py, atau manual:
+#   python ml_training/build_keyword_idf.py
+
+# Configuration
+DATA_DIR = "data"
+MODEL_DIR = "backend/utils/models"
+CORPUS_PATH = f"{DATA_DIR}/final_sentiment_data.csv"
+IDF_PATH = f"{MODEL_DIR}/keyword_idf.npz"
+CHUNK_SIZE = 100000
+
+
+def corpus_texts(paths, chunk_size=CHUNK_SIZE):
+    # Dibaca per chunk, shard training streaming bisa lebih besar dari RAM
+    for path in paths:
+        for chunk in pd.read_csv(path, usecols=["text"], chunksize=chunk_size, dtype=str, keep_default_na=False):
+            yield from chunk["text"]
+
+
+def build_keyword_idf(corpus_path=CORPUS_PATH, output_path=IDF_PATH, min_df=1):
+    """corpus_path: satu file CSV atau list shard (training streaming)"""
+    paths = [corpus_path] if isinstance(corpus_path, str) else list(corpus_path)
+    terms, idf, num_docs = compute_idf(corpus_texts(paths), min_df=min_df)
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    save_idf(output_path, terms, idf, num_docs)
+    print(f"Saved keyword IDF ({len(terms)} terms, {num_docs} documents) to {output_path} "
+          f"({os.path.getsize(output_path) / 1e3:.1f} KB)")
+    return output_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the keyword IDF table from the training corpus")
+    parser.add_argument("--corpus", nargs="+", default=[CORPUS_PATH], help="File CSV atau shard (kolom text)")
+    parser.add_argument("--output", default=IDF_PATH)
+    parser.add_argument("--min-df", type=int, default=1, help="Kata dengan document frequency < min-df dibuang")
+    args = parser.parse_args()
+    build_keyword_idf(args.corpus, args.output, args.min_df)
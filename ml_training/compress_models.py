@@ -0,0 +1,251 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.utils.numpy_runtime import QUANTIZED_BUNDLE_FORMAT, load_bundle
+from ml_training.dataset_cache import load_dataset, check_trained_dataset
+
+# Kompresi bundle NumPy hasil export_numpy.py: bobot int8 (symmetric, scale per output channel) dan
+# opsional magnitude pruning. Setiap varian dievaluasi pada test split yang sama dengan evaluate_models.py
+# dan hanya dipromosikan menjadi serving_bundle.npz jika penurunan akurasinya masih dalam budget.
+#
+#   python ml_training/export_numpy.py
+#   python ml_training/compress_models.py --prune 0.3 0.5
+
+# Configuration
+MODEL_DIR = "backend/utils/models"
+BUNDLE_PATH = f"{MODEL_DIR}/serving_bundle.npz"
+# Salinan bundle float32, basis kompresi berikutnya setelah sebuah varian dipromosikan
+FLOAT32_BUNDLE_PATH = f"{MODEL_DIR}/serving_bundle.float32.npz"
+VARIANT_DIR = f"{MODEL_DIR}/variants"
+REPORT_PATH = f"{MODEL_DIR}/compression_report.json"
+# Penurunan akurasi maksimum per task dibanding float32 (absolut, 0.01 = 1 poin persen)
+MAX_ACCURACY_DROP = float(os.getenv("COMPRESS_MAX_ACCURACY_DROP", "0.01"))
+EVAL_BATCH_SIZE = 1024
+LATENCY_BATCH_SIZE = 32
+LATENCY_RUNS = 20
+LOAD_RUNS = 5
+
+# kind bundle -> (task, model di bundle, index output, dataset cache, kolom label)
+EVAL_TASKS = {
+    "separate": [
+        ("sentiment", "sentiment", 0, "sentiment", "label"),
+        ("category", "category", 0, "category", "category"),
+    ],
+    "multitask": [
+        ("sentiment", "multitask", 0, "multitask", "label"),
+        ("category", "multitask", 1, "multitask", "category"),
+    ],
+}
+
+
+def read_bundle(path):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {key: data[key] for key in data.files}
+    return json.loads(str(arrays["__manifest__"])), arrays
+
+
+def read_manifest(path):
+    with np.load(path, allow_pickle=False) as data:
+        return json.loads(str(data["__manifest__"]))
+
+
+def base_bundle_path():
+    """Bundle float32: serving_bundle.npz jika belum dikompresi, selain itu salinan float32-nya"""
+    if os.path.exists(BUNDLE_PATH) and "compression" not in read_manifest(BUNDLE_PATH):
+        return BUNDLE_PATH
+    if os.path.exists(FLOAT32_BUNDLE_PATH):
+        return FLOAT32_BUNDLE_PATH
+    raise SystemExit("No float32 bundle found, run ml_training/export_numpy.py first")
+
+
+def weight_keys(manifest):
+    """(key array bobot, tipe layer) untuk semua layer di bundle"""
+    for name, spec in manifest["models"].items():
+        for layer in spec["trunk"] + [layer for head in spec["heads"] for layer in head]:
+            for i in range(layer["num_weights"]):
+                yield f"{name}/{layer['name']}/{i}", layer["type"]
+
+
+def prune(w, sparsity):
+    """Magnitude pruning: bobot dengan |w| terkecil (sebanyak sparsity) dijadikan 0"""
+    k = int(w.size * sparsity)
+    if k == 0:
+        return w
+    threshold = np.partition(np.abs(w).ravel(), k - 1)[k - 1]
+    return np.where(np.abs(w) <= threshold, 0.0, w).astype(np.float32)
+
+
+def quantize(w, channel_axis):
+    """int8 symmetric per channel: w ~= q * scale dengan scale = max|w| / 127 per channel"""
+    channel_axis %= w.ndim
+    axes = tuple(a for a in range(w.ndim) if a != channel_axis)
+    max_abs = np.max(np.abs(w), axis=axes, keepdims=True)
+    scale = np.where(max_abs > 0, max_abs / 127.0, 1.0).astype(np.float32)
+    q = np.clip(np.round(w / scale), -127, 127).astype(np.int8)
+    return q, scale
+
+
+def compress_bundle(manifest, arrays, sparsity=0.0):
+    compressed = dict(arrays)
+    for key, layer_type in weight_keys(manifest):
+        w = arrays[key]
+        if w.ndim < 2:
+            # Bias kecil, tetap float32
+            continue
+        if sparsity:
+            w = prune(w, sparsity)
+        # Embedding: scale per baris (kata), kernel lain: per output channel (axis terakhir)
+        compressed[key], compressed[f"{key}/scale"] = quantize(w, 0 if layer_type == "Embedding" else -1)
+
+    manifest = dict(manifest, format=QUANTIZED_BUNDLE_FORMAT,
+                    compression={"dtype": "int8", "scheme": "symmetric-per-channel", "sparsity": sparsity})
+    compressed["__manifest__"] = np.array(json.dumps(manifest))
+    return compressed
+
+
+def load_test_sets(kind):
+    """Test split dari cache dataset (sama dengan evaluate_models.py), per task"""
+    tasks = []
+    for task, model_name, output, dataset_name, column in EVAL_TASKS[kind]:
+        dataset = load_dataset(dataset_name)
+        # Akurasi dari token id tokenizer lain tidak berarti apa-apa, lebih baik berhenti
+        try:
+            check_trained_dataset(f"{model_name}_dl_model", dataset)
+        except ValueError as e:
+            raise SystemExit(f"Cannot evaluate compressed variants: {e}")
+        test_idx = np.asarray(dataset["test_idx"])
+        # Multitask: baris tanpa label untuk head ini (bobot 0) tidak ikut dihitung
+        test_idx = test_idx[np.asarray(dataset["weights"][column])[test_idx] > 0]
+        tasks.append({
+            "task": task,
+            "model": model_name,
+            "output": output,
+            "X": np.asarray(dataset["X"][test_idx]),
+            "y": np.asarray(dataset["labels"][column][test_idx]),
+        })
+    return tasks
+
+
+def accuracy(models, task):
+    correct = 0
+    for start in range(0, len(task["X"]), EVAL_BATCH_SIZE):
+        probs = models[task["model"]].predict(task["X"][start:start + EVAL_BATCH_SIZE])
+        if isinstance(probs, list):
+            probs = probs[task["output"]]
+        correct += int(np.sum(np.argmax(probs, axis=1) == task["y"][start:start + EVAL_BATCH_SIZE]))
+    return correct / max(len(task["X"]), 1)
+
+
+def evaluate_variant(name, path, tasks):
+    """Ukuran file, waktu load, latency per batch (semua model, seperti forward() di serving) & akurasi"""
+    load_times = []
+    for _ in range(LOAD_RUNS):
+        started = time.perf_counter()
+        _, models, _, _ = load_bundle(path)
+        load_times.append(time.perf_counter() - started)
+
+    X = tasks[0]["X"][:LATENCY_BATCH_SIZE]
+    for model in models.values():
+        model.predict(X)
+    latencies = []
+    for _ in range(LATENCY_RUNS):
+        started = time.perf_counter()
+        for model in models.values():
+            model.predict(X)
+        latencies.append(time.perf_counter() - started)
+
+    return {
+        "variant": name,
+        "path": path,
+        "size_mb": round(os.path.getsize(path) / 1e6, 2),
+        "load_ms": round(float(np.median(load_times)) * 1000, 1),
+        "latency_ms": {
+            "batch_size": len(X),
+            "p50": round(float(np.percentile(latencies, 50)) * 1000, 2),
+            "p95": round(float(np.percentile(latencies, 95)) * 1000, 2),
+        },
+        "accuracy": {task["task"]: round(accuracy(models, task), 4) for task in tasks},
+    }
+
+
+def print_report(results):
+    tasks = list(results[0]["accuracy"])
+    header = f"{'variant':<16}{'size MB':>9}{'load ms':>9}{'p50 ms':>9}{'p95 ms':>9}"
+    header += "".join(f"{task:>12}" for task in tasks) + "  status"
+    print("\n" + header)
+    print("-" * len(header))
+    for r in results:
+        line = (f"{r['variant']:<16}{r['size_mb']:>9.2f}{r['load_ms']:>9.1f}"
+                f"{r['latency_ms']['p50']:>9.2f}{r['latency_ms']['p95']:>9.2f}")
+        line += "".join(f"{r['accuracy'][task] * 100:>11.2f}%" for task in tasks)
+        print(line + f"  {r.get('status', 'baseline')}")
+
+
+def promote(path):
+    # Bundle float32 disimpan dulu sebagai basis kompresi berikutnya (dan untuk rollback manual)
+    if os.path.exists(BUNDLE_PATH) and "compression" not in read_manifest(BUNDLE_PATH):
+        shutil.copyfile(BUNDLE_PATH, FLOAT32_BUNDLE_PATH)
+    tmp_path = BUNDLE_PATH + ".tmp.npz"
+    shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, BUNDLE_PATH)
+
+
+def compress(sparsities=(), max_drop=MAX_ACCURACY_DROP, promote_best=True):
+    base_path = base_bundle_path()
+    manifest, arrays = read_bundle(base_path)
+    print(f"Base bundle: {base_path} ({manifest['kind']})")
+    tasks = load_test_sets(manifest["kind"])
+
+    baseline = evaluate_variant("float32", base_path, tasks)
+    results = [baseline]
+
+    os.makedirs(VARIANT_DIR, exist_ok=True)
+    for sparsity in [0.0] + [s for s in sparsities if s > 0]:
+        name = "int8" if not sparsity else f"int8-prune{int(round(sparsity * 100))}"
+        path = os.path.join(VARIANT_DIR, f"serving_bundle.{name}.npz")
+        # Compressed: bobot hasil pruning (banyak nol) jauh lebih kecil di disk
+        np.savez_compressed(path, **compress_bundle(manifest, arrays, sparsity))
+
+        result = evaluate_variant(name, path, tasks)
+        result["sparsity"] = sparsity
+        result["drop"] = {
+            task: round(baseline["accuracy"][task] - acc, 4) for task, acc in result["accuracy"].items()
+        }
+        result["status"] = "ok" if all(d <= max_drop for d in result["drop"].values()) else "rejected"
+        results.append(result)
+
+    # Varian terkecil yang lolos guardrail yang dipromosikan
+    passed = [r for r in results[1:] if r["status"] == "ok"]
+    promoted = min(passed, key=lambda r: r["size_mb"]) if passed else None
+    if promoted and promote_best:
+        promote(promoted["path"])
+        promoted["status"] = "promoted"
+
+    print_report(results)
+    print(f"\nMax accuracy drop: {max_drop * 100:.2f} points")
+    if promoted and promote_best:
+        print(f"Promoted {promoted['variant']} to {BUNDLE_PATH}")
+    elif not promoted:
+        print(f"No variant within budget, {BUNDLE_PATH} unchanged")
+
+    with open(REPORT_PATH, 'w') as f:
+        json.dump({"base": base_path, "max_accuracy_drop": max_drop, "variants": results}, f, indent=2)
+    print(f"Report saved to {REPORT_PATH}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quantize (int8) and prune the NumPy serving bundle")
+    parser.add_argument("--prune", type=float, nargs="*", default=[],
+                        help="Sparsity varian int8 + pruning, mis. --prune 0.3 0.5")
+    parser.add_argument("--max-drop", type=float, default=MAX_ACCURACY_DROP,
+                        help="Penurunan akurasi maksimum per task (0.01 = 1 poin persen)")
+    parser.add_argument("--no-promote", action="store_true", help="Hanya buat varian & laporan")
+    args = parser.parse_args()
+    compress(args.prune, args.max_drop, promote_best=not args.no_promote)
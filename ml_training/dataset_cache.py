@@ -0,0 +1,226 @@
+import os
+import json
+import pickle
+import shutil
+import hashlib
+import argparse
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+# Dataset hasil preprocessing (token id yang sudah di-pad, label, index split) disimpan sebagai .npy
+# di DATASET_CACHE_DIR. Key cache = hash isi file CSV + konfigurasi tokenizer/split, jadi training
+# dan evaluasi berikutnya cukup np.load(mmap_mode='r') tanpa tokenize ulang.
+#
+#   python ml_training/dataset_cache.py --dataset all   (build cache di depan, opsional)
+
+# Configuration
+DATA_DIR = "data"
+MODEL_DIR = "backend/utils/models"
+DATASET_CACHE_DIR = os.getenv("DATASET_CACHE_DIR", "data/cache")
+MAX_WORDS = 10000
+MAX_LEN = 100
+OOV_TOKEN = "<OOV>"
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+CACHE_FORMAT = 1
+
+# name -> file CSV dan kolom label. Dataset dengan lebih dari satu file digabung (outer join) berdasarkan
+# teks; baris tanpa label untuk salah satu head mendapat bobot 0.
+DATASETS = {
+    "sentiment": {"files": ["final_sentiment_data.csv"], "labels": ["label"]},
+    "category": {"files": ["final_category_data.csv"], "labels": ["category"]},
+    "multitask": {"files": ["final_sentiment_data.csv", "final_category_data.csv"], "labels": ["label", "category"]},
+}
+
+# File yang mencatat key dataset dari model yang terakhir di-train
+TRAINING_DATASETS_PATH = f"{MODEL_DIR}/training_datasets.json"
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tokenizer_config():
+    return {
+        "max_words": MAX_WORDS,
+        "max_len": MAX_LEN,
+        "oov_token": OOV_TOKEN,
+        "padding": "post",
+        "truncating": "post",
+        "test_size": TEST_SIZE,
+        "random_state": RANDOM_STATE,
+    }
+
+
+def dataset_key(name, data_dir=DATA_DIR):
+    """Key cache: berubah jika isi CSV, konfigurasi tokenizer/split atau format cache berubah"""
+    spec = DATASETS[name]
+    payload = {
+        "format": CACHE_FORMAT,
+        "name": name,
+        "files": {f: file_hash(os.path.join(data_dir, f)) for f in spec["files"]},
+        "labels": spec["labels"],
+        "config": tokenizer_config(),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def read_frame(name, data_dir=DATA_DIR):
+    spec = DATASETS[name]
+    frames = []
+    for filename in spec["files"]:
+        df = pd.read_csv(os.path.join(data_dir, filename))
+        df['text'] = df['text'].astype(str)
+        frames.append(df)
+
+    df = frames[0]
+    for other in frames[1:]:
+        # Sama dengan train_multitask_model sebelumnya: gabung berdasarkan teks
+        df = df.merge(other.drop_duplicates('text'), on='text', how='outer')
+    return df
+
+
+def build_dataset(name, cache_dir=DATASET_CACHE_DIR, data_dir=DATA_DIR):
+    """Tokenize CSV sekali lalu simpan hasilnya ke cache_dir/<name>-<key>/"""
+    from tensorflow.keras.preprocessing.text import Tokenizer
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    key = dataset_key(name, data_dir)
+    spec = DATASETS[name]
+    print(f"Building dataset cache '{name}' ({key})...")
+    df = read_frame(name, data_dir)
+
+    # Tokenizer
+    tokenizer = Tokenizer(num_words=MAX_WORDS, oov_token=OOV_TOKEN)
+    tokenizer.fit_on_texts(df['text'])
+    sequences = tokenizer.texts_to_sequences(df['text'])
+    padded = pad_sequences(sequences, maxlen=MAX_LEN, padding='post', truncating='post').astype(np.int32)
+
+    # Encode Labels (baris tanpa label diisi kelas 0, bobotnya 0)
+    arrays = {"X": padded}
+    encoders = {}
+    for column in spec["labels"]:
+        has_label = df[column].notna().to_numpy()
+        encoder = LabelEncoder()
+        encoder.fit(df.loc[has_label, column])
+        y = np.zeros(len(df), dtype=np.int32)
+        y[has_label] = encoder.transform(df.loc[has_label, column])
+        arrays[f"y_{column}"] = y
+        arrays[f"w_{column}"] = has_label.astype(np.float32)
+        encoders[column] = encoder
+
+    # Split (index saja, sama dengan train_test_split(..., random_state=42) pada array aslinya)
+    train_idx, test_idx = train_test_split(
+        np.arange(len(df)), test_size=TEST_SIZE, random_state=RANDOM_STATE
+    )
+    arrays["train_idx"] = train_idx.astype(np.int64)
+    arrays["test_idx"] = test_idx.astype(np.int64)
+
+    # Tulis ke direktori sementara lalu rename, cache yang setengah jadi tidak pernah terbaca
+    final_dir = os.path.join(cache_dir, f"{name}-{key}")
+    tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+    os.makedirs(tmp_dir, exist_ok=True)
+    for array_name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, f"{array_name}.npy"), array)
+    with open(os.path.join(tmp_dir, "tokenizer.pickle"), 'wb') as handle:
+        pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(tmp_dir, "label_encoders.pickle"), 'wb') as handle:
+        pickle.dump(encoders, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(os.path.join(tmp_dir, "meta.json"), 'w') as f:
+        json.dump({
+            "name": name,
+            "key": key,
+            "rows": len(df),
+            "files": spec["files"],
+            "labels": spec["labels"],
+            "config": tokenizer_config(),
+        }, f, indent=2)
+
+    if os.path.exists(final_dir):
+        shutil.rmtree(final_dir)
+    os.replace(tmp_dir, final_dir)
+    print(f"Dataset cache saved to {final_dir} ({len(df)} rows)")
+    return final_dir
+
+
+def load_dataset(name, rebuild=False, cache_dir=DATASET_CACHE_DIR, data_dir=DATA_DIR):
+    """Load dataset dari cache (memory-mapped), build dulu jika belum ada atau data berubah
+
+    Return dict: key, X, labels {kolom: y}, weights {kolom: w}, train_idx, test_idx,
+    tokenizer, label_encoders {kolom: LabelEncoder}.
+    """
+    key = dataset_key(name, data_dir)
+    path = os.path.join(cache_dir, f"{name}-{key}")
+    if rebuild or not os.path.exists(os.path.join(path, "meta.json")):
+        path = build_dataset(name, cache_dir, data_dir)
+    else:
+        print(f"Using dataset cache '{name}' ({key})")
+
+    def load(array_name):
+        return np.load(os.path.join(path, f"{array_name}.npy"), mmap_mode='r')
+
+    with open(os.path.join(path, "tokenizer.pickle"), 'rb') as handle:
+        tokenizer = pickle.load(handle)
+    with open(os.path.join(path, "label_encoders.pickle"), 'rb') as handle:
+        label_encoders = pickle.load(handle)
+
+    labels = DATASETS[name]["labels"]
+    return {
+        "name": name,
+        "key": key,
+        "path": path,
+        "X": load("X"),
+        "labels": {c: load(f"y_{c}") for c in labels},
+        "weights": {c: load(f"w_{c}") for c in labels},
+        "train_idx": load("train_idx"),
+        "test_idx": load("test_idx"),
+        "tokenizer": tokenizer,
+        "label_encoders": label_encoders,
+    }
+
+
+def record_training_dataset(model_name, dataset, path=TRAINING_DATASETS_PATH):
+    """Catat key dataset yang dipakai untuk train model_name (dibaca oleh evaluate_models.py)"""
+    records = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            records = json.load(f)
+    records[model_name] = {"dataset": dataset["name"], "key": dataset["key"]}
+    with open(path, 'w') as f:
+        json.dump(records, f, indent=2)
+
+
+def trained_dataset_key(model_name, path=TRAINING_DATASETS_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f).get(model_name, {}).get("key")
+
+
+def check_trained_dataset(model_name, dataset, path=TRAINING_DATASETS_PATH):
+    """ValueError jika model_name tidak di-train dari dataset cache ini: token id & label di cache
+    berasal dari tokenizer lain (data berubah, training streaming, atau model lama tanpa catatan)"""
+    trained_key = trained_dataset_key(model_name, path)
+    if trained_key is None:
+        raise ValueError(f"No training dataset recorded for {model_name} in {path}, retrain it with "
+                         f"train_dl_models.py before evaluating on dataset cache '{dataset['name']}'")
+    if trained_key != dataset["key"]:
+        raise ValueError(f"{model_name} was trained on dataset {trained_key}, not on dataset cache "
+                         f"'{dataset['name']}' ({dataset['key']}); its vocabulary differs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the pre-tokenized dataset cache")
+    parser.add_argument("--dataset", choices=list(DATASETS) + ["all"], default="all")
+    parser.add_argument("--rebuild", action="store_true", help="Build ulang walaupun cache sudah ada")
+    args = parser.parse_args()
+
+    names = list(DATASETS) if args.dataset == "all" else [args.dataset]
+    for dataset_name in names:
+        load_dataset(dataset_name, rebuild=args.rebuild)
@@ -0,0 +1,159 @@
+import os
+import sys
+import json
+import pickle
+import argparse
+import numpy as np
+import pandas as pd
+from tensorflow.keras.models import load_model
+from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.utils.numpy_runtime import BUNDLE_FORMAT, load_bundle
+from backend.utils.preprocessing import FrozenTokenizer, normalize
+from backend.utils.registry import trained_mode
+
+# Configuration
+DATA_DIR = "data"
+MODEL_DIR = "backend/utils/models"
+BUNDLE_PATH = f"{MODEL_DIR}/serving_bundle.npz"
+MAX_LEN = 100
+PARITY_SAMPLES = 256
+PARITY_TOLERANCE = 1e-4
+
+# Nama class Keras -> nama layer di numpy_runtime
+SUPPORTED_LAYERS = {"Embedding", "Conv1D", "MaxPooling1D", "LSTM", "Bidirectional", "Dropout", "Dense"}
+LAYER_CONFIG_KEYS = ["padding", "activation", "recurrent_activation", "pool_size", "go_backwards"]
+
+
+def layer_spec(layer):
+    kind = type(layer).__name__
+    if kind not in SUPPORTED_LAYERS:
+        raise ValueError(f"Layer {layer.name} ({kind}) is not supported by numpy_runtime")
+
+    raw = layer.get_config()
+    config = {k: raw[k] for k in LAYER_CONFIG_KEYS if k in raw}
+    if isinstance(config.get("pool_size"), (list, tuple)):
+        config["pool_size"] = config["pool_size"][0]
+    if kind == "Bidirectional":
+        inner = layer.forward_layer.get_config()
+        config["layer"] = {k: inner[k] for k in LAYER_CONFIG_KEYS if k in inner}
+        if raw.get("merge_mode", "concat") != "concat":
+            raise ValueError("Only merge_mode='concat' is supported")
+
+    return {"name": layer.name, "type": kind, "config": config, "num_weights": len(layer.get_weights())}
+
+
+def model_spec(model, head_names=None):
+    """Pisahkan layer menjadi trunk dan head (head_names: prefix nama layer per output)"""
+    layers = [layer for layer in model.layers if type(layer).__name__ != "InputLayer"]
+    if not head_names:
+        return {"trunk": [layer_spec(l) for l in layers], "heads": [[]]}, layers
+
+    heads = [[l for l in layers if l.name.startswith(prefix)] for prefix in head_names]
+    in_head = {l.name for head in heads for l in head}
+    trunk = [l for l in layers if l.name not in in_head]
+    spec = {
+        "trunk": [layer_spec(l) for l in trunk],
+        "heads": [[layer_spec(l) for l in head] for head in heads],
+    }
+    return spec, layers
+
+
+def export_bundle(mode):
+    multitask_path = f"{MODEL_DIR}/multitask_dl_model.h5"
+    if mode == "auto":
+        # Mode yang terakhir di-train (trained_mode.json), .h5 mode lain bisa sisa training lama
+        mode = trained_mode(MODEL_DIR) or "separate"
+
+    # Sama dengan SentimentModel.load_models
+    if mode == "multitask":
+        keras_models = {"multitask": load_model(multitask_path)}
+        heads = {"multitask": ["sentiment", "category"]}
+        prefix = "multitask_"
+        tokenizer_file = "multitask_tokenizer.pickle"
+    else:
+        keras_models = {
+            "sentiment": load_model(f"{MODEL_DIR}/sentiment_dl_model.h5"),
+            "category": load_model(f"{MODEL_DIR}/category_dl_model.h5"),
+        }
+        heads = {}
+        prefix = ""
+        # Serving memakai tokenizer sentiment untuk kedua model
+        tokenizer_file = "sentiment_tokenizer.pickle"
+
+    with open(f"{MODEL_DIR}/{tokenizer_file}", 'rb') as handle:
+        tokenizer = pickle.load(handle)
+    with open(f"{MODEL_DIR}/{prefix}sentiment_label_encoder.pickle", 'rb') as handle:
+        sentiment_encoder = pickle.load(handle)
+    with open(f"{MODEL_DIR}/{prefix}category_label_encoder.pickle", 'rb') as handle:
+        category_encoder = pickle.load(handle)
+
+    arrays = build_bundle(mode, keras_models, heads, tokenizer, sentiment_encoder, category_encoder)
+
+    tmp_path = BUNDLE_PATH + ".tmp.npz"
+    np.savez(tmp_path, **arrays)
+
+    # Parity check terhadap output Keras sebelum bundle dipakai
+    check_parity(tmp_path, keras_models, tokenizer)
+    os.replace(tmp_path, BUNDLE_PATH)
+    print(f"Saved NumPy bundle ({mode}) to {BUNDLE_PATH} ({os.path.getsize(BUNDLE_PATH) / 1e6:.2f} MB)")
+
+
+def build_bundle(kind, keras_models, heads, tokenizer, sentiment_encoder, category_encoder, max_len=MAX_LEN):
+    """Array bundle (bobot float32, vocabulary, label, manifest) untuk np.savez"""
+    arrays = {}
+    manifest = {"format": BUNDLE_FORMAT, "kind": kind, "max_len": max_len, "models": {}}
+
+    for name, model in keras_models.items():
+        spec, layers = model_spec(model, heads.get(name))
+        manifest["models"][name] = spec
+        for layer in layers:
+            for i, w in enumerate(layer.get_weights()):
+                arrays[f"{name}/{layer.name}/{i}"] = np.asarray(w, dtype=np.float32)
+
+    # Vocabulary: hanya kata yang benar-benar dipakai (index < num_words)
+    words, ids, tokenizer_config = FrozenTokenizer.from_keras_tokenizer(tokenizer, max_len).to_arrays()
+    arrays["vocab/words"] = words
+    arrays["vocab/ids"] = ids
+    manifest["tokenizer"] = tokenizer_config
+
+    arrays["labels/sentiment"] = np.asarray(sentiment_encoder.classes_).astype(str)
+    arrays["labels/category"] = np.asarray(category_encoder.classes_).astype(str)
+    arrays["__manifest__"] = np.array(json.dumps(manifest))
+    return arrays
+
+
+def check_parity(bundle_path, keras_models, tokenizer):
+    df = pd.read_csv(f"{DATA_DIR}/final_sentiment_data.csv")
+    texts = df['text'].astype(str).sample(min(PARITY_SAMPLES, len(df)), random_state=42).tolist()
+
+    _, numpy_models, frozen_tokenizer, _ = load_bundle(bundle_path)
+
+    # Tokenizer hasil export harus menghasilkan id yang sama persis (jalur serving: normalize + encode_batch)
+    expected_seq = tokenizer.texts_to_sequences([normalize(t) for t in texts])
+    X = pad_sequences(expected_seq, maxlen=MAX_LEN, padding='post', truncating='post')
+    if not np.array_equal(frozen_tokenizer.encode_batch(texts), X):
+        os.remove(bundle_path)
+        raise SystemExit("Parity check failed: tokenizer ids differ")
+
+    for name, model in keras_models.items():
+        expected = model.predict(X, verbose=0)
+        actual = numpy_models[name].predict(X)
+        if not isinstance(expected, list):
+            expected, actual = [expected], [actual]
+
+        for exp, act in zip(expected, actual):
+            max_diff = float(np.max(np.abs(exp - act)))
+            same_argmax = float(np.mean(np.argmax(exp, axis=1) == np.argmax(act, axis=1)))
+            print(f"Parity {name}: max abs diff = {max_diff:.2e}, argmax agreement = {same_argmax * 100:.2f}%")
+            if max_diff > PARITY_TOLERANCE:
+                os.remove(bundle_path)
+                raise SystemExit(f"Parity check failed for {name}: max abs diff {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export Keras models to a NumPy serving bundle")
+    parser.add_argument("--mode", choices=["auto", "separate", "multitask"], default="auto")
+    args = parser.parse_args()
+    export_bundle(args.mode)
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import pickle
+import argparse
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.utils.registry import ModelRegistry, RegistryError, MANIFEST_NAME
+
+# CLI registry model (backend/utils/registry.py). train_dl_models.py mem-publish version baru setelah
+# training; server memuat version yang ditunjuk CURRENT tanpa restart.
+#   python ml_training/model_registry.py list
+#   python ml_training/model_registry.py publish --promote      # artifact di MODEL_DIR saat ini
+#   python ml_training/model_registry.py promote <version>
+#   python ml_training/model_registry.py rollback [<version>]
+#   python ml_training/model_registry.py verify <version>
+
+# Configuration
+MODEL_DIR = "backend/utils/models"
+TOKENIZER_FILES = ["multitask_tokenizer.pickle", "sentiment_tokenizer.pickle"]
+
+
+def tokenizer_config(source_dir):
+    """Config tokenizer untuk manifest: dari bundle NumPy jika ada, selain itu dari pickle Keras"""
+    bundle_path = os.path.join(source_dir, "serving_bundle.npz")
+    if os.path.exists(bundle_path):
+        with np.load(bundle_path) as arrays:
+            manifest = json.loads(str(arrays["__manifest__"]))
+            config = dict(manifest["tokenizer"], max_len=manifest["max_len"], vocab_size=len(arrays["vocab/ids"]))
+        return dict(config, source="serving_bundle.npz")
+
+    for name in TOKENIZER_FILES:
+        path = os.path.join(source_dir, name)
+        if os.path.exists(path):
+            # Unpickle Keras Tokenizer butuh TensorFlow (selalu ada di environment training)
+            from backend.utils.preprocessing import FrozenTokenizer
+            with open(path, 'rb') as handle:
+                frozen = FrozenTokenizer.from_keras_tokenizer(pickle.load(handle))
+            words, _, config = frozen.to_arrays()
+            return dict(config, max_len=frozen.max_len, vocab_size=len(words), source=name)
+    return {}
+
+
+def publish_models(source_dir=MODEL_DIR, metrics=None, promote=False, registry=None):
+    registry = registry or ModelRegistry()
+    datasets_path = os.path.join(source_dir, "training_datasets.json")
+    extra = {}
+    if os.path.exists(datasets_path):
+        with open(datasets_path) as f:
+            extra["datasets"] = json.load(f)
+
+    version = registry.publish(source_dir, metrics=metrics, tokenizer=tokenizer_config(source_dir), extra=extra)
+    print(f"Published model version {version} to {registry.version_dir(version)}")
+    if promote:
+        previous = registry.promote(version)
+        print(f"Promoted {version} (previous: {previous})")
+    return version
+
+
+def print_versions(registry):
+    current = registry.current()
+    versions = registry.versions()
+    if not versions:
+        print(f"No versions in {registry.root}")
+    for version in versions:
+        manifest = registry.manifest(version)
+        size = sum(info["bytes"] for info in manifest["files"].values())
+        marker = "*" if version == current else " "
+        print(f"{marker} {version}  {manifest['backend']:<6} {size / 1e6:>7.2f} MB  "
+              f"metrics={json.dumps(manifest.get('metrics', {}), sort_keys=True)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage versioned model artifacts")
+    parser.add_argument("--registry", default=None, help="Default: MODEL_REGISTRY_DIR")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Daftar version (* = CURRENT)")
+    publish = commands.add_parser("publish", help="Simpan artifact di MODEL_DIR sebagai version baru")
+    publish.add_argument("--source", default=MODEL_DIR)
+    publish.add_argument("--metrics", help="File JSON metrik untuk manifest")
+    publish.add_argument("--promote", action="store_true", help="Langsung jadikan CURRENT")
+    promote = commands.add_parser("promote", help="Jadikan version sebagai CURRENT")
+    promote.add_argument("version")
+    rollback = commands.add_parser("rollback", help="Kembali ke version sebelumnya (atau version tertentu)")
+    rollback.add_argument("version", nargs="?")
+    verify = commands.add_parser("verify", help="Cek checksum file version terhadap manifest")
+    verify.add_argument("version")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry) if args.registry else ModelRegistry()
+    try:
+        if args.command == "list":
+            print_versions(registry)
+        elif args.command == "publish":
+            metrics = None
+            if args.metrics:
+                with open(args.metrics) as f:
+                    metrics = json.load(f)
+            publish_models(args.source, metrics, args.promote, registry)
+        elif args.command == "promote":
+            previous = registry.promote(args.version)
+            print(f"Promoted {args.version} (previous: {previous})")
+        elif args.command == "rollback":
+            print(f"Rolled back to {registry.rollback(args.version)}")
+        elif args.command == "verify":
+            registry.verify(args.version)
+            print(f"{args.version}: all checksums in {MANIFEST_NAME} match")
+    except RegistryError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -1,100 +1,233 @@
 import pandas as pd
 import os
+import json
+import time
+import hashlib
+import argparse
 import requests
-import re
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 
 # Configuration
 DATASET_DIR = "."
 OUTPUT_DIR = "data"
-INDONLU_URL = "https://raw.githubusercontent.com/indonlu/indonlu/master/dataset/smsa_doc-sentiment-prosa"
+INDONLU_URL = os.getenv(
+    "INDONLU_URL", "https://raw.githubusercontent.com/indonlu/indonlu/master/dataset/smsa_doc-sentiment-prosa"
+)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = (10, 60)
+# Hash input, ETag/Last-Modified download dan hash input per output disimpan di sini
+STATE_PATH = f"{OUTPUT_DIR}/.prepare_state.json"
+
+CLEAN_PATTERN = r'[^a-zA-Z0-9\s]'
+# Di bawah jumlah baris ini overhead process pool lebih besar dari manfaatnya
+CLEAN_PARALLEL_MIN_ROWS = 200000
 
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-def download_file(url, filename):
-    response = requests.get(url)
-    if response.status_code == 200:
-        with open(filename, 'wb') as f:
-            f.write(response.content)
-        print(f"Downloaded: {filename}")
-    else:
-        print(f"Failed to download {url}")
+def load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {"downloads": {}, "outputs": {}}
+
+def save_state(state):
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, STATE_PATH)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(DOWNLOAD_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def download_file(url, filename, state):
+    """Download streaming ke file; kirim If-None-Match/If-Modified-Since agar file yang tidak berubah
+    tidak di-download ulang (server menjawab 304)"""
+    cached = state["downloads"].get(url, {})
+    headers = {}
+    if os.path.exists(filename) and cached.get("sha256") == file_hash(filename):
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        with requests.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status_code == 304:
+                print(f"Not modified: {filename}")
+                return
+            if response.status_code != 200:
+                print(f"Failed to download {url} (HTTP {response.status_code})")
+                return
+
+            # Tulis per chunk ke .part lalu rename, file lama tetap utuh jika download putus
+            digest = hashlib.sha256()
+            part_path = filename + ".part"
+            with open(part_path, 'wb') as f:
+                for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+            os.replace(part_path, filename)
+
+            state["downloads"][url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "sha256": digest.hexdigest(),
+            }
+            print(f"Downloaded: {filename}")
+    except requests.RequestException as e:
+        print(f"Failed to download {url}: {e}")
+
+def _clean_chunk(texts):
+    # NaN menjadi 'nan', sama seperti str(text) di versi per baris sebelumnya
+    texts = texts.astype(object).where(texts.notna(), "nan").astype(str)
+    return texts.str.lower().str.replace(CLEAN_PATTERN, '', regex=True).str.strip()
 
-def clean_text(text):
-    text = str(text).lower()
-    text = re.sub(r'[^a-zA-Z0-9\s]', '', text)
-    return text.strip()
+def clean_series(texts):
+    """Lowercase lalu buang karakter selain huruf, angka dan whitespace untuk satu kolom sekaligus;
+    kolom besar dibagi per chunk ke process pool"""
+    workers = os.cpu_count() or 1
+    if len(texts) < CLEAN_PARALLEL_MIN_ROWS or workers == 1:
+        return _clean_chunk(texts)
+    size = -(-len(texts) // workers)
+    chunks = [texts.iloc[i:i + size] for i in range(0, len(texts), size)]
+    with ProcessPoolExecutor(workers) as pool:
+        return pd.concat(list(pool.map(_clean_chunk, chunks)))
 
-def prepare_sentiment_data():
+def load_internal_dataset():
+    """dataset.csv dibaca sekali dan dipakai untuk data sentiment maupun category"""
+    df = pd.read_csv(os.path.join(DATASET_DIR, "dataset.csv"))
+    # Combine title and description for text
+    df['text'] = clean_series(df['title'] + " " + df['description'])
+    return df
+
+def row_keys(df):
+    # Key per baris = hash isi + urutan kemunculan, jadi baris duplikat tetap dihitung per jumlahnya
+    # Sel kosong ditulis ke CSV sebagai "", jadi NaN disamakan dengan "" sebelum di-hash
+    hashes = pd.util.hash_pandas_object(df.fillna("").astype(str), index=False)
+    occurrence = hashes.groupby(hashes).cumcount()
+    return pd.Series(list(zip(hashes, occurrence)), index=df.index)
+
+def write_incremental(df_new, output_path, rebuild=False):
+    """Tambahkan hanya baris yang belum ada di output_path (append-only), atau tulis ulang jika rebuild"""
+    if rebuild or not os.path.exists(output_path):
+        df_new.to_csv(output_path, index=False)
+        print(f"Saved {len(df_new)} rows to {output_path}")
+        return
+
+    df_existing = pd.read_csv(output_path, dtype=str, keep_default_na=False)
+    if list(df_existing.columns) != list(df_new.columns):
+        print(f"Columns of {output_path} changed, rewriting")
+        df_new.to_csv(output_path, index=False)
+        return
+
+    existing = set(row_keys(df_existing))
+    is_new = ~row_keys(df_new).isin(existing)
+    appended = df_new[is_new]
+    if appended.empty:
+        print(f"No new rows for {output_path}")
+        return
+    appended.to_csv(output_path, mode='a', header=False, index=False)
+    print(f"Appended {len(appended)} new rows to {output_path} ({len(df_existing)} existing)")
+
+def inputs_unchanged(state, name, inputs, output_path):
+    """True jika semua file input sama persis (hash) dengan saat output terakhir dibuat"""
+    hashes = {path: file_hash(path) for path in inputs if os.path.exists(path)}
+    unchanged = os.path.exists(output_path) and state["outputs"].get(name) == hashes
+    return unchanged, hashes
+
+def prepare_sentiment_data(state, df_internal, rebuild=False):
     print("--- Preparing Sentiment Data ---")
-    
+
     # 1. Download IndoNLU SmSA (Sentinel Analysis)
     train_url = f"{INDONLU_URL}/train_preprocess.tsv"
     valid_url = f"{INDONLU_URL}/valid_preprocess.tsv"
-    
-    download_file(train_url, f"{OUTPUT_DIR}/indonlu_train.tsv")
-    download_file(valid_url, f"{OUTPUT_DIR}/indonlu_valid.tsv")
-    
+    train_path = f"{OUTPUT_DIR}/indonlu_train.tsv"
+    valid_path = f"{OUTPUT_DIR}/indonlu_valid.tsv"
+
+    download_file(train_url, train_path, state)
+    download_file(valid_url, valid_path, state)
+
+    output_path = f"{OUTPUT_DIR}/final_sentiment_data.csv"
+    inputs = [train_path, valid_path, os.path.join(DATASET_DIR, "dataset.csv")]
+    unchanged, hashes = inputs_unchanged(state, "sentiment", inputs, output_path)
+    if unchanged and not rebuild:
+        print(f"Inputs unchanged, skipping {output_path}")
+        return
+
     # 2. Load IndoNLU
     cols = ['text', 'label']
     try:
-        df_indonlu_train = pd.read_csv(f"{OUTPUT_DIR}/indonlu_train.tsv", sep='\t', names=cols)
-        df_indonlu_valid = pd.read_csv(f"{OUTPUT_DIR}/indonlu_valid.tsv", sep='\t', names=cols)
+        df_indonlu_train = pd.read_csv(train_path, sep='\t', names=cols)
+        df_indonlu_valid = pd.read_csv(valid_path, sep='\t', names=cols)
         df_indonlu = pd.concat([df_indonlu_train, df_indonlu_valid])
+        df_indonlu['text'] = clean_series(df_indonlu['text'])
         print(f"Loaded IndoNLU: {len(df_indonlu)} rows")
     except Exception as e:
         print(f"Error loading IndoNLU: {e}")
         df_indonlu = pd.DataFrame(columns=cols)
 
-    # 3. Load Internal Dataset
-    try:
-        df_internal = pd.read_csv(os.path.join(DATASET_DIR, "dataset.csv"))
-        # Combine title and description for text
-        df_internal['text'] = df_internal['title'] + " " + df_internal['description']
-        # Map labels if necessary (internal: 'positive', 'neutral', 'negative')
-        # IndoNLU: 'positive', 'neutral', 'negative' (usually matches, but let's ensure)
+    # 3. Internal Dataset
+    # Map labels if necessary (internal: 'positive', 'neutral', 'negative')
+    # IndoNLU: 'positive', 'neutral', 'negative' (usually matches, but let's ensure)
+    if df_internal is not None:
         df_internal = df_internal[['text', 'label']]
         print(f"Loaded Internal Data: {len(df_internal)} rows")
-    except Exception as e:
-        print(f"Error loading internal dataset: {e}")
+    else:
         df_internal = pd.DataFrame(columns=cols)
 
     # 4. Merge
     df_final = pd.concat([df_indonlu, df_internal], ignore_index=True)
-    df_final['text'] = df_final['text'].apply(clean_text)
-    
+
     # Check distribution
     print("Sentiment Distribution:")
     print(df_final['label'].value_counts())
-    
-    output_path = f"{OUTPUT_DIR}/final_sentiment_data.csv"
-    df_final.to_csv(output_path, index=False)
-    print(f"Saved merged sentiment data to {output_path}")
 
-def prepare_category_data():
+    write_incremental(df_final, output_path, rebuild)
+    state["outputs"]["sentiment"] = hashes
+
+def prepare_category_data(state, df_internal, rebuild=False):
     print("\n--- Preparing Category Data ---")
-    
+
     # Currently relying on Internal Data + Augmentation (since Kaggle requires API for News Title)
     # Ideally user manually downloads Kaggle dataset, but for now we use what we have
-    
+    output_path = f"{OUTPUT_DIR}/final_category_data.csv"
+    unchanged, hashes = inputs_unchanged(state, "category", [os.path.join(DATASET_DIR, "dataset.csv")], output_path)
+    if unchanged and not rebuild:
+        print(f"Inputs unchanged, skipping {output_path}")
+        return
+
+    if df_internal is None:
+        print("Error preparing category data: dataset.csv could not be loaded")
+        return
+
+    df_internal = df_internal[['text', 'category']]
+
+    print("Category Distribution:")
+    print(df_internal['category'].value_counts())
+
+    write_incremental(df_internal, output_path, rebuild)
+    state["outputs"]["category"] = hashes
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prepare sentiment & category training data")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Tulis ulang output dari awal (baris yang dihapus di sumber ikut hilang)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    state = load_state()
     try:
-        df_internal = pd.read_csv(os.path.join(DATASET_DIR, "dataset.csv"))
-        df_internal['text'] = df_internal['title'] + " " + df_internal['description']
-        df_internal = df_internal[['text', 'category']]
-        
-        # Clean
-        df_internal['text'] = df_internal['text'].apply(clean_text)
-        
-        print("Category Distribution:")
-        print(df_internal['category'].value_counts())
-        
-        output_path = f"{OUTPUT_DIR}/final_category_data.csv"
-        df_internal.to_csv(output_path, index=False)
-        print(f"Saved category data to {output_path}")
-        
+        df_internal = load_internal_dataset()
     except Exception as e:
-        print(f"Error preparing category data: {e}")
+        print(f"Error loading internal dataset: {e}")
+        df_internal = None
 
-if __name__ == "__main__":
-    prepare_sentiment_data()
-    prepare_category_data()
+    prepare_sentiment_data(state, df_internal, args.rebuild)
+    prepare_category_data(state, df_internal, args.rebuild)
+    save_state(state)
+    print(f"Data preparation finished in {time.perf_counter() - started:.2f}s")
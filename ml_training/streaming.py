@@ -0,0 +1,183 @@
+import os
+import json
+import glob
+import hashlib
+import time
+import numbers
+import logging
+import pandas as pd
+import tensorflow as tf
+from tensorflow.keras.preprocessing.text import Tokenizer
+from sklearn.preprocessing import LabelEncoder
+
+from ml_training.dataset_cache import MAX_WORDS, MAX_LEN, OOV_TOKEN, file_hash, tokenizer_config
+
+# Input pipeline tf.data untuk training pada data yang lebih besar dari RAM: file CSV (shard)
+# dibaca lazily dan di-interleave, di-shuffle dengan buffer terbatas, di-batch lalu di-tokenize
+# di dalam graph (paralel di semua core) dan di-prefetch agar overlap dengan training.
+
+# Configuration (bisa diubah lewat ENV)
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "32"))
+SHUFFLE_BUFFER = int(os.getenv("STREAM_SHUFFLE_BUFFER", "10000"))
+# Berapa shard yang dibaca bersamaan
+INTERLEAVE_CYCLE = int(os.getenv("STREAM_INTERLEAVE_CYCLE", "4"))
+# Persentase baris (berdasarkan hash teks) yang masuk validation, stabil antar epoch dan antar run
+VALIDATION_PERCENT = int(os.getenv("STREAM_VALIDATION_PERCENT", "20"))
+VOCAB_CHUNK_SIZE = 100000
+AUTOTUNE = tf.data.AUTOTUNE
+
+
+def resolve_shards(pattern):
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise FileNotFoundError(f"No shard matches {pattern}")
+    return files
+
+
+def shard_dataset(task, files, label_column):
+    """Identitas data training streaming untuk record_training_dataset (tidak pernah sama dengan key
+    cache dataset, jadi evaluate_models.py / compress_models.py tidak memakai vocabulary yang salah)"""
+    payload = {
+        "name": f"stream-{task}",
+        "files": {os.path.basename(path): file_hash(path) for path in files},
+        "labels": [label_column],
+        "config": dict(tokenizer_config(), validation_percent=VALIDATION_PERCENT),
+    }
+    key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    return {"name": payload["name"], "key": key}
+
+
+def shard_columns(files, text_column, label_column):
+    """Index kolom teks/label; semua shard harus punya header yang sama"""
+    header = list(pd.read_csv(files[0], nrows=0).columns)
+    for path in files[1:]:
+        if list(pd.read_csv(path, nrows=0).columns) != header:
+            raise ValueError(f"Shard {path} has a different header than {files[0]}")
+    return header.index(text_column), header.index(label_column)
+
+
+def fit_vocabulary(files, text_column, label_column, chunk_size=VOCAB_CHUNK_SIZE):
+    """Fit Tokenizer & LabelEncoder dengan membaca shard per chunk (memori hanya sebesar word count)
+
+    Tokenizer.fit_on_texts mengakumulasi word_counts antar panggilan, jadi hasilnya sama dengan
+    fit sekali pada seluruh data.
+    """
+    tokenizer = Tokenizer(num_words=MAX_WORDS, oov_token=OOV_TOKEN)
+    labels = set()
+    rows = 0
+    for path in files:
+        # Sel kosong dibaca sebagai "" (bukan NaN), sama seperti record_defaults di CsvDataset
+        for chunk in pd.read_csv(path, usecols=[text_column, label_column], chunksize=chunk_size,
+                                 dtype=str, keep_default_na=False):
+            tokenizer.fit_on_texts(chunk[text_column])
+            labels.update(label for label in chunk[label_column].unique() if label)
+            rows += len(chunk)
+
+    label_encoder = LabelEncoder()
+    label_encoder.fit(sorted(labels))
+    return tokenizer, label_encoder, rows
+
+
+def make_tokenize_fn(tokenizer, label_encoder, max_len=MAX_LEN):
+    """Versi graph dari texts_to_sequences + pad_sequences(padding='post', truncating='post')"""
+    words = [w for w, i in tokenizer.word_index.items() if not tokenizer.num_words or i < tokenizer.num_words]
+    ids = [tokenizer.word_index[w] for w in words]
+    oov_index = tokenizer.word_index.get(tokenizer.oov_token, -1) if tokenizer.oov_token else -1
+    vocab = tf.lookup.StaticHashTable(
+        tf.lookup.KeyValueTensorInitializer(tf.constant(words), tf.constant(ids, dtype=tf.int64)),
+        default_value=oov_index
+    )
+    classes = [str(c) for c in label_encoder.classes_]
+    label_table = tf.lookup.StaticHashTable(
+        tf.lookup.KeyValueTensorInitializer(tf.constant(classes), tf.range(len(classes), dtype=tf.int64)),
+        default_value=-1
+    )
+    # Karakter di Tokenizer.filters diganti spasi, sama seperti str.translate di Keras
+    filters = "[" + "".join("\\" + c if c in "\\[]^-" else c for c in tokenizer.filters) + "]"
+    split = tokenizer.split
+
+    def tokenize(texts, labels):
+        if tokenizer.lower:
+            texts = tf.strings.lower(texts, encoding="utf-8")
+        texts = tf.strings.regex_replace(texts, filters, split)
+        tokens = tf.strings.split(texts, sep=split)
+        tokens = tf.ragged.boolean_mask(tokens, tf.strings.length(tokens) > 0)
+        token_ids = tf.ragged.map_flat_values(vocab.lookup, tokens)
+        # Tanpa oov_token kata yang tidak dikenal dibuang (default -1)
+        token_ids = tf.ragged.boolean_mask(token_ids, token_ids >= 0)
+        padded = token_ids.to_tensor(default_value=0, shape=[None, max_len])
+        return tf.cast(padded, tf.int32), tf.cast(label_table.lookup(labels), tf.int32)
+
+    return tokenize
+
+
+def make_dataset(files, text_index, label_index, tokenize, validation=False,
+                 batch_size=STREAM_BATCH_SIZE, shuffle_buffer=SHUFFLE_BUFFER):
+    """Pipeline: interleave shard -> split train/val -> shuffle -> batch -> tokenize -> prefetch"""
+    def read_shard(path):
+        return tf.data.experimental.CsvDataset(
+            path, record_defaults=[tf.constant("", tf.string), tf.constant("", tf.string)],
+            select_cols=sorted([text_index, label_index]), header=True
+        )
+
+    def reorder(*columns):
+        # CsvDataset mengembalikan kolom sesuai urutan di file
+        if text_index < label_index:
+            return columns[0], columns[1]
+        return columns[1], columns[0]
+
+    def in_split(text, label):
+        is_validation = tf.strings.to_hash_bucket_fast(text, 100) < VALIDATION_PERCENT
+        return is_validation if validation else tf.logical_not(is_validation)
+
+    dataset = tf.data.Dataset.from_tensor_slices(files)
+    if not validation:
+        dataset = dataset.shuffle(len(files), reshuffle_each_iteration=True)
+    dataset = dataset.interleave(
+        read_shard, cycle_length=min(INTERLEAVE_CYCLE, len(files)), num_parallel_calls=AUTOTUNE
+    )
+    dataset = dataset.map(reorder).filter(in_split)
+    if not validation:
+        dataset = dataset.shuffle(shuffle_buffer, reshuffle_each_iteration=True)
+    # Tokenize per batch (vectorized) setelah batching, paralel dengan AUTOTUNE
+    dataset = dataset.batch(batch_size).map(tokenize, num_parallel_calls=AUTOTUNE)
+    # Baris dengan label yang tidak dikenal (kosong) diberi bobot 0
+    dataset = dataset.map(lambda x, y: (x, tf.maximum(y, 0), tf.cast(y >= 0, tf.float32)))
+
+    options = tf.data.Options()
+    options.deterministic = validation
+    return dataset.with_options(options).prefetch(AUTOTUNE)
+
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """Catat steps/sec dan examples/sec per epoch (dan setiap log_every step)"""
+
+    def __init__(self, batch_size, log_every=100):
+        super().__init__()
+        self.batch_size = batch_size
+        self.log_every = log_every
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch_started = time.perf_counter()
+        self.window_started = self.epoch_started
+        self.steps = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.steps += 1
+        if self.log_every and self.steps % self.log_every == 0:
+            now = time.perf_counter()
+            rate = self.log_every / (now - self.window_started)
+            self.window_started = now
+            print(f"  step {self.steps}: {rate:.1f} steps/sec")
+
+    def on_epoch_end(self, epoch, logs=None):
+        elapsed = time.perf_counter() - self.epoch_started
+        steps_per_sec = self.steps / elapsed if elapsed else 0.0
+        message = (f"Epoch {epoch + 1}: {self.steps} steps in {elapsed:.1f}s, "
+                   f"{steps_per_sec:.1f} steps/sec, {steps_per_sec * self.batch_size:.0f} examples/sec")
+        if logs:
+            message += " - " + ", ".join(f"{k}={v:.4f}" for k, v in logs.items() if isinstance(v, numbers.Number))
+        print(message)
+        logging.info(message)
+        if logs is not None:
+            logs["steps_per_sec"] = steps_per_sec
@@ -0,0 +1,128 @@
+import os
+import logging
+import tensorflow as tf
+
+from ml_training.streaming import ThroughputLogger
+
+# Konfigurasi training di CPU: jumlah thread, batch size + learning rate scaling, mixed precision
+# bfloat16 (opsional) dan callback EarlyStopping / checkpoint model terbaik / log waktu per epoch.
+
+# Configuration (bisa diubah lewat ENV atau argumen CLI train_dl_models.py)
+TRAIN_INTRA_OP_THREADS = int(os.getenv("TRAIN_INTRA_OP_THREADS", "0"))  # 0 = default TensorFlow (semua core)
+TRAIN_INTER_OP_THREADS = int(os.getenv("TRAIN_INTER_OP_THREADS", "0"))
+TRAIN_BATCH_SIZE = int(os.getenv("TRAIN_BATCH_SIZE", "32"))
+# Learning rate Adam default untuk batch 32, di-scale linear terhadap batch size
+BASE_BATCH_SIZE = 32
+BASE_LEARNING_RATE = 1e-3
+# "off", "bf16" (wajib, gagal jika CPU tidak mendukung) atau "auto" (bf16 jika CPU mendukung)
+TRAIN_MIXED_PRECISION = os.getenv("TRAIN_MIXED_PRECISION", "off")
+# 0 = EarlyStopping dimatikan
+TRAIN_PATIENCE = int(os.getenv("TRAIN_PATIENCE", "3"))
+CHECKPOINT_DIR = os.getenv("TRAIN_CHECKPOINT_DIR", "checkpoints")
+
+# Flag CPU (Linux /proc/cpuinfo) yang menandakan instruksi bfloat16 native
+BF16_CPU_FLAGS = ("avx512_bf16", "amx_bf16")
+
+
+def _float32_config(node):
+    # Ganti semua DTypePolicy (mis. mixed_bfloat16) di config layer dengan float32
+    if isinstance(node, dict):
+        if node.get("class_name") == "DTypePolicy":
+            return "float32"
+        return {k: _float32_config(v) for k, v in node.items()}
+    if isinstance(node, list):
+        return [_float32_config(v) for v in node]
+    return node
+
+
+def float32_model(model):
+    """Salinan model dengan bobot yang sama tetapi semua layer float32, untuk disimpan & di-serve
+
+    Model hasil training mixed precision tetap menghitung di bfloat16 saat di-load, padahal CPU
+    server belum tentu mendukung bf16 dan export NumPy membandingkan dengan hasil float32.
+    """
+    if all(layer.dtype_policy.name == "float32" for layer in model.layers):
+        return model
+    policy = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy("float32")
+    try:
+        clone = model.__class__.from_config(_float32_config(model.get_config()))
+    finally:
+        tf.keras.mixed_precision.set_global_policy(policy)
+    clone.set_weights(model.get_weights())
+    return clone
+
+
+def cpu_supports_bf16():
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("flags"):
+                    flags = set(line.split(":", 1)[1].split())
+                    return any(flag in flags for flag in BF16_CPU_FLAGS)
+    except OSError:
+        pass
+    return False
+
+
+class TrainConfig:
+    """Pengaturan training; nilai default dari ENV, epochs=None berarti pakai default per model"""
+
+    def __init__(self, batch_size=TRAIN_BATCH_SIZE, epochs=None, intra_op_threads=TRAIN_INTRA_OP_THREADS,
+                 inter_op_threads=TRAIN_INTER_OP_THREADS, mixed_precision=TRAIN_MIXED_PRECISION,
+                 patience=TRAIN_PATIENCE, checkpoint_dir=CHECKPOINT_DIR):
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.mixed_precision = mixed_precision
+        self.patience = patience
+        self.checkpoint_dir = checkpoint_dir
+
+    @property
+    def learning_rate(self):
+        # Linear scaling rule: batch 2x lebih besar -> learning rate 2x
+        return BASE_LEARNING_RATE * self.batch_size / BASE_BATCH_SIZE
+
+    def apply(self):
+        """Atur thread & dtype policy; harus dipanggil sebelum model/op TensorFlow pertama dibuat"""
+        if self.intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(self.intra_op_threads)
+        if self.inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(self.inter_op_threads)
+
+        use_bf16 = False
+        if self.mixed_precision == "bf16":
+            if not cpu_supports_bf16():
+                raise RuntimeError("bf16 mixed precision requested but CPU has no avx512_bf16/amx_bf16")
+            use_bf16 = True
+        elif self.mixed_precision == "auto":
+            use_bf16 = cpu_supports_bf16()
+        if use_bf16:
+            # Variabel tetap float32, komputasi di bfloat16; layer output dibuat float32 di model
+            tf.keras.mixed_precision.set_global_policy("mixed_bfloat16")
+
+        summary = (f"Training config: batch_size={self.batch_size}, learning_rate={self.learning_rate:g}, "
+                   f"threads={self.intra_op_threads or 'default'}/{self.inter_op_threads or 'default'}, "
+                   f"precision={'mixed_bfloat16' if use_bf16 else 'float32'}, patience={self.patience}")
+        print(summary)
+        logging.info(summary)
+
+    def optimizer(self):
+        return tf.keras.optimizers.Adam(learning_rate=self.learning_rate)
+
+    def callbacks(self, name, monitor="val_loss"):
+        """Log waktu/throughput per epoch, EarlyStopping dan checkpoint model terbaik"""
+        callbacks = [ThroughputLogger(self.batch_size)]
+        if self.patience:
+            # Bobot terbaik dikembalikan ke model, jadi model.save() menyimpan epoch terbaik
+            callbacks.append(tf.keras.callbacks.EarlyStopping(
+                monitor=monitor, patience=self.patience, restore_best_weights=True, verbose=1
+            ))
+        if self.checkpoint_dir:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            callbacks.append(tf.keras.callbacks.ModelCheckpoint(
+                os.path.join(self.checkpoint_dir, f"{name}_best.keras"),
+                monitor=monitor, save_best_only=True
+            ))
+        return callbacks
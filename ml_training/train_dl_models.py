@@ -1,22 +1,26 @@
 import pandas as pd
 import numpy as np
+import json
 import pickle
 import os
 import tensorflow as tf
-from tensorflow.keras.preprocessing.text import Tokenizer
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Embedding, LSTM, Dense, Dropout, Conv1D, GlobalMaxPooling1D, Bidirectional, MaxPooling1D
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
+from tensorflow.keras.models import Sequential, Model
+from tensorflow.keras.layers import Input, Embedding, LSTM, Dense, Dropout, Conv1D, GlobalMaxPooling1D, Bidirectional, MaxPooling1D
 import logging
 import traceback
+import argparse
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ml_training.dataset_cache import MAX_WORDS, MAX_LEN, load_dataset, record_training_dataset
+from ml_training.train_config import TrainConfig, float32_model, TRAIN_BATCH_SIZE, TRAIN_MIXED_PRECISION, TRAIN_PATIENCE
+from ml_training.build_keyword_idf import build_keyword_idf
+from ml_training.model_registry import publish_models
+from backend.utils.registry import trained_mode, write_trained_mode, mode_artifact
 
 # Configuration
 DATA_DIR = "data"
 MODEL_DIR = "backend/utils/models"
-MAX_WORDS = 10000
-MAX_LEN = 100
 EMBEDDING_DIM = 100
 
 os.makedirs(MODEL_DIR, exist_ok=True)
@@ -25,9 +29,11 @@ os.makedirs(MODEL_DIR, exist_ok=True)
 logging.basicConfig(filename='training.log', level=logging.INFO, 
                     format='%(asctime)s - %(levelname)s - %(message)s')
 
-def create_hybrid_model(input_dim, output_dim, loss_fn):
+def create_hybrid_model(input_dim, output_dim, loss_fn, optimizer='adam'):
     # Hybrid CNN-LSTM Architecture
     model = Sequential([
+        # Token id eksplisit int32: tanpa Input, dtype input mengikuti policy (bfloat16 membulatkan id > 256)
+        Input(shape=(MAX_LEN,), dtype='int32'),
         Embedding(input_dim=input_dim, output_dim=EMBEDDING_DIM, input_length=MAX_LEN),
         
         # CNN Layer (Feature Extraction)
@@ -40,10 +46,37 @@ def create_hybrid_model(input_dim, output_dim, loss_fn):
         
         # Dense Layers (Classification)
         Dense(32, activation='relu'),
-        Dense(output_dim, activation='softmax')
+        # Output selalu float32 (softmax stabil walaupun memakai mixed precision bfloat16)
+        Dense(output_dim, activation='softmax', dtype='float32')
     ])
     
-    model.compile(loss=loss_fn, optimizer='adam', metrics=['accuracy'])
+    model.compile(loss=loss_fn, optimizer=optimizer, metrics=['accuracy'])
+    return model
+
+def create_multitask_model(input_dim, num_sentiment, num_category, optimizer='adam'):
+    # Trunk CNN-BiLSTM yang sama dengan create_hybrid_model, dipakai bersama oleh dua head
+    # Token id eksplisit int32, sama dengan create_hybrid_model (input tidak ikut policy mixed precision)
+    inputs = Input(shape=(MAX_LEN,), dtype='int32', name="tokens")
+    x = Embedding(input_dim=input_dim, output_dim=EMBEDDING_DIM)(inputs)
+    x = Conv1D(filters=64, kernel_size=3, padding='same', activation='relu')(x)
+    x = MaxPooling1D(pool_size=2)(x)
+    x = Bidirectional(LSTM(64))(x)
+    x = Dropout(0.3)(x)
+
+    # Head Sentiment
+    s = Dense(32, activation='relu', name="sentiment_dense")(x)
+    sentiment_out = Dense(num_sentiment, activation='softmax', dtype='float32', name="sentiment")(s)
+
+    # Head Category
+    c = Dense(32, activation='relu', name="category_dense")(x)
+    category_out = Dense(num_category, activation='softmax', dtype='float32', name="category")(c)
+
+    model = Model(inputs=inputs, outputs=[sentiment_out, category_out])
+    model.compile(
+        loss={'sentiment': 'sparse_categorical_crossentropy', 'category': 'sparse_categorical_crossentropy'},
+        optimizer=optimizer,
+        metrics={'sentiment': ['accuracy'], 'category': ['accuracy']}
+    )
     return model
 
 import logging
@@ -55,11 +88,12 @@ logging.basicConfig(filename='training.log', level=logging.INFO,
 
 import matplotlib.pyplot as plt
 
-def plot_history(history, model_name):
-    acc = history.history['accuracy']
-    val_acc = history.history['val_accuracy']
-    loss = history.history['loss']
-    val_loss = history.history['val_loss']
+def plot_history(history, model_name, prefix=""):
+    # prefix dipakai untuk model multi-head, contoh "sentiment_" -> sentiment_accuracy
+    acc = history.history[f'{prefix}accuracy']
+    val_acc = history.history[f'val_{prefix}accuracy']
+    loss = history.history[f'{prefix}loss']
+    val_loss = history.history[f'val_{prefix}loss']
     epochs = range(1, len(acc) + 1)
     
     plt.figure(figsize=(12, 5))
@@ -85,47 +119,86 @@ def plot_history(history, model_name):
     print(f"Graph saved to {plot_path}")
     logging.info(f"Graph saved to {plot_path}")
 
-def train_sentiment_model():
+def history_metrics(history, config):
+    """Metrik validasi dari epoch yang bobotnya disimpan (terbaik jika EarlyStopping aktif), untuk manifest registry"""
+    values = history.history
+    epoch = int(np.argmin(values["val_loss"])) if config.patience else len(values["val_loss"]) - 1
+    metrics = {k: round(float(v[epoch]), 4) for k, v in values.items() if k.startswith("val_")}
+    metrics["epochs"] = len(values["val_loss"])
+    return metrics
+
+def refresh_serving_bundle():
+    """Bundle NumPy yang lebih lama dari model .h5 hasil training di-export ulang sebelum publish"""
+    bundle_path = f"{MODEL_DIR}/serving_bundle.npz"
+    if not os.path.exists(bundle_path):
+        return True
+    mode = trained_mode(MODEL_DIR)
+    newest_model = max(
+        (os.path.getmtime(f"{MODEL_DIR}/{name}") for name in os.listdir(MODEL_DIR)
+         if name.endswith(".h5") and mode_artifact(name, mode)),
+        default=0
+    )
+    with np.load(bundle_path) as arrays:
+        bundle_kind = json.loads(str(arrays["__manifest__"]))["kind"]
+    if os.path.getmtime(bundle_path) >= newest_model and bundle_kind == mode:
+        return True
+    print(f"Serving bundle ({bundle_kind}) does not match the trained {mode} models, re-exporting...")
+    try:
+        from ml_training.export_numpy import export_bundle
+        export_bundle("auto")
+        return True
+    except Exception as e:
+        # Bundle lama akan di-serve (backend numpy diutamakan), jadi version ini tidak boleh di-publish
+        print(f"Re-export failed: {e}")
+        return False
+
+def split_arrays(dataset, *arrays):
+    """Pisahkan array menjadi train/test dengan index split yang tersimpan di cache dataset
+    (urutan hasil sama dengan train_test_split: a_train, a_test, b_train, b_test, ...)"""
+    result = []
+    for array in arrays:
+        result.append(np.asarray(array[dataset["train_idx"]]))
+        result.append(np.asarray(array[dataset["test_idx"]]))
+    return result
+
+def train_sentiment_model(config=None):
+    config = config or TrainConfig()
     print("--- Training Sentiment Model ---")
     logging.info("Starting Sentiment Training")
     try:
-        df = pd.read_csv(f"{DATA_DIR}/final_sentiment_data.csv")
-        df['text'] = df['text'].astype(str)
-        
-        # Tokenizer
-        tokenizer = Tokenizer(num_words=MAX_WORDS, oov_token="<OOV>")
-        tokenizer.fit_on_texts(df['text'])
-        sequences = tokenizer.texts_to_sequences(df['text'])
-        padded = pad_sequences(sequences, maxlen=MAX_LEN, padding='post', truncating='post')
-        
-        # Encode Labels
-        label_encoder = LabelEncoder()
-        labels = label_encoder.fit_transform(df['label'])
+        # Token id, label dan split diambil dari cache (tokenize hanya jika data berubah)
+        dataset = load_dataset("sentiment")
+        tokenizer = dataset["tokenizer"]
+        label_encoder = dataset["label_encoders"]["label"]
         print("Sentiment Labels:", list(label_encoder.classes_))
-        logging.info(f"Sentiment Labels: {list(label_encoder.classes_)}")
+        logging.info(f"Sentiment Labels: {list(label_encoder.classes_)} (dataset {dataset['key']})")
         num_classes = len(label_encoder.classes_)
         
         # Split
-        X_train, X_test, y_train, y_test = train_test_split(padded, labels, test_size=0.2, random_state=42)
+        X_train, X_test, y_train, y_test = split_arrays(dataset, dataset["X"], dataset["labels"]["label"])
         
         # Build Model
-        model = create_hybrid_model(input_dim=MAX_WORDS, output_dim=num_classes, loss_fn='sparse_categorical_crossentropy')
+        model = create_hybrid_model(input_dim=MAX_WORDS, output_dim=num_classes, loss_fn='sparse_categorical_crossentropy',
+                                    optimizer=config.optimizer())
         
         # Train
-        history = model.fit(X_train, y_train, epochs=5, validation_data=(X_test, y_test), batch_size=32)
+        history = model.fit(X_train, y_train, epochs=config.epochs or 5, validation_data=(X_test, y_test),
+                            batch_size=config.batch_size, callbacks=config.callbacks("sentiment_dl_model"))
         
         # Plot
         plot_history(history, "Sentiment Model")
         
         # Save
-        model.save(f"{MODEL_DIR}/sentiment_dl_model.h5")
+        float32_model(model).save(f"{MODEL_DIR}/sentiment_dl_model.h5")
         with open(f"{MODEL_DIR}/sentiment_tokenizer.pickle", 'wb') as handle:
             pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
         with open(f"{MODEL_DIR}/sentiment_label_encoder.pickle", 'wb') as handle:
             pickle.dump(label_encoder, handle, protocol=pickle.HIGHEST_PROTOCOL)
             
+        record_training_dataset("sentiment_dl_model", dataset)
         print("Sentiment Model Saved!")
         logging.info("Sentiment Model Saved Successfully")
+        return history_metrics(history, config)
         
     except Exception as e:
         print(f"Error training sentiment model: {e}")
@@ -133,47 +206,44 @@ def train_sentiment_model():
         logging.error(traceback.format_exc())
         traceback.print_exc()
 
-def train_category_model():
+def train_category_model(config=None):
+    config = config or TrainConfig()
     print("\n--- Training Category Model ---")
     logging.info("Starting Category Training")
     try:
-        df = pd.read_csv(f"{DATA_DIR}/final_category_data.csv")
-        df['text'] = df['text'].astype(str)
-        
-        # Tokenizer
-        tokenizer = Tokenizer(num_words=MAX_WORDS, oov_token="<OOV>")
-        tokenizer.fit_on_texts(df['text'])
-        sequences = tokenizer.texts_to_sequences(df['text'])
-        padded = pad_sequences(sequences, maxlen=MAX_LEN, padding='post', truncating='post')
-        
-        # Encode Labels
-        label_encoder = LabelEncoder()
-        labels = label_encoder.fit_transform(df['category'])
+        # Token id, label dan split diambil dari cache (tokenize hanya jika data berubah)
+        dataset = load_dataset("category")
+        tokenizer = dataset["tokenizer"]
+        label_encoder = dataset["label_encoders"]["category"]
         print("Category Labels:", list(label_encoder.classes_))
-        logging.info(f"Category Labels: {list(label_encoder.classes_)}")
+        logging.info(f"Category Labels: {list(label_encoder.classes_)} (dataset {dataset['key']})")
         num_classes = len(label_encoder.classes_)
         
         # Split
-        X_train, X_test, y_train, y_test = train_test_split(padded, labels, test_size=0.2, random_state=42)
+        X_train, X_test, y_train, y_test = split_arrays(dataset, dataset["X"], dataset["labels"]["category"])
         
         # Build Model
-        model = create_hybrid_model(input_dim=MAX_WORDS, output_dim=num_classes, loss_fn='sparse_categorical_crossentropy')
+        model = create_hybrid_model(input_dim=MAX_WORDS, output_dim=num_classes, loss_fn='sparse_categorical_crossentropy',
+                                    optimizer=config.optimizer())
         
         # Train
-        history = model.fit(X_train, y_train, epochs=10, validation_data=(X_test, y_test), batch_size=32)
+        history = model.fit(X_train, y_train, epochs=config.epochs or 10, validation_data=(X_test, y_test),
+                            batch_size=config.batch_size, callbacks=config.callbacks("category_dl_model"))
         
         # Plot
         plot_history(history, "Category Model")
         
         # Save
-        model.save(f"{MODEL_DIR}/category_dl_model.h5")
+        float32_model(model).save(f"{MODEL_DIR}/category_dl_model.h5")
         with open(f"{MODEL_DIR}/category_tokenizer.pickle", 'wb') as handle:
             pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
         with open(f"{MODEL_DIR}/category_label_encoder.pickle", 'wb') as handle:
             pickle.dump(label_encoder, handle, protocol=pickle.HIGHEST_PROTOCOL)
             
+        record_training_dataset("category_dl_model", dataset)
         print("Category Model Saved!")
         logging.info("Category Model Saved Successfully")
+        return history_metrics(history, config)
         
     except Exception as e:
         print(f"Error training category model: {e}")
@@ -182,6 +252,190 @@ def train_category_model():
         traceback.print_exc()
 
 
+def train_multitask_model(config=None):
+    config = config or TrainConfig()
+    print("\n--- Training Multi-Head Model (Sentiment + Category) ---")
+    logging.info("Starting Multi-Head Training")
+    try:
+        # Gabungan data sentiment & category (outer join berdasarkan teks) dari cache. Data IndoNLU
+        # tidak punya kategori, jadi head category diberi bobot 0 untuk baris tersebut (begitu juga sebaliknya).
+        dataset = load_dataset("multitask")
+        tokenizer = dataset["tokenizer"]
+        sentiment_encoder = dataset["label_encoders"]["label"]
+        category_encoder = dataset["label_encoders"]["category"]
+
+        print("Sentiment Labels:", list(sentiment_encoder.classes_))
+        print("Category Labels:", list(category_encoder.classes_))
+        logging.info(f"Multi-Head Labels: {list(sentiment_encoder.classes_)} / {list(category_encoder.classes_)}")
+
+        # Split
+        (X_train, X_test, ys_train, ys_test, yc_train, yc_test,
+         ws_train, ws_test, wc_train, wc_test) = split_arrays(
+            dataset, dataset["X"], dataset["labels"]["label"], dataset["labels"]["category"],
+            dataset["weights"]["label"], dataset["weights"]["category"]
+        )
+
+        # Build Model
+        model = create_multitask_model(
+            input_dim=MAX_WORDS,
+            num_sentiment=len(sentiment_encoder.classes_),
+            num_category=len(category_encoder.classes_),
+            optimizer=config.optimizer()
+        )
+
+        # Train (urutan list mengikuti output model: sentiment, category)
+        history = model.fit(
+            X_train, [ys_train, yc_train],
+            sample_weight=[ws_train, wc_train],
+            validation_data=(X_test, [ys_test, yc_test], [ws_test, wc_test]),
+            epochs=config.epochs or 10, batch_size=config.batch_size,
+            callbacks=config.callbacks("multitask_dl_model")
+        )
+
+        # Plot
+        plot_history(history, "Multitask Sentiment", prefix="sentiment_")
+        plot_history(history, "Multitask Category", prefix="category_")
+
+        # Save
+        float32_model(model).save(f"{MODEL_DIR}/multitask_dl_model.h5")
+        with open(f"{MODEL_DIR}/multitask_tokenizer.pickle", 'wb') as handle:
+            pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(f"{MODEL_DIR}/multitask_sentiment_label_encoder.pickle", 'wb') as handle:
+            pickle.dump(sentiment_encoder, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(f"{MODEL_DIR}/multitask_category_label_encoder.pickle", 'wb') as handle:
+            pickle.dump(category_encoder, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+        record_training_dataset("multitask_dl_model", dataset)
+        print("Multi-Head Model Saved!")
+        logging.info("Multi-Head Model Saved Successfully")
+        return history_metrics(history, config)
+
+    except Exception as e:
+        print(f"Error training multi-head model: {e}")
+        logging.error(f"Error training multi-head model: {e}")
+        logging.error(traceback.format_exc())
+        traceback.print_exc()
+
+
+# Training streaming: shard CSV (contoh final_sentiment_data-0001.csv, ...) dibaca lazily lewat tf.data
+STREAM_TASKS = {
+    "sentiment": {"label": "label", "shards": f"{DATA_DIR}/final_sentiment_data*.csv", "epochs": 5},
+    "category": {"label": "category", "shards": f"{DATA_DIR}/final_category_data*.csv", "epochs": 10},
+}
+
+def train_streaming_model(task, shards=None, config=None):
+    from ml_training.streaming import (resolve_shards, shard_columns, shard_dataset, fit_vocabulary,
+                                       make_tokenize_fn, make_dataset)
+
+    config = config or TrainConfig()
+    spec = STREAM_TASKS[task]
+    model_name = f"{task.capitalize()} Model"
+    print(f"\n--- Training {model_name} (streaming) ---")
+    logging.info(f"Starting {model_name} streaming training")
+    try:
+        files = resolve_shards(shards or spec["shards"])
+        text_index, label_index = shard_columns(files, "text", spec["label"])
+
+        # Vocabulary & label di-fit dengan satu pass per chunk, data tidak pernah dimuat seluruhnya
+        tokenizer, label_encoder, rows = fit_vocabulary(files, "text", spec["label"])
+        print(f"{model_name} Labels:", list(label_encoder.classes_))
+        logging.info(f"{model_name} Labels: {list(label_encoder.classes_)} ({rows} rows, {len(files)} shards)")
+
+        tokenize = make_tokenize_fn(tokenizer, label_encoder)
+        train_ds = make_dataset(files, text_index, label_index, tokenize, batch_size=config.batch_size)
+        val_ds = make_dataset(files, text_index, label_index, tokenize, validation=True, batch_size=config.batch_size)
+
+        # Build Model
+        model = create_hybrid_model(
+            input_dim=MAX_WORDS, output_dim=len(label_encoder.classes_), loss_fn='sparse_categorical_crossentropy',
+            optimizer=config.optimizer()
+        )
+
+        # Train
+        history = model.fit(
+            train_ds, validation_data=val_ds, epochs=config.epochs or spec["epochs"],
+            callbacks=config.callbacks(f"{task}_dl_model")
+        )
+
+        # Plot
+        plot_history(history, model_name)
+
+        # Save (nama file sama dengan training biasa, jadi langsung dipakai backend)
+        float32_model(model).save(f"{MODEL_DIR}/{task}_dl_model.h5")
+        with open(f"{MODEL_DIR}/{task}_tokenizer.pickle", 'wb') as handle:
+            pickle.dump(tokenizer, handle, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(f"{MODEL_DIR}/{task}_label_encoder.pickle", 'wb') as handle:
+            pickle.dump(label_encoder, handle, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Vocabulary model ini berasal dari shard, bukan dari cache dataset (lihat check_trained_dataset)
+        record_training_dataset(f"{task}_dl_model", shard_dataset(task, files, spec["label"]))
+        print(f"{model_name} Saved!")
+        logging.info(f"{model_name} Saved Successfully (streaming)")
+        return history_metrics(history, config)
+
+    except Exception as e:
+        print(f"Error training {task} model (streaming): {e}")
+        logging.error(f"Error training {task} model (streaming): {e}")
+        logging.error(traceback.format_exc())
+        traceback.print_exc()
+
+
 if __name__ == "__main__":
-    train_sentiment_model()
-    train_category_model()
+    parser = argparse.ArgumentParser(description="Train Deep Learning models")
+    parser.add_argument(
+        "--mode", choices=["separate", "multitask", "all", "stream"], default="separate",
+        help="separate = dua model terpisah, multitask = satu model dengan dua head, "
+             "stream = dua model terpisah dengan input pipeline tf.data dari shard CSV"
+    )
+    parser.add_argument("--sentiment-shards", help="Glob shard CSV sentiment untuk --mode stream")
+    parser.add_argument("--category-shards", help="Glob shard CSV category untuk --mode stream")
+    parser.add_argument("--batch-size", type=int, default=TRAIN_BATCH_SIZE,
+                        help="Learning rate di-scale linear terhadap batch size (basis 32)")
+    parser.add_argument("--epochs", type=int, help="Jumlah epoch maksimum (default: 5 sentiment, 10 category)")
+    parser.add_argument("--intra-op-threads", type=int, default=None, help="Thread per op (0 = default TF)")
+    parser.add_argument("--inter-op-threads", type=int, default=None, help="Op paralel (0 = default TF)")
+    parser.add_argument("--mixed-precision", choices=["off", "bf16", "auto"], default=TRAIN_MIXED_PRECISION)
+    parser.add_argument("--patience", type=int, default=TRAIN_PATIENCE, help="EarlyStopping patience (0 = mati)")
+    parser.add_argument("--no-publish", action="store_true", help="Jangan simpan hasil training ke registry model")
+    parser.add_argument("--promote", action="store_true",
+                        help="Jadikan version hasil training sebagai CURRENT (server melakukan hot-swap)")
+    args = parser.parse_args()
+
+    config = TrainConfig(batch_size=args.batch_size, epochs=args.epochs,
+                         mixed_precision=args.mixed_precision, patience=args.patience)
+    if args.intra_op_threads is not None:
+        config.intra_op_threads = args.intra_op_threads
+    if args.inter_op_threads is not None:
+        config.inter_op_threads = args.inter_op_threads
+    config.apply()
+
+    metrics = {}
+    if args.mode == "stream":
+        metrics["sentiment"] = train_streaming_model("sentiment", args.sentiment_shards, config)
+        metrics["category"] = train_streaming_model("category", args.category_shards, config)
+
+    if args.mode in ("separate", "all"):
+        metrics["sentiment"] = train_sentiment_model(config)
+        metrics["category"] = train_category_model(config)
+    if args.mode in ("multitask", "all"):
+        metrics["multitask"] = train_multitask_model(config)
+
+    # Mode yang di-serve backend / export_numpy / registry ("all" -> multi-head, sama seperti sebelumnya)
+    if metrics and all(metrics.values()):
+        write_trained_mode(MODEL_DIR, "multitask" if "multitask" in metrics else "separate")
+
+    # Tabel IDF keyword ikut dibangun ulang setiap training, disimpan di samping model
+    if args.mode == "stream":
+        from ml_training.streaming import resolve_shards
+        build_keyword_idf(resolve_shards(args.sentiment_shards or STREAM_TASKS["sentiment"]["shards"]))
+    else:
+        build_keyword_idf()
+
+    # Setiap training run menjadi version immutable di registry (gagal training -> metrik None, tidak di-publish)
+    if not args.no_publish:
+        if not all(metrics.values()):
+            print("Training failed, nothing published to the model registry")
+        elif not refresh_serving_bundle():
+            print("Stale serving bundle, nothing published (run export_numpy.py, then model_registry.py publish)")
+        else:
+            publish_models(MODEL_DIR, metrics=metrics, promote=args.promote)
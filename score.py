@@ -0,0 +1,204 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from numpy.lib.format import open_memmap
+
+from backend.utils.ml_model import SentimentModel
+from backend.utils.preprocessing import FrozenTokenizer
+
+# Scoring offline untuk CSV besar: baca per chunk, tokenize paralel di process pool,
+# inference per batch besar, probabilitas ditulis ke .npy (memory-mapped) dan bisa di-resume.
+#
+#   python score.py data.csv --output scores/data
+#   -> scores/data.sentiment.npy, scores/data.category.npy, scores/data.progress.json
+
+CHUNK_SIZE = 50000
+BATCH_SIZE = 2048
+
+_tokenizer = None
+
+
+def _init_worker(words, ids, config, max_len):
+    # Vocabulary dikirim sekali per proses, bukan per chunk
+    global _tokenizer
+    _tokenizer = FrozenTokenizer.from_arrays(words, ids, config, max_len=max_len)
+
+
+def _tokenize(texts):
+    return _tokenizer.encode_batch(texts)
+
+
+def chunk_texts(df, text_columns):
+    """Gabungkan kolom teks seperti SentimentModel.predict (title + " " + description)"""
+    columns = [df[c].fillna("").astype(str) for c in text_columns]
+    combined = columns[0]
+    for column in columns[1:]:
+        combined = combined + " " + column
+    return combined.tolist()
+
+
+def count_rows(input_path, chunk_size):
+    # Pass cepat hanya dengan satu kolom, untuk menentukan ukuran file output di depan
+    return sum(len(chunk) for chunk in pd.read_csv(input_path, usecols=[0], chunksize=chunk_size))
+
+
+def input_signature(input_path):
+    stat = os.stat(input_path)
+    return {"path": os.path.abspath(input_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def load_progress(progress_path, expected):
+    """Progress sebelumnya, hanya dipakai jika input, model dan chunk size masih sama"""
+    if not os.path.exists(progress_path):
+        return None
+    with open(progress_path) as f:
+        progress = json.load(f)
+    for key, value in expected.items():
+        if progress.get(key) != value:
+            print(f"Progress file does not match ({key} changed), starting over")
+            return None
+    return progress
+
+
+def save_progress(progress_path, progress):
+    # Tulis ke file sementara lalu rename, agar progress tidak pernah setengah tertulis
+    tmp_path = progress_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(progress, f, indent=2)
+    os.replace(tmp_path, progress_path)
+
+
+def open_output(path, rows, num_classes, resume):
+    """Return (memmap, reused); file lama hanya dipakai ulang jika ukurannya cocok"""
+    if resume and os.path.exists(path):
+        out = open_memmap(path, mode="r+")
+        if out.shape == (rows, num_classes) and out.dtype == np.float32:
+            return out, True
+    return open_memmap(path, mode="w+", dtype=np.float32, shape=(rows, num_classes)), False
+
+
+def score(input_path, output_prefix, text_columns, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE,
+          workers=None, resume=True):
+    workers = workers or os.cpu_count() or 1
+    model = SentimentModel()
+    if not model.has_model():
+        raise RuntimeError("No model loaded, run ml_training/train_dl_models.py first")
+
+    output_dir = os.path.dirname(output_prefix)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    progress_path = f"{output_prefix}.progress.json"
+
+    expected = {
+        "input": input_signature(input_path),
+        "model_version": model.model_version,
+        "chunk_size": chunk_size,
+        "text_columns": text_columns,
+    }
+    progress = load_progress(progress_path, expected) if resume else None
+    if progress is None:
+        progress = dict(expected, rows=count_rows(input_path, chunk_size), completed_chunks=0, completed_rows=0)
+    rows = progress["rows"]
+    resuming = progress["completed_chunks"] > 0
+
+    # Probe satu batch untuk mengetahui jumlah class tiap head
+    sent_probe, cat_probe = model.forward(model.tokenizer.encode_batch([""]))
+    outputs = {}
+    reused = []
+    for head, probe, encoder in (("sentiment", sent_probe, model.sentiment_label_encoder),
+                                 ("category", cat_probe, model.category_label_encoder)):
+        if probe is None:
+            continue
+        outputs[head], ok = open_output(f"{output_prefix}.{head}.npy", rows, probe.shape[1], resuming)
+        reused.append(ok)
+        progress[f"{head}_classes"] = [str(c) for c in encoder.classes_]
+    if resuming and not all(reused):
+        print("Output files missing or changed, starting over")
+        progress.update(completed_chunks=0, completed_rows=0)
+    skip_chunks = progress["completed_chunks"]
+    save_progress(progress_path, progress)
+
+    if skip_chunks:
+        print(f"Resuming after chunk {skip_chunks} ({progress['completed_rows']}/{rows} rows)")
+
+    words, ids, config = model.tokenizer.to_arrays()
+    reader = pd.read_csv(input_path, usecols=text_columns, chunksize=chunk_size,
+                         dtype={c: str for c in text_columns}, keep_default_na=False)
+
+    started = time.perf_counter()
+    scored = 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(words, ids, config, model.tokenizer.max_len)) as pool:
+        # Tokenize chunk berikutnya berjalan di pool sementara chunk sekarang di-inference;
+        # jumlah chunk yang sedang diproses dibatasi agar memori tetap terkendali
+        pending = []
+        offset = 0
+        for chunk_index, df in enumerate(reader):
+            if chunk_index < skip_chunks:
+                offset += len(df)
+                continue
+            texts = chunk_texts(df, text_columns)
+            sub_size = max(1, -(-len(texts) // workers))
+            futures = [pool.submit(_tokenize, texts[i:i + sub_size]) for i in range(0, len(texts), sub_size)]
+            pending.append((chunk_index, offset, len(texts), futures))
+            offset += len(texts)
+
+            if len(pending) > 1:
+                scored += _infer_chunk(model, outputs, pending.pop(0), batch_size, progress, progress_path)
+
+        while pending:
+            scored += _infer_chunk(model, outputs, pending.pop(0), batch_size, progress, progress_path)
+
+    elapsed = time.perf_counter() - started
+    rate = scored / elapsed if elapsed else 0.0
+    print(f"Scored {scored} rows in {elapsed:.1f}s ({rate:.0f} rows/s), output: {output_prefix}.*.npy")
+    return progress
+
+
+def _infer_chunk(model, outputs, item, batch_size, progress, progress_path):
+    chunk_index, offset, length, futures = item
+    padded = np.concatenate([f.result() for f in futures]) if futures else np.zeros((0, 0), dtype=np.int32)
+
+    for start in range(0, length, batch_size):
+        batch = padded[start:start + batch_size]
+        sent_probs, cat_probs = model.forward(batch)
+        end = offset + start + len(batch)
+        if sent_probs is not None:
+            outputs["sentiment"][offset + start:end] = sent_probs
+        if cat_probs is not None:
+            outputs["category"][offset + start:end] = cat_probs
+
+    # Flush ke disk dulu, baru chunk dicatat selesai
+    for out in outputs.values():
+        out.flush()
+    progress["completed_chunks"] = chunk_index + 1
+    progress["completed_rows"] = offset + length
+    save_progress(progress_path, progress)
+    print(f"Chunk {chunk_index + 1}: {progress['completed_rows']}/{progress['rows']} rows")
+    return length
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-score a CSV file with the sentiment/category model")
+    parser.add_argument("input", help="CSV input")
+    parser.add_argument("--output", help="Prefix file output (default: nama input tanpa .csv)")
+    parser.add_argument("--columns", default="title,description",
+                        help="Kolom teks yang digabung, dipisah koma (misalnya 'text')")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=None, help="Jumlah proses tokenizer (default: jumlah CPU)")
+    parser.add_argument("--no-resume", action="store_true", help="Abaikan progress sebelumnya")
+    args = parser.parse_args()
+
+    output_prefix = args.output or os.path.splitext(args.input)[0]
+    try:
+        score(args.input, output_prefix, args.columns.split(","), args.chunk_size, args.batch_size,
+              args.workers, resume=not args.no_resume)
+    except (RuntimeError, ValueError) as e:
+        print(f"❌ Scoring failed: {e}")
+        sys.exit(1)
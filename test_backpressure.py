@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from backend.utils.batcher import InferenceExecutor, InferenceOverloaded, MicroBatcher
+
+# Backpressure inference (backend/utils/batcher.py): executor penuh -> InferenceOverloaded -> 503 + Retry-After
+#   python -m pytest -q test_backpressure.py
+
+
+class BlockingModel:
+    """predict_many lewat executor kecil; setiap task menunggu `release` agar executor bisa dibuat penuh"""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.release = threading.Event()
+
+    def _run(self, items):
+        self.release.wait(10)
+        return [{"label": "positive", "confidence": "90.00%", "keywords": [], "category": "Umum"} for _ in items]
+
+    def predict_many(self, items, wait=0):
+        return self.executor.run(self._run, items, wait=wait)
+
+    def saturate(self):
+        # 1 task jalan di thread inference + 1 task mengantri = semua slot terpakai
+        return [self.executor.submit(self._run, [("a", "")]) for _ in range(2)]
+
+
+class StubLoader:
+    def __init__(self, model):
+        self.model = model
+
+    def get(self):
+        return self.model
+
+
+@pytest.fixture
+def model():
+    model = BlockingModel(InferenceExecutor(threads=1, max_queue=1, timeout=10))
+    yield model
+    model.release.set()
+
+
+@pytest.fixture
+def client(model, tmp_path, monkeypatch):
+    # Thread background routes tidak di-start saat import, database & uploads/ di tmp_path
+    monkeypatch.setenv("GUNICORN_PRELOAD", "1")
+    monkeypatch.setenv("MODEL_REGISTRY_POLL_INTERVAL", "0")
+    monkeypatch.chdir(tmp_path)
+    from backend import routes
+    from backend.app import app
+    monkeypatch.setattr(routes, "model_loader", StubLoader(model))
+    return app.test_client()
+
+
+def test_saturated_executor_rejects_immediately(model):
+    running = model.saturate()
+    with pytest.raises(InferenceOverloaded) as error:
+        model.predict_many([("b", "")])
+    assert error.value.retry_after >= 1
+
+    model.release.set()
+    assert [len(f.result(timeout=10)) for f in running] == [1, 1]
+    # Slot dilepas setelah task selesai, request berikutnya diterima lagi
+    assert len(model.predict_many([("c", "")])) == 1
+
+
+def test_overload_returns_503_with_retry_after(model, client):
+    running = model.saturate()
+    response = client.post("/predict", json={"items": [{"title": "video lucu"}]})
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert response.get_json() == {"error": "Server busy, please retry later."}
+
+    model.release.set()
+    for future in running:
+        future.result(timeout=10)
+    response = client.post("/predict", json={"items": [{"title": "video lucu"}]})
+    assert response.status_code == 200 and response.get_json()["results"][0]["sentiment"] == "positive"
+
+
+def test_batcher_queue_holds_at_least_one_batch():
+    batcher = MicroBatcher(lambda items: items, max_batch_size=32, max_queue=16)
+    assert batcher.max_queue == 32
+    assert MicroBatcher(lambda items: items, max_batch_size=32, max_queue=0).max_queue == 0
+    assert MicroBatcher(lambda items: items, max_batch_size=8, max_queue=64).max_queue == 64
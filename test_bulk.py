@@ -0,0 +1,79 @@
+import io
+import json
+
+import pytest
+
+from backend.utils.bulk import (
+    BulkInputError, CSV, NDJSON, detect_format, iter_lines, iter_records, stream_predictions,
+)
+
+# Parsing & streaming /predict/bulk (backend/utils/bulk.py) dengan model palsu, tanpa artifact model
+#   python -m pytest -q test_bulk.py
+
+
+class FakeModel:
+    """predict_many mencatat ukuran setiap batch; label = judul, jadi urutan hasil bisa dicek"""
+
+    def __init__(self):
+        self.batches = []
+
+    def predict_many(self, items, wait=None):
+        self.batches.append(len(items))
+        return [{"label": title, "confidence": "90.00%", "keywords": []} for title, _ in items]
+
+
+def run(body, fmt, batch_size=2):
+    model = FakeModel()
+    records = iter_records(io.BytesIO(body.encode("utf-8")), fmt)
+    lines = [json.loads(line) for chunk in stream_predictions(model, records, batch_size) for line in chunk.splitlines()]
+    return lines, model.batches
+
+
+def test_detect_format():
+    assert detect_format("text/csv; charset=utf-8") == CSV
+    assert detect_format("application/x-ndjson") == NDJSON
+    assert detect_format(None, "CSV") == CSV
+    with pytest.raises(BulkInputError):
+        detect_format(None, "xml")
+
+
+def test_iter_lines_splits_across_chunks_and_limits_line_size():
+    stream = io.BytesIO(b"satu\ndua\ntiga")
+    assert list(iter_lines(stream, read_size=3)) == ["satu\n", "dua\n", "tiga"]
+    with pytest.raises(BulkInputError):
+        list(iter_lines(io.BytesIO(b"x" * 20), read_size=4, max_line_bytes=8))
+
+
+def test_ndjson_stream_keeps_order_and_reports_bad_lines():
+    body = "\n".join([
+        '{"id": 1, "title": "a"}',
+        '{"id": 2, "text": "b"}',
+        '{"id": 3, "title": "c"}',
+        "bukan json",
+        '["bukan", "object"]',
+        '{"id": 6, "judul": "tanpa title"}',
+        "",
+        '{"id": 8, "title": "d", "description": "deskripsi"}',
+    ])
+    lines, batches = run(body, NDJSON)
+
+    assert [(line.get("id"), line.get("sentiment"), line["line"]) for line in lines if "error" not in line] == [
+        (1, "a", 1), (2, "b", 2), (3, "c", 3), (8, "d", 8),
+    ]
+    assert [line["line"] for line in lines if "error" in line] == [4, 5, 6]
+    # Batch dikirim sebelum baris error agar hasil tetap berurutan sesuai input
+    assert [line["line"] for line in lines] == [1, 2, 3, 4, 5, 6, 8]
+    assert batches == [2, 1, 1]
+
+
+def test_csv_with_quoted_newline():
+    body = 'id,title,description\n1,"judul\ndua baris",isi\n2,lain,\n'
+    lines, batches = run(body, CSV)
+
+    assert [(line["id"], line["sentiment"]) for line in lines] == [("1", "judul\ndua baris"), ("2", "lain")]
+    assert batches == [2]
+
+
+def test_csv_requires_title_or_text_header():
+    with pytest.raises(BulkInputError):
+        run("nama,umur\nbudi,20\n", CSV)
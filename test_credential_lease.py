@@ -0,0 +1,81 @@
+import time
+import threading
+import multiprocessing
+
+import pytest
+
+from backend.utils.credentials import MemoryCredentialStore, SQLiteCredentialStore
+
+# Lease refresh token (backend/utils/credentials.py): dalam satu lease hanya satu worker yang boleh refresh
+#   python -m pytest -q test_credential_lease.py
+
+SESSION = "session-a"
+CREDENTIALS = {
+    "token": "access", "refresh_token": "refresh", "token_uri": "https://oauth2.googleapis.com/token",
+    "client_id": "test-client", "client_secret": "test-secret", "scopes": [], "expiry": None,
+}
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteCredentialStore(str(tmp_path / "credentials.db"))
+    else:
+        store = MemoryCredentialStore()
+    store.put(SESSION, CREDENTIALS)
+    return store
+
+
+def test_lease_is_exclusive_until_it_expires(store):
+    assert store.claim_refresh(SESSION, lease=0.3)
+    assert not store.claim_refresh(SESSION, lease=0.3)
+    time.sleep(0.4)
+    assert store.claim_refresh(SESSION, lease=0.3)
+
+
+def test_saving_credentials_releases_the_lease(store):
+    assert store.claim_refresh(SESSION, lease=60)
+    store.put(SESSION, dict(CREDENTIALS, token="refreshed"))
+    assert store.claim_refresh(SESSION, lease=60)
+
+
+def test_unknown_session_cannot_be_claimed(tmp_path):
+    assert not SQLiteCredentialStore(str(tmp_path / "credentials.db")).claim_refresh("unknown")
+
+
+def test_one_winner_across_threads(store):
+    start = threading.Barrier(8)
+    results = []
+
+    def claim():
+        start.wait()
+        results.append(store.claim_refresh(SESSION, lease=60))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(results) == [False] * 7 + [True]
+
+
+def claim_in_worker(db_path, start, results):
+    # Proses terpisah = gunicorn worker lain dengan koneksi SQLite sendiri
+    store = SQLiteCredentialStore(db_path)
+    start.wait()
+    results.put(store.claim_refresh(SESSION, lease=60))
+
+
+def test_one_winner_across_processes(tmp_path):
+    db_path = str(tmp_path / "credentials.db")
+    SQLiteCredentialStore(db_path).put(SESSION, CREDENTIALS)
+    context = multiprocessing.get_context("fork")
+    start, results = context.Barrier(4), context.Queue()
+
+    workers = [context.Process(target=claim_in_worker, args=(db_path, start, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    claimed = sorted(results.get(timeout=30) for _ in workers)
+    for worker in workers:
+        worker.join()
+    assert claimed == [False] * 3 + [True]
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from backend.utils.keywords import KeywordExtractor, candidate_terms, compute_idf, save_idf
+
+# Keyword TF-IDF (backend/utils/keywords.py): extract_batch harus deterministik dan sama dengan
+# extract per teks, apa pun isi dan urutan batch-nya
+#   python -m pytest -q test_keywords.py
+
+CORPUS = [
+    "Tutorial masak rendang padang enak sekali",
+    "Review film horor terbaru bioskop",
+    "Tutorial belajar python untuk pemula",
+    "Berita politik terbaru hari ini",
+    "Masak nasi goreng spesial tutorial mudah",
+]
+TEXTS = CORPUS + [
+    "Tutorial tutorial masak masak masak rendang",
+    "game game seru seru mabar mabar",  # skor sama: urutan kemunculan pertama
+    "Vlog jalan jalan Bali 2024 pantai kuta",
+    "ini itu yang dan",  # hanya stopword
+    "",
+]
+
+
+@pytest.fixture(params=["idf", "frequency"])
+def extractor(request, tmp_path):
+    if request.param == "frequency":
+        return KeywordExtractor(str(tmp_path / "missing.npz"))
+    path = str(tmp_path / "keyword_idf.npz")
+    save_idf(path, *compute_idf(CORPUS))
+    extractor = KeywordExtractor(path)
+    assert extractor.loaded
+    return extractor
+
+
+def reference_keywords(extractor, text, top_n):
+    """Versi per kata tanpa numpy: skor tf * idf, skor sama diurutkan berdasarkan kemunculan pertama"""
+    words = candidate_terms(text)
+    scores = {}
+    for word in words:
+        scores[word] = scores.get(word, 0) + 1
+    ranked = sorted(scores, key=lambda w: (-scores[w] * float(extractor._idf(w)), words.index(w)))
+    return ranked[:top_n]
+
+
+@pytest.mark.parametrize("top_n", [0, 1, 3, 5])
+def test_batch_matches_single_and_reference(extractor, top_n):
+    batch = extractor.extract_batch(TEXTS, top_n)
+    assert batch == [extractor.extract(text, top_n) for text in TEXTS]
+    assert batch == [reference_keywords(extractor, text, top_n) for text in TEXTS]
+
+
+def test_batch_is_deterministic_across_order_and_composition(extractor):
+    expected = {i: extractor.extract(text) for i, text in enumerate(TEXTS)}
+    rng = random.Random(7)
+    for _ in range(20):
+        indices = rng.sample(range(len(TEXTS)), rng.randint(1, len(TEXTS)))
+        assert extractor.extract_batch([TEXTS[i] for i in indices]) == [expected[i] for i in indices]
+
+
+def test_ranking_rules(extractor):
+    tutorial, game, vlog, stopwords, empty = extractor.extract_batch(TEXTS[5:])
+    assert tutorial[0] == "masak"
+    assert game == ["game", "seru", "mabar"]
+    assert "2024" not in vlog and "jalan" in vlog
+    assert stopwords == [] and empty == []
@@ -0,0 +1,54 @@
+import pytest
+
+from backend.utils.model_loader import ModelLoader
+from backend.utils.registry import ModelRegistry
+
+# Readiness ModelLoader (backend/utils/model_loader.py) dengan MODEL_LOAD_MODE=lazy
+#   python -m pytest -q test_model_loader.py
+
+
+class FakeModel:
+    model_version = "fake"
+
+    def __init__(self, loaded=True):
+        self.loaded = loaded
+
+    def has_model(self):
+        return self.loaded
+
+
+def lazy_loader(factory, tmp_path):
+    return ModelLoader(factory=factory, mode="lazy", registry=ModelRegistry(str(tmp_path)), poll_interval=0)
+
+
+def test_lazy_is_ready_until_first_load_then_follows_artifacts(tmp_path):
+    loader = lazy_loader(FakeModel, tmp_path)
+    assert loader.is_ready()
+    loader.get()
+    assert loader.is_ready() and loader.status()["status"] == "ready"
+
+    missing = lazy_loader(lambda: FakeModel(loaded=False), tmp_path)
+    assert missing.is_ready()
+    missing.get()
+    assert not missing.is_ready()
+    assert missing.status()["status"] == "error"
+
+
+def test_lazy_load_failure_reports_not_ready(tmp_path):
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("artifact corrupt")
+        return FakeModel()
+
+    loader = lazy_loader(factory, tmp_path)
+    with pytest.raises(RuntimeError):
+        loader.get()
+    assert not loader.is_ready()
+    assert loader.status()["error"] == "artifact corrupt"
+
+    # Load berikutnya berhasil, error lama dibersihkan
+    loader.get()
+    assert loader.is_ready() and loader.status()["error"] is None
@@ -0,0 +1,115 @@
+import os
+import threading
+import multiprocessing
+
+import pytest
+
+from backend.utils.registry import ModelRegistry, RegistryError, write_trained_mode
+
+# Registry model (backend/utils/registry.py): publish immutable, promote/rollback mengganti CURRENT
+# secara atomik dan mencatat history
+#   python -m pytest -q test_model_registry.py
+
+
+def make_artifacts(directory, content):
+    os.makedirs(directory, exist_ok=True)
+    for name in ("sentiment_dl_model.h5", "category_dl_model.h5", "tokenizer.pickle"):
+        with open(os.path.join(directory, name), "w") as f:
+            f.write(f"{name}:{content}")
+    write_trained_mode(directory, "separate")
+    return directory
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / "registry"))
+
+
+@pytest.fixture
+def versions(registry, tmp_path):
+    return [registry.publish(make_artifacts(str(tmp_path / f"run-{i}"), i), metrics={"run": i}) for i in range(2)]
+
+
+def test_publish_is_immutable_and_not_served(registry, versions):
+    assert registry.current() is None
+    assert sorted(registry.versions()) == sorted(versions)
+    manifest = registry.verify(versions[0])
+    assert manifest["mode"] == "separate" and manifest["metrics"] == {"run": 0}
+    assert set(manifest["files"]) == {
+        "sentiment_dl_model.h5", "category_dl_model.h5", "tokenizer.pickle", "trained_mode.json"
+    }
+    for name in manifest["files"]:
+        assert os.stat(os.path.join(registry.version_dir(versions[0]), name)).st_mode & 0o222 == 0
+    assert not [name for name in os.listdir(registry.versions_dir) if name.startswith(".tmp-")]
+
+
+def test_promote_and_rollback_history(registry, versions):
+    first, second = versions
+    assert registry.promote(first) is None
+    assert registry.promote(second) == first
+    assert registry.current() == second
+
+    assert registry.rollback() == first
+    assert registry.current() == first
+    assert [(e["action"], e["version"], e["previous"]) for e in registry.history()] == [
+        ("promote", first, None), ("promote", second, first), ("rollback", first, second),
+    ]
+    # first dipromosikan pertama kali tanpa version sebelumnya
+    with pytest.raises(RegistryError):
+        registry.rollback()
+    assert registry.rollback(second) == second and registry.current() == second
+
+
+def test_corrupt_version_is_never_promoted(registry, versions):
+    first, second = versions
+    registry.promote(first)
+    path = os.path.join(registry.version_dir(second), "tokenizer.pickle")
+    os.chmod(path, 0o644)
+    with open(path, "a") as f:
+        f.write("terpotong")
+
+    with pytest.raises(RegistryError):
+        registry.promote(second)
+    with pytest.raises(RegistryError):
+        registry.promote("20990101-000000-missing")
+    assert registry.current() == first
+    assert len(registry.history()) == 1
+
+
+def promote_many(root, versions, rounds):
+    registry = ModelRegistry(root)
+    for i in range(rounds):
+        registry.promote(versions[i % len(versions)])
+
+
+def test_current_is_replaced_atomically(registry, versions):
+    registry.promote(versions[0])
+    seen = set()
+    stop = threading.Event()
+
+    def read_current():
+        # Pembaca (watcher ModelLoader) tidak pernah melihat CURRENT kosong atau setengah ditulis
+        while not stop.is_set():
+            seen.add(registry.current())
+
+    reader = threading.Thread(target=read_current)
+    reader.start()
+    # Beberapa proses (misalnya CLI promote di dua pod) mengganti CURRENT bersamaan
+    context = multiprocessing.get_context("fork")
+    writers = [context.Process(target=promote_many, args=(registry.root, versions, 50)) for _ in range(3)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join()
+    stop.set()
+    reader.join()
+
+    assert all(writer.exitcode == 0 for writer in writers)
+    assert seen <= set(versions)
+    assert registry.current() in versions
+    history = registry.history()
+    assert len(history) == 1 + 3 * 50
+    assert all(entry["version"] in versions for entry in history)
+    assert not [name for name in os.listdir(registry.root) if ".tmp-" in name]
+    with open(registry.current_path) as f:
+        assert f.read() == registry.current() + "\n"
@@ -0,0 +1,107 @@
+import json
+import socket
+from http.server import BaseHTTPRequestHandler
+
+import pytest
+
+from backend.utils import notifier
+from backend.utils.notifier import NotificationDispatcher
+from benchmarks.inference import start_fake_server
+
+# Webhook n8n (backend/utils/notifier.py): retry untuk status sementara, dead-letter setelah retry habis
+#   python -m pytest -q test_notifier.py
+
+PAYLOAD = {"email": "test@example.com", "youtube_link": "https://youtu.be/abc"}
+
+
+class FlakyN8nHandler(BaseHTTPRequestHandler):
+    """Balas server.statuses satu per satu (status terakhir diulang terus)"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        with self.server.lock:
+            self.server.count += 1
+            self.server.received.append(body)
+            status = self.server.statuses.pop(0) if len(self.server.statuses) > 1 else self.server.statuses[0]
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+
+@pytest.fixture
+def n8n():
+    server = start_fake_server(FlakyN8nHandler)
+    server.received = []
+    host, port = server.server_address
+    server.url = f"http://{host}:{port}/webhook/send_notification"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(notifier.random, "uniform", lambda a, b: 0)
+
+
+def dispatcher(url, tmp_path, **kwargs):
+    return NotificationDispatcher(url=url, dead_letter_path=str(tmp_path / "dead_letter.jsonl"), **kwargs)
+
+
+def dead_letters(tmp_path):
+    path = tmp_path / "dead_letter.jsonl"
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_dead_letter_after_retries_exhausted(n8n, tmp_path):
+    n8n.statuses = [503]
+    dispatcher(n8n.url, tmp_path, max_retries=2)._deliver(PAYLOAD)
+
+    assert n8n.count == 3  # 1 percobaan + 2 retry
+    [record] = dead_letters(tmp_path)
+    assert record["reason"] == "HTTP 503"
+    assert record["payload"] == PAYLOAD and record["url"] == n8n.url
+
+
+def test_recovers_before_retries_run_out(n8n, tmp_path):
+    n8n.statuses = [502, 429, 200]
+    dispatcher(n8n.url, tmp_path, max_retries=2)._deliver(PAYLOAD)
+
+    assert n8n.count == 3
+    assert n8n.received == [PAYLOAD] * 3
+    assert dead_letters(tmp_path) == []
+
+
+def test_client_error_is_not_retried(n8n, tmp_path):
+    # 4xx selain 429 = payload/URL salah, retry tidak akan membantu
+    n8n.statuses = [400]
+    dispatcher(n8n.url, tmp_path, max_retries=2)._deliver(PAYLOAD)
+
+    assert n8n.count == 1
+    assert dead_letters(tmp_path) == []
+
+
+def test_connection_errors_are_dead_lettered(tmp_path):
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    dispatcher(f"http://127.0.0.1:{port}/webhook", tmp_path, max_retries=1)._deliver(PAYLOAD)
+
+    [record] = dead_letters(tmp_path)
+    assert record["payload"] == PAYLOAD and record["reason"]
+
+
+def test_full_queue_goes_straight_to_dead_letter(tmp_path):
+    # Tanpa worker, antrian tidak pernah dikosongkan
+    queue_full = dispatcher("http://127.0.0.1:9/webhook", tmp_path, queue_size=1, num_workers=0)
+    assert queue_full.notify(PAYLOAD)
+    assert not queue_full.notify({"email": "kedua@example.com"})
+
+    [record] = dead_letters(tmp_path)
+    assert record["reason"] == "queue full"
+    assert record["payload"] == {"email": "kedua@example.com"}
@@ -0,0 +1,126 @@
+import os
+import tempfile
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+from tensorflow.keras.layers import Input, Embedding, Conv1D, MaxPooling1D, LSTM, Bidirectional, Dropout, Dense
+from tensorflow.keras.models import Model, Sequential
+from tensorflow.keras.preprocessing.text import Tokenizer
+
+from backend.utils.numpy_runtime import load_bundle
+from ml_training.export_numpy import build_bundle
+from ml_training.compress_models import compress_bundle, read_bundle
+
+# Parity numpy_runtime vs Keras untuk semua layer yang di-export (conv1d padding same, maxpool,
+# BiLSTM, dense, embedding int8 QuantizedRows) memakai model kecil, tanpa file di backend/utils/models.
+#   python test_numpy_export.py
+
+MAX_LEN = 12
+VOCAB_SIZE = 40
+TOLERANCE = 1e-5
+TEXTS = ["video ini sangat bagus", "jelek sekali tidak suka", "tutorial masak enak", "berita politik hari ini"]
+
+
+def tiny_separate_model(num_classes):
+    return Sequential([
+        Input(shape=(MAX_LEN,), dtype='int32'),
+        Embedding(input_dim=VOCAB_SIZE, output_dim=8),
+        Conv1D(filters=6, kernel_size=3, padding='same', activation='relu'),
+        MaxPooling1D(pool_size=2),
+        Bidirectional(LSTM(5)),
+        Dropout(0.3),
+        Dense(4, activation='relu'),
+        Dense(num_classes, activation='softmax'),
+    ])
+
+
+def tiny_multitask_model(num_sentiment, num_category):
+    # Nama layer head sama dengan create_multitask_model (dipakai model_spec untuk memisahkan head)
+    inputs = Input(shape=(MAX_LEN,), dtype='int32', name="tokens")
+    x = Embedding(input_dim=VOCAB_SIZE, output_dim=8)(inputs)
+    x = Conv1D(filters=6, kernel_size=3, padding='same', activation='relu')(x)
+    x = MaxPooling1D(pool_size=2)(x)
+    x = Bidirectional(LSTM(5))(x)
+    x = Dropout(0.3)(x)
+    s = Dense(4, activation='relu', name="sentiment_dense")(x)
+    c = Dense(4, activation='relu', name="category_dense")(x)
+    outputs = [Dense(num_sentiment, activation='softmax', name="sentiment")(s),
+               Dense(num_category, activation='softmax', name="category")(c)]
+    return Model(inputs=inputs, outputs=outputs)
+
+
+def load_dequantized_weights(keras_models, arrays):
+    """Bobot Keras diganti q * scale dari bundle int8, jadi referensinya model yang sama persis"""
+    for name, model in keras_models.items():
+        for layer in model.layers:
+            weights = layer.get_weights()
+            if not weights:
+                continue
+            for i in range(len(weights)):
+                key = f"{name}/{layer.name}/{i}"
+                if f"{key}/scale" in arrays:
+                    weights[i] = arrays[key].astype(np.float32) * arrays[f"{key}/scale"]
+            layer.set_weights(weights)
+
+
+def max_abs_diff(keras_models, bundle_path, X):
+    _, numpy_models, _, _ = load_bundle(bundle_path)
+    worst = 0.0
+    for name, model in keras_models.items():
+        expected = model.predict(X, verbose=0)
+        actual = numpy_models[name].predict(X)
+        if not isinstance(expected, list):
+            expected, actual = [expected], [actual]
+        for exp, act in zip(expected, actual):
+            worst = max(worst, float(np.max(np.abs(exp - act))))
+    return worst
+
+
+def check_kind(kind, tmp_dir):
+    tokenizer = Tokenizer(num_words=VOCAB_SIZE, oov_token="<OOV>")
+    tokenizer.fit_on_texts(TEXTS)
+    sentiment_encoder = LabelEncoder().fit(["negative", "neutral", "positive"])
+    category_encoder = LabelEncoder().fit(["Edukasi", "Hiburan", "Kuliner", "Umum"])
+
+    if kind == "multitask":
+        keras_models = {"multitask": tiny_multitask_model(3, 4)}
+        heads = {"multitask": ["sentiment", "category"]}
+    else:
+        keras_models = {"sentiment": tiny_separate_model(3), "category": tiny_separate_model(4)}
+        heads = {}
+
+    # Token id acak (termasuk 0 = padding) supaya semua baris embedding ikut diuji
+    X = np.random.default_rng(42).integers(0, VOCAB_SIZE, size=(16, MAX_LEN)).astype(np.int32)
+
+    float32_path = os.path.join(tmp_dir, f"{kind}.float32.npz")
+    arrays = build_bundle(kind, keras_models, heads, tokenizer, sentiment_encoder, category_encoder, MAX_LEN)
+    np.savez(float32_path, **arrays)
+    diff = max_abs_diff(keras_models, float32_path, X)
+    print(f"{kind} float32: max abs diff = {diff:.2e}")
+    assert diff < TOLERANCE, f"{kind} float32 parity failed: {diff:.2e}"
+
+    int8_path = os.path.join(tmp_dir, f"{kind}.int8.npz")
+    manifest, arrays = read_bundle(float32_path)
+    quantized = compress_bundle(manifest, arrays)
+    np.savez(int8_path, **quantized)
+    load_dequantized_weights(keras_models, quantized)
+    diff = max_abs_diff(keras_models, int8_path, X)
+    print(f"{kind} int8: max abs diff = {diff:.2e}")
+    assert diff < TOLERANCE, f"{kind} int8 parity failed: {diff:.2e}"
+
+
+def test_numpy_export_parity():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for kind in ("separate", "multitask"):
+            check_kind(kind, tmp_dir)
+
+
+if __name__ == "__main__":
+    print("--- NumPy runtime vs Keras parity ---")
+    try:
+        test_numpy_export_parity()
+        print("\n✅ NumPy Export Parity Test Passed!")
+    except Exception as e:
+        print(f"\n❌ NumPy Export Parity Test Failed: {e}")
+        import traceback
+        traceback.print_exc()
+        raise SystemExit(1)
@@ -0,0 +1,77 @@
+import sqlite3
+
+from backend.utils.cache import PredictionCache, SQLiteCache, cache_key
+
+# Cache prediksi (backend/utils/cache.py): invalidasi saat versi model berubah dan shared tier SQLite
+#   python -m pytest -q test_prediction_cache.py
+
+RESULT = {"label": "positive", "confidence": "91.00%", "category": "Hiburan"}
+
+
+def test_new_model_version_invalidates_entries():
+    cache = PredictionCache(max_entries=10, db_path="")
+    cache.check_version("v1")
+    key_v1 = cache_key("video lucu", "v1")
+    cache.set(key_v1, RESULT)
+    assert cache.get(key_v1) == RESULT
+
+    # Versi model masuk ke key, dan LRU lokal dikosongkan saat versi berganti
+    cache.check_version("v2")
+    assert cache_key("video lucu", "v2") != key_v1
+    assert cache.get(key_v1) is None
+    assert cache.get(cache_key("video lucu", "v2")) is None
+    assert cache.stats()["model_version"] == "v2"
+
+    # Versi yang sama tidak menghapus apa pun
+    cache.set(key_v1, RESULT)
+    cache.check_version("v2")
+    assert cache.get(key_v1) == RESULT
+
+
+def test_shared_tier_is_visible_to_other_workers(tmp_path):
+    db_path = str(tmp_path / "prediction_cache.db")
+    worker_a = PredictionCache(max_entries=10, db_path=db_path)
+    worker_b = PredictionCache(max_entries=10, db_path=db_path)
+    key = cache_key("video lucu", "v1")
+
+    worker_a.set(key, RESULT)
+    assert worker_b.get(key) == RESULT
+    assert worker_b.hits == {"local": 0, "shared": 1}
+    # Hit dari shared tier disalin ke LRU lokal
+    assert worker_b.get(key) == RESULT
+    assert worker_b.hits == {"local": 1, "shared": 1}
+
+    assert worker_b.get(cache_key("video lain", "v1")) is None
+    assert worker_b.misses == 1
+
+
+def test_shared_tier_expires_and_prunes(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "prediction_cache.db")
+    expired = SQLiteCache(db_path, ttl=-1)
+    expired.set("old", RESULT)
+    assert expired.get("old") is None
+
+    monkeypatch.setattr(SQLiteCache, "PRUNE_EVERY", 5)
+    shared = SQLiteCache(db_path, max_entries=3)
+    for i in range(5):
+        shared.set(f"key-{i}", RESULT)
+    # Prune: entry kadaluarsa + entry terlama di atas max_entries
+    rows = sqlite3.connect(db_path).execute("SELECT COUNT(*) FROM prediction_cache").fetchone()[0]
+    assert rows == 3
+    assert shared.evictions == 3
+    assert shared.get("key-4") == RESULT
+
+
+def test_shared_tier_errors_fall_back_to_miss(tmp_path):
+    db_path = str(tmp_path / "prediction_cache.db")
+    cache = PredictionCache(max_entries=10, db_path=db_path)
+    key = cache_key("video lucu", "v1")
+    cache.set(key, RESULT)
+
+    # Tabel shared tier hilang (misalnya file db dibuat ulang): error SQLite dianggap miss, bukan exception
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DROP TABLE prediction_cache")
+    cache.local.clear()
+    assert cache.get(key) is None
+    cache.set(key, RESULT)
+    assert cache.get(key) == RESULT
@@ -0,0 +1,154 @@
+import os
+import sys
+import hashlib
+import importlib
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Persiapan data inkremental (ml_training/prepare_data.py): download kondisional (ETag/If-Modified-Since),
+# skip berdasarkan hash input, dan append hanya baris baru. IndoNLU di-serve dari direktori lokal.
+#   python -m pytest -q test_prepare_data.py
+
+TRAIN_ROWS = ["video ini bagus sekali\tpositive", "jelek banget\tnegative", "biasa saja\tneutral"]
+VALID_ROWS = ["mantap\tpositive", "kurang suka\tnegative"]
+DATASET = (
+    "title,description,label,category\n"
+    "Tutorial masak,resep enak,positive,Kuliner\n"
+    "Berita politik,debat panas,negative,Berita\n"
+)
+
+
+class IndoNLUHandler(SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler + ETag (hash isi file); If-Modified-Since ditangani handler bawaan"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        with self.server.lock:
+            self.server.requests.append((self.path, self.headers.get("If-None-Match"),
+                                         self.headers.get("If-Modified-Since")))
+        if not self.server.conditional:
+            for header in ("If-None-Match", "If-Modified-Since"):
+                del self.headers[header]
+        self.etag = None
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                self.etag = '"%s"' % hashlib.sha256(f.read()).hexdigest()[:16]
+            if self.headers.get("If-None-Match") == self.etag:
+                self.send_response(304)
+                self.end_headers()
+                return None
+        return super().send_head()
+
+    def end_headers(self):
+        if self.etag:
+            self.send_header("ETag", self.etag)
+        super().end_headers()
+
+
+def write_lines(path, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(rows) + "\n")
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    served = tmp_path / "indonlu"
+    served.mkdir()
+    write_lines(served / "train_preprocess.tsv", TRAIN_ROWS)
+    write_lines(served / "valid_preprocess.tsv", VALID_ROWS)
+    (tmp_path / "dataset.csv").write_text(DATASET, encoding="utf-8")
+
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", 0), lambda *args: IndoNLUHandler(*args, directory=str(served))
+    )
+    server.lock = threading.Lock()
+    server.requests = []
+    server.conditional = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    # prepare_data membaca INDONLU_URL dan membuat folder data/ saat import, jadi di-import ulang di tmp_path
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("INDONLU_URL", f"http://{host}:{port}")
+    sys.modules.pop("ml_training.prepare_data", None)
+    module = importlib.import_module("ml_training.prepare_data")
+    yield tmp_path, served, server, module
+    sys.modules.pop("ml_training.prepare_data", None)
+    server.shutdown()
+    server.server_close()
+
+
+def prepare(module):
+    """Sama dengan __main__ prepare_data.py"""
+    state = module.load_state()
+    df_internal = module.load_internal_dataset()
+    module.prepare_sentiment_data(state, df_internal)
+    module.prepare_category_data(state, df_internal)
+    module.save_state(state)
+
+
+def snapshot(tmp_path):
+    outputs = [tmp_path / "data" / name for name in ("final_sentiment_data.csv", "final_category_data.csv")]
+    return [(path.read_bytes(), path.stat().st_mtime_ns) for path in outputs]
+
+
+def test_second_run_is_conditional_and_leaves_outputs_untouched(workdir, capsys):
+    tmp_path, _, server, module = workdir
+    prepare(module)
+    sentiment = (tmp_path / "data" / "final_sentiment_data.csv").read_text().splitlines()
+    assert len(sentiment) == 1 + len(TRAIN_ROWS) + len(VALID_ROWS) + 2
+    before = snapshot(tmp_path)
+    server.requests.clear()
+    capsys.readouterr()
+
+    prepare(module)
+    out = capsys.readouterr().out
+    assert len(server.requests) == 2
+    assert all(etag and modified_since for _, etag, modified_since in server.requests)
+    assert out.count("Not modified:") == 2
+    assert out.count("Inputs unchanged, skipping") == 2
+    assert snapshot(tmp_path) == before
+
+
+def test_identical_content_is_skipped_by_hash(workdir, capsys):
+    tmp_path, served, server, module = workdir
+    prepare(module)
+    before = snapshot(tmp_path)
+    capsys.readouterr()
+
+    # Server tanpa dukungan conditional request + file di-touch: download ulang, isi tetap sama
+    server.conditional = False
+    os.utime(served / "train_preprocess.tsv")
+    prepare(module)
+    out = capsys.readouterr().out
+    assert out.count("Downloaded:") == 2
+    assert out.count("Inputs unchanged, skipping") == 2
+    assert snapshot(tmp_path) == before
+
+
+def test_appended_rows_are_written_incrementally(workdir, capsys):
+    tmp_path, served, _, module = workdir
+    prepare(module)
+    output = tmp_path / "data" / "final_sentiment_data.csv"
+    previous = output.read_text()
+    category_before = snapshot(tmp_path)[1]
+    capsys.readouterr()
+
+    new_rows = ["lucu banget videonya\tpositive", "membosankan\tnegative"]
+    write_lines(served / "train_preprocess.tsv", TRAIN_ROWS + new_rows)
+    prepare(module)
+    out = capsys.readouterr().out
+
+    assert "Downloaded: data/indonlu_train.tsv" in out
+    assert "Not modified: data/indonlu_valid.tsv" in out
+    assert f"Appended {len(new_rows)} new rows" in out
+    current = output.read_text()
+    assert current.startswith(previous)
+    assert current[len(previous):].splitlines() == ["lucu banget videonya,positive", "membosankan,negative"]
+    # dataset.csv tidak berubah, output category tidak disentuh
+    assert snapshot(tmp_path)[1] == category_before
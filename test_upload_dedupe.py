@@ -0,0 +1,105 @@
+import os
+import uuid
+
+import pytest
+
+from backend.utils.credentials import CredentialManager, SQLiteCredentialStore
+from backend.utils.jobs import DONE, JobQueue, WorkerPool
+from backend.utils.uploads import UploadIndex, discard_upload
+
+# Dua session mengupload video dengan isi yang sama: file & job masing-masing tidak boleh saling menghapus
+#   python -m pytest -q test_upload_dedupe.py
+
+VIDEO = os.urandom(64 * 1024)
+
+
+@pytest.fixture
+def routes(tmp_path, monkeypatch):
+    # Database job/credentials dan folder uploads di tmp_path. Thread background tidak di-start saat
+    # import (GUNICORN_PRELOAD=1, start_background_workers hanya dipanggil di post_fork) dan job worker
+    # tidak ada, jadi job yang di-enqueue tetap "queued" (aktif) selama test
+    for name, value in {
+        "GUNICORN_PRELOAD": "1",
+        "JOB_DB_PATH": str(tmp_path / "jobs.db"),
+        "CREDENTIAL_DB_PATH": str(tmp_path / "credentials.db"),
+        "JOB_WORKERS": "0",
+        "MODEL_REGISTRY_POLL_INTERVAL": "0",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("uploads", exist_ok=True)
+
+    from backend import routes
+    # Singleton routes dibuat saat import pertama; jika modul sudah di-import test lain, ganti ke tmp_path
+    job_queue = JobQueue(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(routes, "job_queue", job_queue)
+    monkeypatch.setattr(routes, "job_workers", WorkerPool(job_queue, {}, num_workers=0))
+    monkeypatch.setattr(routes, "upload_index", UploadIndex(str(tmp_path / "jobs.db")))
+    monkeypatch.setattr(routes, "credential_manager", CredentialManager(
+        store=SQLiteCredentialStore(str(tmp_path / "credentials.db")), refresh_interval=0
+    ))
+    return routes
+
+
+@pytest.fixture
+def client(routes):
+    from backend.app import app
+    return app.test_client()
+
+
+def multipart_body(fields, content):
+    boundary = uuid.uuid4().hex
+    parts = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+        for name, value in fields.items()
+    ]
+    parts.append(
+        f'--{boundary}\r\nContent-Disposition: form-data; name="video"; filename="clip.mp4"\r\n'
+        f'Content-Type: video/mp4\r\n\r\n'.encode("utf-8") + content + b"\r\n"
+    )
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def upload(client, token, title="Video lucu", description="bagus sekali"):
+    body, content_type = multipart_body(
+        {"title": title, "description": description, "email": "test@example.com", "token": token}, VIDEO
+    )
+    response = client.post("/upload", data=body, content_type=content_type)
+    return response.status_code, response.get_json()
+
+
+def video_path(routes, job_id):
+    return routes.job_queue.get(job_id)["payload"]["video_path"]
+
+
+def test_same_content_from_two_sessions(routes, client):
+    for token in ("session-a", "session-b"):
+        routes.credential_manager.store.put(token, {
+            "token": f"{token}-access", "refresh_token": None, "token_uri": "https://oauth2.googleapis.com/token",
+            "client_id": "test-client", "client_secret": "test-secret", "scopes": [], "expiry": None,
+        })
+
+    status_a, job_a = upload(client, "session-a")
+    status_b, job_b = upload(client, "session-b")
+    assert (status_a, status_b) == (202, 202), (job_a, job_b)
+    path_a, path_b = video_path(routes, job_a["job_id"]), video_path(routes, job_b["job_id"])
+    assert path_a != path_b, "sessions share one video file"
+    print(f"session-a -> {os.path.basename(path_a)}\nsession-b -> {os.path.basename(path_b)}")
+
+    # Upload tanpa login dengan isi yang sama tidak menyentuh file milik job lain
+    status, _ = upload(client, "unknown-session")
+    assert status == 401
+    assert os.path.exists(path_a) and os.path.exists(path_b)
+
+    # Job session-a selesai, upload ulang = duplicate; file barunya dibuang, video session-b tetap ada
+    routes.job_queue.update(job_a["job_id"], status=DONE)
+    status, duplicate = upload(client, "session-a")
+    assert status == 200 and duplicate["duplicate"] and duplicate["job_id"] == job_a["job_id"], duplicate
+    assert os.path.exists(path_b), "duplicate upload removed another session's active video"
+    assert sorted(os.listdir("uploads")) == sorted(os.path.basename(p) for p in (path_a, path_b))
+
+    # File yang masih dirujuk job aktif tidak pernah dihapus, apa pun entry index yang cocok
+    assert not discard_upload(path_b, routes.job_queue) and os.path.exists(path_b)
+    assert discard_upload(path_a, routes.job_queue) and not os.path.exists(path_a)
+
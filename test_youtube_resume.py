@@ -0,0 +1,109 @@
+import os
+import socket
+import threading
+
+import pytest
+import google.oauth2.credentials
+
+from backend.utils import youtube
+from benchmarks.inference import FakeYouTubeHandler, start_fake_server
+
+# Resumable upload YouTube (backend/utils/youtube.py) ke fake server lokal: retry saat 503 / koneksi
+# putus, dan lanjut dari URI sesi yang di-checkpoint memakai status query (308 + Range)
+#   python -m pytest -q test_youtube_resume.py
+
+CHUNK = 256 * 1024
+VIDEO = os.urandom(4 * CHUNK + 1000)
+
+
+@pytest.fixture
+def server(monkeypatch, tmp_path):
+    server = start_fake_server(FakeYouTubeHandler)
+    host, port = server.server_address
+    monkeypatch.setattr(youtube, "YOUTUBE_API_ROOT", f"http://{host}:{port}/")
+    monkeypatch.setattr(youtube, "_discovery_document", None)
+    monkeypatch.setattr(youtube, "_service_cache", threading.local())
+    monkeypatch.setattr(youtube, "UPLOAD_CHUNK_SIZE", CHUNK)
+    monkeypatch.setattr(youtube, "UPLOAD_MAX_BACKOFF", 0.01)
+    server.video_path = str(tmp_path / "clip.mp4")
+    with open(server.video_path, "wb") as f:
+        f.write(VIDEO)
+    # Setelah koneksi putus httplib2 mengirim ulang request dengan body stream yang sudah habis dibaca,
+    # server menunggu sisa body sampai socket timeout (default 60 detik) lalu upload_video retry
+    timeout = socket.getdefaulttimeout()
+    socket.setdefaulttimeout(2)
+    yield server
+    socket.setdefaulttimeout(timeout)
+    server.shutdown()
+    server.server_close()
+
+
+def upload(server, resume_uri=None):
+    sessions = []
+    result = youtube.upload_video(
+        google.oauth2.credentials.Credentials(token="test-token"), server.video_path, "Video lucu", "bagus",
+        resume_uri=resume_uri, on_session=sessions.append,
+    )
+    return result, sessions
+
+
+def chunk_starts(server, session):
+    return [int(r.partition("-")[0]) for s, r in server.requests if s == session and not r.startswith("*")]
+
+
+def test_retries_503_and_dropped_connections(server):
+    server.faults.extend(["503", "drop", "503"])
+    result, sessions = upload(server)
+
+    session = sessions[0].rpartition("/")[2]
+    assert len(sessions) == 1
+    assert bytes(server.sessions[session]) == VIDEO
+    assert result["id"] == server.videos[session]
+    assert not server.faults
+    # Chunk pertama: 503 lalu dikirim ulang (diterima, koneksi putus); chunk kedua: 503 lalu dikirim ulang.
+    # Setelah koneksi putus offset diambil dari Range server, chunk pertama tidak dikirim untuk ketiga kalinya
+    assert chunk_starts(server, session) == [0, 0, CHUNK, CHUNK, 2 * CHUNK, 3 * CHUNK, 4 * CHUNK]
+
+
+def test_resumes_from_checkpointed_session(server, monkeypatch):
+    # Upload pertama berhenti di tengah (worker mati / retry habis), URI sesi sudah di-checkpoint
+    monkeypatch.setattr(youtube, "UPLOAD_MAX_RETRIES", 0)
+    sessions = []
+    server.faults.extend([None, None, "503"])
+    with pytest.raises(youtube.HttpError):
+        youtube.upload_video(
+            google.oauth2.credentials.Credentials(token="test-token"), server.video_path, "Video lucu", "bagus",
+            on_session=sessions.append,
+        )
+    session = sessions[0].rpartition("/")[2]
+    assert len(server.sessions[session]) == 2 * CHUNK
+
+    monkeypatch.setattr(youtube, "UPLOAD_MAX_RETRIES", 8)
+    before = len(server.requests)
+    result, resumed = upload(server, resume_uri=sessions[0])
+
+    assert resumed == []  # sesi yang sama, bukan sesi baru
+    assert server.requests[before] == (session, f"*/{len(VIDEO)}")
+    assert chunk_starts(server, session)[-3:] == [2 * CHUNK, 3 * CHUNK, 4 * CHUNK]
+    assert bytes(server.sessions[session]) == VIDEO
+    assert result["id"] == server.videos[session]
+
+
+def test_resume_after_upload_already_finished(server):
+    result, sessions = upload(server)
+    before = len(server.requests)
+
+    # Response terakhir hilang tapi server sudah menerima semua byte: status query langsung selesai
+    again, _ = upload(server, resume_uri=sessions[0])
+    assert again["id"] == result["id"]
+    assert len(server.requests) == before + 1
+    assert server.count == 1
+
+
+def test_expired_session_starts_over(server):
+    host, port = server.server_address
+    result, sessions = upload(server, resume_uri=f"http://{host}:{port}/upload-session/expired")
+
+    assert len(sessions) == 1 and not sessions[0].endswith("/expired")
+    assert bytes(server.sessions[sessions[0].rpartition("/")[2]]) == VIDEO
+    assert result["id"]
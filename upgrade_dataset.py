@@ -1,34 +1,77 @@
+import os
+import time
+import argparse
 import pandas as pd
 
-# Load dataset
-file_path = "dataset.csv"
-try:
+from ml_training.category_rules import CategoryRules, legacy_assign_category, CHUNK_SIZE
+
+# Keyword-based categorization (rule engine di ml_training/category_rules.py)
+FILE_PATH = "dataset.csv"
+
+def upgrade(file_path=FILE_PATH, output_path=None, chunk_size=None):
+    output_path = output_path or file_path
+    rules = CategoryRules()
+
+    if chunk_size:
+        # Streaming per chunk untuk CSV besar
+        rows = rules.label_csv(file_path, output_path, chunk_size=chunk_size)
+        print(f"Dataset successfully upgraded with 'category' column! ({rows} rows)")
+        return
+
+    # Load dataset
+    try:
+        df = pd.read_csv(file_path)
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+        return
+
+    # Apply mapping
+    df['category'] = rules.label_frame(df)
+
+    # Save back to CSV
+    df.to_csv(output_path, index=False)
+    print("Dataset successfully upgraded with 'category' column!")
+    print(df.head())
+
+def benchmark(file_path=FILE_PATH, rows=200000):
+    """Bandingkan df.apply(assign_category) lama dengan rule engine vectorized"""
     df = pd.read_csv(file_path)
-except Exception as e:
-    print(f"Error reading {file_path}: {e}")
-    exit()
-
-# Define keyword-based categorization
-def assign_category(row):
-    text = (str(row['title']) + " " + str(row['description'])).lower()
-    
-    if any(x in text for x in ['python', 'react', 'java', 'sql', 'php', 'node', 'code', 'html', 'css', 'javascript', 'algorithm', 'git', 'excel', 'word', 'powerpoint', 'figma', 'canva', 'photoshop', 'illustrator', 'seo', 'machine learning', 'data science', 'ai']):
-        return "Teknologi"
-    elif any(x in text for x in ['mukbang', 'makan', 'kuliner', 'food', 'pedas', 'enak', 'restoran', 'kue', 'roti', 'pizza', 'burger', 'sushi', 'ramen', 'seafood']):
-        return "Kuliner"
-    elif any(x in text for x in ['vlog', 'liburan', 'travel', 'pantai', 'gunung', 'alam', 'kota', 'daily', 'hari', 'seru', 'pengalaman']):
-        return "Vlog"
-    elif any(x in text for x in ['belajar', 'tutorial', 'panduan', 'edukasi', 'matematika', 'fisika', 'kimia', 'biologi', 'sejarah', 'ekonomi', 'bahasa', 'statistik', 'rumit', 'sulit', 'kompleks']):
-        return "Edukasi"
-    elif any(x in text for x in ['drama', 'film', 'musik', 'lagu', 'lucu', 'menghibur', 'seram', 'horor', 'hantu', 'menakutkan', 'kekerasan']):
-        return "Hiburan"
-    else:
-        return "Umum"
+    df = pd.concat([df] * (rows // len(df) + 1), ignore_index=True).iloc[:rows]
+
+    started = time.perf_counter()
+    legacy = df.apply(legacy_assign_category, axis=1).to_numpy()
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    rules = CategoryRules()
+    vectorized = rules.label_frame(df)
+    vectorized_seconds = time.perf_counter() - started
+
+    mismatches = int((legacy != vectorized).sum())
+    print(f"Rows: {len(df)}")
+    print(f"df.apply (legacy): {legacy_seconds:.2f}s ({len(df) / legacy_seconds:.0f} rows/s)")
+    print(f"CategoryRules:     {vectorized_seconds:.2f}s ({len(df) / vectorized_seconds:.0f} rows/s)")
+    print(f"Speedup: {legacy_seconds / vectorized_seconds:.1f}x, mismatches: {mismatches}")
+    return mismatches
 
-# Apply mapping
-df['category'] = df.apply(assign_category, axis=1)
+def main():
+    parser = argparse.ArgumentParser(description="Assign keyword-based categories to dataset.csv")
+    parser.add_argument("--input", default=FILE_PATH)
+    parser.add_argument("--output", help="Default: tulis kembali ke file input")
+    parser.add_argument("--chunk-size", type=int, nargs="?", const=CHUNK_SIZE,
+                        help="Proses CSV per chunk (untuk file besar)")
+    parser.add_argument("--benchmark", action="store_true", help="Bandingkan dengan implementasi lama")
+    parser.add_argument("--rows", type=int, default=200000, help="Jumlah baris untuk --benchmark")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"Error reading {args.input}: file not found")
+        return
+
+    if args.benchmark:
+        benchmark(args.input, args.rows)
+    else:
+        upgrade(args.input, args.output, args.chunk_size)
 
-# Save back to CSV
-df.to_csv(file_path, index=False)
-print("Dataset successfully upgraded with 'category' column!")
-print(df.head())
+if __name__ == "__main__":
+    main()